@@ -0,0 +1,40 @@
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Query
+from datetime import datetime, timezone
+from uuid import UUID
+
+from app.api.schemas import DeliveryLogStatus
+from app.services import archive
+
+router = APIRouter()
+
+
+@router.get("/logs", response_model=Dict[str, Any])
+def search_archived_logs(
+    subscription_id: Optional[UUID] = Query(None, description="Only logs of this subscription"),
+    start: Optional[datetime] = Query(None, description="Only logs created at or after this time (UTC)"),
+    end: Optional[datetime] = Query(None, description="Only logs created before this time (UTC)"),
+    status: Optional[DeliveryLogStatus] = Query(None, description="Only logs with this status"),
+    status_code: Optional[int] = Query(None, description="Only logs with this HTTP status code"),
+    delivery_task_id: Optional[UUID] = Query(None, description="Only logs of this delivery task"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of logs to return"),
+):
+    """
+    Search delivery logs archived before retention deleted them.
+
+    The archive index narrows the search to files whose subscription, time
+    range, statuses and status codes can match; only those are read.
+    """
+    # Archived times are naive UTC
+    if start is not None and start.tzinfo is not None:
+        start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    if end is not None and end.tzinfo is not None:
+        end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    return archive.query(
+        subscription_id=str(subscription_id) if subscription_id else None,
+        start=start, end=end,
+        status=status.value if status else None,
+        status_code=status_code,
+        delivery_task_id=str(delivery_task_id) if delivery_task_id else None,
+        limit=limit,
+    )
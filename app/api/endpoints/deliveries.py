@@ -0,0 +1,49 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import datetime
+from uuid import UUID
+
+from app.db.base import get_read_db
+from app.api import pagination
+from app.api.schemas import CursorPage, DeliveryTask, DeliveryTaskStatus
+from app.crud import crud_delivery
+from app.db.models.delivery_task import DeliveryStatus as TaskStatus
+
+router = APIRouter()
+
+
+@router.get("/", response_model=CursorPage[DeliveryTask])
+def search_deliveries(
+    status: Optional[DeliveryTaskStatus] = Query(None, description="Only tasks with this status"),
+    event_type: Optional[str] = Query(None, description="Only tasks of this event type"),
+    subscription_id: Optional[UUID] = Query(None, description="Only tasks of this subscription"),
+    created_after: Optional[datetime] = Query(None, description="Only tasks created at or after this time (UTC)"),
+    created_before: Optional[datetime] = Query(None, description="Only tasks created before this time (UTC)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Search delivery tasks, newest first, including finished tasks moved to history.
+    
+    Pages are keyset-paginated: pass next_cursor back as cursor for the next
+    page. estimated_total is the planner's estimate of matching tasks.
+    """
+    if created_after and created_before and created_after >= created_before:
+        raise HTTPException(status_code=400, detail="created_after must be before created_before")
+    
+    filters = {
+        "status": TaskStatus(status.value) if status else None,
+        "event_type": event_type,
+        "subscription_id": subscription_id,
+        "created_after": created_after,
+        "created_before": created_before,
+    }
+    tasks = crud_delivery.search_tasks(db, cursor=cursor, limit=limit, **filters)
+    
+    return {
+        "items": tasks[:limit],
+        "next_cursor": pagination.next_cursor(tasks, limit),
+        "estimated_total": crud_delivery.estimate_tasks(db, **filters),
+    }
@@ -1,17 +1,18 @@
 from typing import Dict, Any, Optional
-from fastapi import APIRouter, Depends, HTTPException, Path, Header, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, Path, Header, Query, Request, Response
 from sqlalchemy.orm import Session
 from uuid import UUID
 import json
 import hmac
+from datetime import datetime, timezone
 import hashlib
 import logging
 
-from app.db.base import get_db
+from app.db.base import get_db, get_read_db
 from app.api.schemas import DeliveryTaskCreate, DeliveryTask, MessageResponse, DeliveryTaskWithLogs
 from app.crud import crud_subscription, crud_delivery
-from app.services import cache
-from app.workers.tasks import process_webhook_delivery
+from app.services import cache, retry_policy, fair_queue
+from app.workers import messages, batching, queue, lanes, ordering, expiry, coalescing
 from app.core.config import settings
 from app.api import deps
 
@@ -45,12 +46,16 @@ async def ingest_webhook(
     subscription_id: UUID = Path(..., description="The ID of the subscription"),
     x_event_type: Optional[str] = Header(None, description="Optional event type"),
     x_webhook_signature: Optional[str] = Header(None, description="HMAC signature of payload"),
+    x_ordering_key: Optional[str] = Header(None, max_length=200, description="Optional key to order by within an ordered subscription"),
+    x_event_ttl: Optional[int] = Header(None, ge=1, description="Optional seconds after which the event is dropped instead of delivered"),
+    deliver_at: Optional[datetime] = Query(None, description="Optional time to schedule the first delivery attempt for"),
     db: Session = Depends(get_db)
 ):
     """
     Ingest a webhook payload for delivery.
     
-    This endpoint receives a webhook payload and queues it for asynchronous delivery.
+    This endpoint receives a webhook payload and queues it for asynchronous delivery,
+    or schedules it through the delay queue when deliver_at is in the future.
     """
     # Check Content-Length header first to avoid DoS attacks
     max_payload_size = getattr(settings, "MAX_WEBHOOK_PAYLOAD_SIZE", 1024 * 1024)  # Default: 1MB
@@ -114,16 +119,73 @@ async def ingest_webhook(
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
     
+    # Times are stored as naive UTC throughout
+    if deliver_at is not None and deliver_at.tzinfo is not None:
+        deliver_at = deliver_at.astimezone(timezone.utc).replace(tzinfo=None)
+    scheduled = deliver_at is not None and deliver_at > datetime.utcnow()
+    
     # Create delivery task
     task_in = DeliveryTaskCreate(
         subscription_id=subscription_id,
         payload=payload,
-        event_type=x_event_type
+        event_type=x_event_type,
+        next_attempt_at=deliver_at if scheduled else None,
+        max_retries=retry_policy.max_retries_for(subscription.retry_policy),
+        ordering_key=ordering.ordering_key_for(subscription_id, x_ordering_key) if subscription.ordered else None,
+        expires_at=expiry.expires_at_for(
+            x_event_ttl or subscription.event_ttl_seconds,
+            deliver_at if scheduled else datetime.utcnow()
+        )
+    )
+    delivery_task = crud_delivery.create_delivery_task(
+        db, obj_in=task_in, with_outbox=settings.WEBHOOK_OUTBOX_ENABLED
     )
-    delivery_task = crud_delivery.create_delivery_task(db, obj_in=task_in)
     
-    # Queue the task for processing
-    process_webhook_delivery.delay(str(delivery_task.id))
+    # With the outbox enabled the relay publishes the task after commit
+    if settings.WEBHOOK_OUTBOX_ENABLED:
+        return delivery_task
+    
+    lane = lanes.route(lanes.lane_for(x_event_type, subscription.priority_lane), subscription.id)
+    
+    if scheduled:
+        queue.get_backend().schedule(
+            str(delivery_task.id),
+            countdown=(deliver_at - datetime.utcnow()).total_seconds(),
+            lane=lane
+        )
+        return delivery_task
+    
+    # Under fair dispatch the task waits in its subscription's sub-queue until
+    # the dispatcher gives the subscription its turn
+    if settings.FAIR_DISPATCH_ENABLED:
+        fair_queue.push(
+            str(subscription_id), [lanes.tag(str(delivery_task.id), lane)],
+            weight=subscription.dispatch_weight
+        )
+        return delivery_task
+    
+    # Ordered tasks are delivered by whoever holds their ordering key
+    if delivery_task.ordering_key is not None:
+        ordering.kick(delivery_task.ordering_key, lane)
+        return delivery_task
+    
+    # Batching subscriptions get the task in their next coalesced batch
+    if subscription.batch_delivery:
+        coalescing.kick(subscription.id, subscription.batch_delivery, lane)
+        return delivery_task
+    
+    # Queue the task for processing - either as part of a micro-batch, or on its
+    # own embedding what the worker needs for the first attempt so it doesn't
+    # have to read it back from the database
+    if settings.WEBHOOK_BATCH_PUBLISH_ENABLED:
+        batching.get_publisher(lane).add(str(delivery_task.id))
+        return delivery_task
+
+    backend = queue.get_backend()
+    envelope = None
+    if backend.supports_envelopes and messages.envelopes_enabled():
+        envelope = messages.build_delivery_envelope(subscription, raw_body)
+    backend.enqueue(str(delivery_task.id), envelope, lane=lane)
     
     return delivery_task
 
@@ -131,10 +193,12 @@ async def ingest_webhook(
 @router.get("/delivery/{delivery_task_id}", response_model=DeliveryTaskWithLogs)
 def get_delivery_status(
     delivery_task_id: UUID = Path(..., description="The ID of the delivery task"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get the status and logs of a webhook delivery task.
+    
+    Served from a replica when one is configured and current enough.
     """
     # Use a transaction for consistent reads
     with db.begin():
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from celery.result import AsyncResult
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import uuid
 import time
 
+from app.core.config import settings
 from app.db.base import get_db
+from app.db import base as db_base
 from app.api.schemas import HealthResponse
 from app.services.cache import redis_client
 from app.workers.celery_app import celery_app
+from app.workers import lanes, queue, expiry, sharding, concurrency
+from app.services import retention
 
 router = APIRouter()
 
@@ -121,4 +125,92 @@ def readiness_probe():
     """
     Kubernetes readiness probe endpoint
     """
-    return {"status": "ready"}
\ No newline at end of file
+    return {"status": "ready"}
+
+
+@router.get("/lanes", response_model=Dict[str, Any])
+def get_lane_stats(minutes: int = Query(5, ge=1, le=60, description="Window to report queue wait for")):
+    """
+    Per-lane queue depth and queue wait (time from a delivery becoming due to
+    a worker claiming it), for sizing each lane's worker capacity.
+    """
+    stats = lanes.latency_stats(minutes)
+    backend = queue.get_backend()
+    for lane, lane_stats in stats.items():
+        try:
+            lane_stats["depth"] = backend.depth(lane)
+        except Exception as e:
+            lane_stats["depth"] = None
+            lane_stats["error"] = str(e)
+    return {"window_minutes": minutes, "lanes": stats}
+
+
+@router.get("/shards", response_model=Dict[str, Any])
+def get_shard_assignment():
+    """
+    Which workers consume each default-lane shard under sharded routing, and
+    how many shards each worker holds.
+    """
+    if not settings.SHARDED_ROUTING_ENABLED:
+        return {"enabled": False, "shards": {}, "workers": {}}
+
+    shards = {
+        lanes.queue_for(sharding.shard_route(shard)): sharding.owners(shard)
+        for shard in range(settings.SHARD_COUNT)
+    }
+    workers = {
+        worker: len(sharding.shards_for_worker(worker))
+        for worker in settings.SHARD_WORKERS
+    }
+    return {"enabled": True, "replicas": settings.SHARD_REPLICAS, "shards": shards, "workers": workers}
+
+
+@router.get("/concurrency", response_model=Dict[str, Any])
+def get_concurrency_limits():
+    """
+    Current in-flight limit of each worker under adaptive concurrency.
+    """
+    return {
+        "enabled": settings.ADAPTIVE_CONCURRENCY_ENABLED,
+        "min": settings.ADAPTIVE_CONCURRENCY_MIN,
+        "max": settings.ADAPTIVE_CONCURRENCY_MAX,
+        "workers": concurrency.current_limits() if settings.ADAPTIVE_CONCURRENCY_ENABLED else {},
+    }
+
+
+@router.get("/expired", response_model=Dict[str, Any])
+def get_expired_counts(subscription_id: Optional[uuid.UUID] = Query(None, description="Only count this subscription")):
+    """
+    Number of delivery tasks dropped because they outlived their TTL.
+    """
+    return {
+        "subscription_id": str(subscription_id) if subscription_id else None,
+        "expired": expiry.expired_count(str(subscription_id) if subscription_id else None),
+    }
+
+
+@router.get("/retention", response_model=Dict[str, Any])
+def get_retention_runs():
+    """
+    Last run of each retention policy: rows deleted, duration and throughput.
+    """
+    return {
+        "chunk_size": settings.RETENTION_CHUNK_SIZE,
+        "policies": retention.last_reports(),
+    }
+
+
+@router.get("/replicas", response_model=Dict[str, Any])
+def get_replica_lag():
+    """
+    Lag of each read replica and whether read-only endpoints currently use it.
+    """
+    replicas = []
+    for index, engine in enumerate(db_base.replica_engines):
+        lag = db_base.replica_lag(index)
+        replicas.append({
+            "host": engine.url.host,
+            "lag_seconds": lag if lag != float("inf") else None,
+            "in_use": lag <= settings.DB_REPLICA_MAX_LAG_SECONDS,
+        })
+    return {"max_lag_seconds": settings.DB_REPLICA_MAX_LAG_SECONDS, "replicas": replicas}
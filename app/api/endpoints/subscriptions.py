@@ -1,20 +1,23 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from typing import List, Any, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
 from sqlalchemy.orm import Session
 from uuid import UUID
+from datetime import datetime, timedelta, timezone
 import hashlib
 import time
 
-from app.db.base import get_db
+from app.db.base import get_db, get_read_db
+from app.api import pagination
 from app.api.schemas import (
     Subscription, SubscriptionCreate, SubscriptionUpdate, 
     MessageResponse, PaginatedResponse, DeliveryLog
 )
 from app.crud import crud_subscription
 from app.crud import crud_delivery
-from app.services import cache
+from app.services import cache, fair_queue
 from app.services.cache import redis_client
 from app.core.config import settings
+from app.workers import purge, counters
 
 router = APIRouter()
 
@@ -84,15 +87,27 @@ def create_subscription(
 
 @router.get("/", response_model=List[Subscription])
 def get_subscriptions(
-    skip: int = 0, 
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    skip: int = Query(0, ge=0, description="Deprecated offset paging; use cursor instead"),
+    db: Session = Depends(get_read_db)
 ):
     """
-    Retrieve all webhook subscriptions with pagination.
+    Retrieve webhook subscriptions, oldest first, with keyset pagination.
+    
+    The X-Next-Cursor response header holds the cursor of the next page (absent
+    on the last one) and X-Total-Count an estimate of the number of subscriptions.
     """
-    subscriptions = crud_subscription.get_all(db, skip=skip, limit=limit)
-    return subscriptions
+    if skip:
+        return crud_subscription.get_all(db, skip=skip, limit=limit)
+    
+    subscriptions = crud_subscription.get_page(db, cursor=cursor, limit=limit)
+    next_cursor = pagination.next_cursor(subscriptions, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["X-Total-Count"] = str(crud_subscription.estimate_total(db))
+    return subscriptions[:limit]
 
 
 @router.get("/{subscription_id}", response_model=Subscription)
@@ -149,14 +164,31 @@ def delete_subscription(
     # Invalidate the cache
     cache.invalidate_subscription_cache(subscription_id)
     
+    # Its tasks and logs are purged in the background
+    purge.start(subscription_id)
+    
     return {"message": "Subscription deleted successfully"}
 
 
+@router.get("/{subscription_id}/purge", response_model=Dict[str, Any])
+def get_subscription_purge(
+    subscription_id: UUID = Path(..., description="The ID of the deleted subscription"),
+):
+    """
+    Get the progress of purging a deleted subscription's tasks and logs.
+    """
+    progress = purge.get_progress(subscription_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="No purge recorded for this subscription")
+    
+    return {"subscription_id": str(subscription_id), **progress}
+
+
 @router.get("/{subscription_id}/deliveries", response_model=List[DeliveryLog])
 def get_subscription_deliveries(
     subscription_id: UUID = Path(..., description="The ID of the subscription"),
     limit: int = Query(20, description="Number of delivery logs to return"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get recent delivery logs for a specific subscription.
@@ -171,4 +203,81 @@ def get_subscription_deliveries(
         db, subscription_id=subscription_id, limit=limit
     )
     
-    return delivery_logs
\ No newline at end of file
+    return delivery_logs
+
+
+@router.get("/{subscription_id}/stats", response_model=Dict[str, Any])
+def get_subscription_stats(
+    subscription_id: UUID = Path(..., description="The ID of the subscription"),
+    start: Optional[datetime] = Query(None, description="Start of the range (UTC), default 24 hours before end"),
+    end: Optional[datetime] = Query(None, description="End of the range (UTC), default now"),
+    granularity: str = Query("hour", description="Bucket size: hour or day"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get a subscription's delivery attempts, successes, failures and expiries per bucket.
+    
+    Read from the hourly delivery counters, so the cost depends on the number
+    of buckets in the range rather than on the number of deliveries.
+    """
+    subscription = crud_subscription.get(db, id=subscription_id)
+    if not subscription:
+        raise HTTPException(status_code=404, detail="Subscription not found")
+    if granularity not in ("hour", "day"):
+        raise HTTPException(status_code=400, detail="granularity must be hour or day")
+    
+    # Times are stored as naive UTC throughout
+    if start is not None and start.tzinfo is not None:
+        start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    if end is not None and end.tzinfo is not None:
+        end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    end = end or datetime.utcnow()
+    start = counters.bucket_of(start or end - timedelta(hours=24))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if end - start > timedelta(hours=settings.DELIVERY_STATS_MAX_HOURS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range is limited to {settings.DELIVERY_STATS_MAX_HOURS} hours"
+        )
+    
+    rows = crud_delivery.get_subscription_counters(db, subscription_id, start, end)
+    
+    buckets: Dict[datetime, Dict[str, int]] = {}
+    for row in rows:
+        bucket = row.bucket if granularity == "hour" else row.bucket.replace(hour=0)
+        totals = buckets.setdefault(bucket, dict.fromkeys(counters.COUNTERS, 0))
+        for counter in counters.COUNTERS:
+            totals[counter] += getattr(row, counter)
+    
+    return {
+        "subscription_id": str(subscription_id),
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "granularity": granularity,
+        "totals": {
+            counter: sum(totals[counter] for totals in buckets.values())
+            for counter in counters.COUNTERS
+        },
+        "buckets": [{"bucket": bucket.isoformat(), **totals} for bucket, totals in buckets.items()],
+    }
+
+
+@router.get("/{subscription_id}/backlog", response_model=Dict[str, Any])
+def get_subscription_backlog(
+    subscription_id: UUID = Path(..., description="The ID of the subscription"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the number of deliveries waiting in a subscription's fair dispatch sub-queue.
+    """
+    subscription = crud_subscription.get(db, id=subscription_id)
+    if not subscription:
+        raise HTTPException(status_code=404, detail="Subscription not found")
+    
+    return {
+        "subscription_id": str(subscription_id),
+        "backlog": fair_queue.backlog(str(subscription_id)),
+        "dispatch_weight": subscription.dispatch_weight,
+        "active_subscriptions": fair_queue.active_count(),
+    }
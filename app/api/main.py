@@ -5,10 +5,11 @@ import logging
 import os
 from pathlib import Path
 
-from app.api.endpoints import status, subscriptions, ingest, health
+from app.api.endpoints import status, subscriptions, ingest, health, archive, deliveries
 from app.core.config import settings
-from app.core.middleware import RateLimitMiddleware
+from app.core.middleware import RateLimitMiddleware, ReadYourWritesMiddleware
 from app.services import cache
+from app.workers import batching
 
 # Configure logging
 logging.basicConfig(
@@ -41,6 +42,10 @@ if settings.BACKEND_CORS_ORIGINS:
 # Add rate limiting middleware
 app.add_middleware(RateLimitMiddleware)
 
+# Keep clients on the primary right after they write (see app.db.base.get_read_db)
+if settings.DB_REPLICA_URIS:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 # Mount static files directory
 app.mount("/static", StaticFiles(directory=Path(os.path.dirname(os.path.dirname(__file__))) / "static"), name="static")
 
@@ -60,6 +65,16 @@ app.include_router(
     prefix=f"{settings.API_V1_STR}/ingest",
     tags=["ingest"]
 )
+app.include_router(
+    deliveries.router,
+    prefix=f"{settings.API_V1_STR}/deliveries",
+    tags=["deliveries"]
+)
+app.include_router(
+    archive.router,
+    prefix=f"{settings.API_V1_STR}/archive",
+    tags=["archive"]
+)
 app.include_router(health.router, tags=["health"])
 
 # Root redirect to UI dashboard
@@ -80,4 +95,10 @@ def startup_event():
         cache.setup_cache_invalidation_listener()
         logger.info("Cache invalidation listener started")
     except Exception as e:
-        logger.error(f"Failed to start cache invalidation listener: {str(e)}")
\ No newline at end of file
+        logger.error(f"Failed to start cache invalidation listener: {str(e)}")
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Publish any delivery tasks still buffered for batching"""
+    batching.flush_publisher()
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Keyset pagination.
+
+List endpoints page through rows in (created_at, id) order. A page's cursor
+is the key of its last row, base64-encoded so clients treat it as opaque; the
+next page starts right after that key using the matching composite index, so
+every page costs the same no matter how deep it is. Totals are the planner's
+estimate of the filtered query (EXPLAIN) instead of a COUNT(*) over every
+matching row.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session
+
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    """Opaque cursor pointing just past a row"""
+    raw = json.dumps({"t": created_at.isoformat(), "id": str(id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Row key of a cursor; a malformed one is a client error"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+        return datetime.fromisoformat(key["t"]), UUID(key["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def after_cursor(model, cursor: Optional[str], descending: bool = False):
+    """Filter for the rows after a cursor in (created_at, id) order, or None without one"""
+    if not cursor:
+        return None
+    created_at, id = decode_cursor(cursor)
+    if descending:
+        return or_(model.created_at < created_at, and_(model.created_at == created_at, model.id < id))
+    return or_(model.created_at > created_at, and_(model.created_at == created_at, model.id > id))
+
+
+def keyset_order(model, descending: bool = False):
+    if descending:
+        return [model.created_at.desc(), model.id.desc()]
+    return [model.created_at, model.id]
+
+
+def estimate_count(db: Session, query: Query) -> int:
+    """The planner's row estimate for a query, without running it"""
+    compiled = query.statement.compile(dialect=postgresql.dialect())
+    plan = db.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def next_cursor(items: list, limit: int) -> Optional[str]:
+    """
+    Cursor of the page's last row, given the page fetched with one extra row.
+
+    Returns:
+        Optional[str]: The cursor, or None if the extra row wasn't there
+    """
+    if len(items) <= limit:
+        return None
+    return encode_cursor(items[limit - 1].created_at, items[limit - 1].id)
@@ -1,6 +1,7 @@
-from app.api.schemas.common import MessageResponse, PaginatedResponse, BaseResponse
+from app.api.schemas.common import MessageResponse, PaginatedResponse, CursorPage, BaseResponse
 from app.api.schemas.subscription import (
-    SubscriptionBase, SubscriptionCreate, SubscriptionUpdate, Subscription
+    SubscriptionBase, SubscriptionCreate, SubscriptionUpdate, Subscription,
+    RetryPolicy, RetryStrategy, BatchDelivery, BatchFormat
 )
 from app.api.schemas.delivery import (
     DeliveryTaskCreate, DeliveryTask, DeliveryLog, DeliveryTaskWithLogs,
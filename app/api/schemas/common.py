@@ -15,6 +15,13 @@ class PaginatedResponse(GenericModel, Generic[T]):
     size: int
 
 
+class CursorPage(GenericModel, Generic[T]):
+    """Generic keyset-paginated response model (see app.api.pagination)"""
+    items: List[T]
+    next_cursor: Optional[str] = None  # None on the last page
+    estimated_total: int  # Planner estimate, not an exact count
+
+
 class BaseResponse(BaseModel):
     """Base response model that includes timestamps and UUID"""
     id: UUID
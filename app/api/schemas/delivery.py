@@ -13,6 +13,7 @@ class DeliveryTaskStatus(str, enum.Enum):
     IN_PROGRESS = "IN_PROGRESS"
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
+    EXPIRED = "EXPIRED"
 
 
 class DeliveryLogStatus(str, enum.Enum):
@@ -27,6 +28,10 @@ class DeliveryTaskCreate(BaseModel):
     subscription_id: UUID
     payload: Dict[str, Any]
     event_type: Optional[str] = None
+    next_attempt_at: Optional[datetime] = None  # Set for scheduled deliveries
+    max_retries: Optional[int] = None  # From the subscription's retry policy
+    ordering_key: Optional[str] = None  # Set for ordered subscriptions
+    expires_at: Optional[datetime] = None  # Event TTL
 
 
 class DeliveryTask(BaseResponse):
@@ -37,6 +42,8 @@ class DeliveryTask(BaseResponse):
     status: DeliveryTaskStatus
     attempt_count: int
     next_attempt_at: Optional[datetime]
+    sequence: Optional[int] = None
+    expires_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -46,7 +53,7 @@ class DeliveryLog(BaseResponse):
     """Schema for delivery log response"""
     delivery_task_id: UUID
     subscription_id: UUID
-    target_url: str
+    target_url: Optional[str]
     attempt_number: int
     status: DeliveryLogStatus
     status_code: Optional[int]
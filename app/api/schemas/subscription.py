@@ -2,19 +2,76 @@ from typing import Optional, List
 from pydantic import BaseModel, HttpUrl, validator, Field
 from datetime import datetime
 from uuid import UUID
+import enum
 
 from app.api.schemas.common import BaseResponse
+from app.core.config import settings
+
+
+class RetryStrategy(str, enum.Enum):
+    """Retry delay strategies (see app.services.retry_policy)"""
+    EXPONENTIAL = "exponential"
+    CAPPED = "capped"
+    DECORRELATED_JITTER = "decorrelated_jitter"
+    CUSTOM = "custom"
+
+
+class RetryPolicy(BaseModel):
+    """Per-subscription retry policy, overriding the global retry delays"""
+    strategy: RetryStrategy = RetryStrategy.EXPONENTIAL
+    max_retries: int = Field(5, ge=0, le=50)
+    base_delay: int = Field(10, ge=1, description="First retry delay in seconds")
+    max_delay: int = Field(3600, ge=1, description="Upper bound for any retry delay in seconds")
+    delays: Optional[List[int]] = Field(None, description="Delays in seconds for the custom strategy")
+
+    @validator('delays', always=True)
+    def check_custom_delays(cls, v, values):
+        if values.get('strategy') == RetryStrategy.CUSTOM and not v:
+            raise ValueError("custom retry policies need a list of delays")
+        if v and any(delay < 0 for delay in v):
+            raise ValueError("retry delays must not be negative")
+        return v
+
+
+def _check_priority_lane(v: Optional[str]) -> Optional[str]:
+    if v is not None and v not in settings.PRIORITY_LANES:
+        raise ValueError(f"priority_lane must be one of: {', '.join(settings.PRIORITY_LANES)}")
+    return v
+
+
+class BatchFormat(str, enum.Enum):
+    """Body formats for coalesced batch deliveries"""
+    JSON_ARRAY = "json_array"
+    NDJSON = "ndjson"
+
+
+class BatchDelivery(BaseModel):
+    """Coalesced delivery of many events per POST (see app.workers.coalescing)"""
+    max_size: int = Field(100, ge=1, le=1000)
+    linger_ms: int = Field(1000, ge=0, le=60000, description="How long to wait for more events after the first")
+    max_bytes: int = Field(1024 * 1024, ge=1024, le=10 * 1024 * 1024)
+    format: BatchFormat = BatchFormat.JSON_ARRAY
 
 
 class SubscriptionBase(BaseModel):
     """Base subscription schema with shared attributes"""
     target_url: HttpUrl
     event_types: Optional[List[str]] = None
+    retry_policy: Optional[RetryPolicy] = None
+    dispatch_weight: float = Field(1.0, gt=0, le=100, description="Relative share of delivery capacity under fair dispatch")
+    priority_lane: Optional[str] = Field(None, description="Priority lane for all deliveries; None routes by event type")
+    ordered: bool = Field(False, description="Deliver events one at a time in ingest order")
+    event_ttl_seconds: Optional[int] = Field(None, ge=1, description="Drop events not delivered within this many seconds")
+    batch_delivery: Optional[BatchDelivery] = None
 
     @validator('target_url')
     def convert_url_to_string(cls, v):
         return str(v)
 
+    @validator('priority_lane')
+    def check_priority_lane(cls, v):
+        return _check_priority_lane(v)
+
 
 class SubscriptionCreate(SubscriptionBase):
     """Schema for creating a new subscription"""
@@ -26,6 +83,12 @@ class SubscriptionUpdate(BaseModel):
     target_url: Optional[HttpUrl] = None
     secret: Optional[str] = None
     event_types: Optional[List[str]] = None
+    retry_policy: Optional[RetryPolicy] = None
+    dispatch_weight: Optional[float] = Field(None, gt=0, le=100)
+    priority_lane: Optional[str] = None
+    ordered: Optional[bool] = None
+    event_ttl_seconds: Optional[int] = Field(None, ge=1)
+    batch_delivery: Optional[BatchDelivery] = None
 
     @validator('target_url')
     def convert_url_to_string(cls, v):
@@ -33,6 +96,10 @@ class SubscriptionUpdate(BaseModel):
             return str(v)
         return v
 
+    @validator('priority_lane')
+    def check_priority_lane(cls, v):
+        return _check_priority_lane(v)
+
 
 class SubscriptionInDBBase(BaseResponse, SubscriptionBase):
     """Base schema for subscription in DB"""
@@ -23,6 +23,10 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 10
     DB_MAX_RETRIES: int = 3  # Maximum number of database operation retries
     DB_MAX_RETRY_DELAY: int = 30  # Maximum delay between retries in seconds
+    DB_REPLICA_URIS: List[str] = []  # Streaming replicas for read-only endpoints; empty reads from the primary
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0  # Replicas further behind are skipped
+    DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 5.0
+    DB_READ_YOUR_WRITES_SECONDS: int = 10  # A client reads from the primary this long after writing
 
     @validator("SQLALCHEMY_DATABASE_URI", pre=True)
     def assemble_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
@@ -41,18 +45,140 @@ class Settings(BaseSettings):
     # Celery
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
+    CELERY_TASK_SERIALIZER: str = "msgpack"  # Binary serializer so envelopes can carry raw payload bytes
     
     # Webhook Settings
     WEBHOOK_TIMEOUT_SECONDS: int = 10
     WEBHOOK_MAX_RETRIES: int = 5
     WEBHOOK_RETRY_DELAYS: List[int] = [10, 30, 60, 300, 900]  # in seconds (10s, 30s, 1m, 5m, 15m)
+    RETRY_JITTER_RATIO: float = 0.2  # Retry delays are spread by +/- this share
     MAX_WEBHOOK_PAYLOAD_SIZE: int = 1024 * 1024  # 1MB
     VERIFY_SSL_CERTIFICATES: bool = True  # Enable SSL cert verification
     TARGET_URL_RATE_LIMIT: int = 10  # Max webhooks per minute to a single target URL
+    WEBHOOK_MESSAGE_ENVELOPES: bool = True  # Embed payload and subscription snapshot in task messages
+    
+    # Micro-batched task messages (one broker message per N task IDs or T milliseconds)
+    WEBHOOK_BATCH_PUBLISH_ENABLED: bool = False
+    WEBHOOK_BATCH_MAX_SIZE: int = 50  # Task IDs per batch message
+    WEBHOOK_BATCH_MAX_DELAY_MS: int = 20  # Longest an ID waits in the publisher buffer
+    WEBHOOK_BATCH_CONCURRENCY: int = 10  # Concurrent outbound requests per batch
+    
+    # Delivery queue backend: "celery" or "streams" (Redis Streams, see app.workers.streams)
+    DELIVERY_QUEUE_BACKEND: str = "celery"
+    STREAMS_DELIVERY_KEY: str = "webhooks:deliveries"
+    STREAMS_CONSUMER_GROUP: str = "delivery-workers"
+    STREAMS_READ_COUNT: int = 100  # Entries per XREADGROUP
+    STREAMS_BLOCK_MS: int = 1000
+    STREAMS_CONCURRENCY: int = 10  # Concurrent deliveries per consumer
+    STREAMS_CLAIM_IDLE_MS: int = 60000  # Pending entries idle this long are reclaimed
+    STREAMS_MAX_DELIVERIES: int = 5  # Entries delivered more often are dead-lettered
+    STREAMS_REAPER_INTERVAL_SECONDS: int = 30
+    
+    # Transactional outbox (tasks are published by outbox_relay.py instead of ingest)
+    WEBHOOK_OUTBOX_ENABLED: bool = False
+    OUTBOX_RELAY_BATCH_SIZE: int = 500  # Outbox rows claimed per relay transaction
+    OUTBOX_RELAY_POLL_INTERVAL_MS: int = 200  # Idle wait when the outbox is empty
+    
+    # Task leases (see app.workers.leases)
+    WEBHOOK_LEASE_SECONDS: int = 60  # Lease taken when a worker claims a task
+    WEBHOOK_LEASE_HEARTBEAT_SECONDS: int = 15  # How often in-flight leases are extended
+    LEASE_REAPER_BATCH_SIZE: int = 500  # Expired leases returned to PENDING per transaction
+    LEASE_REAPER_INTERVAL_SECONDS: int = 30
+    
+    # Delay queue for retries and scheduled deliveries (see app.services.delay_queue)
+    DELAY_QUEUE_ENABLED: bool = True  # False falls back to Celery countdowns
+    DELAY_QUEUE_KEY_PREFIX: str = "delay:deliveries"
+    DELAY_QUEUE_SHARDS: int = 8
+    DELAY_QUEUE_MOVE_BATCH_SIZE: int = 500  # Entries popped per shard per mover pass
+    DELAY_QUEUE_POLL_INTERVAL_MS: int = 250
+    DELAY_QUEUE_PROCESSING_TIMEOUT_SECONDS: int = 60  # Popped entries not acked by then are due again
+    
+    # Cluster-wide retry budget (see app.services.retry_budget)
+    RETRY_BUDGET_ENABLED: bool = True
+    RETRY_BUDGET_RATIO: float = 0.2  # Max share of attempts that may be retries
+    RETRY_BUDGET_MIN_RETRIES: int = 20  # Retries always allowed per window
+    RETRY_BUDGET_WINDOW_SECONDS: int = 10
+    RETRY_BUDGET_DEFER_SECONDS: int = 30  # Over-budget retries are pushed out by 1-2x this
+    
+    # Fair per-subscription dispatch (see app.services.fair_queue)
+    FAIR_DISPATCH_ENABLED: bool = False
+    FAIR_QUEUE_KEY_PREFIX: str = "fair"
+    FAIR_QUANTUM: int = 10  # Deliveries per ring visit for a subscription of weight 1
+    FAIR_DISPATCH_ROUNDS: int = 100  # Sub-queues served per Redis round trip
+    FAIR_DISPATCH_TARGET_DEPTH: int = 1000  # Worker queue depth the dispatcher tops up to
+    FAIR_DISPATCH_POLL_INTERVAL_MS: int = 50
+    
+    # Priority lanes (see app.workers.lanes), highest priority first
+    PRIORITY_LANES: List[str] = ["high", "default", "low"]
+    PRIORITY_LANE_EVENT_TYPES: Dict[str, str] = {"payment.*": "high", "analytics.*": "low"}  # fnmatch pattern -> lane
+    PRIORITY_LANE_CONCURRENCY: Dict[str, int] = {"high": 4, "default": 4, "low": 2}  # worker.py --lane
+    LANE_LATENCY_RETENTION_MINUTES: int = 60
+    
+    # Event TTL sweep (see app.workers.expiry)
+    EXPIRY_SWEEP_BATCH_SIZE: int = 1000
+    EXPIRY_SWEEP_INTERVAL_SECONDS: int = 60
+    
+    # Coalesced batch delivery (see app.workers.coalescing)
+    WEBHOOK_BATCH_DELIVERY_TIMEOUT_SECONDS: float = 30.0
+    COALESCE_SWEEP_INTERVAL_SECONDS: int = 30  # How often subscriptions with due tasks are kicked
+    
+    # Sharded routing (see app.workers.sharding)
+    SHARDED_ROUTING_ENABLED: bool = False
+    SHARD_COUNT: int = 64  # Default-lane queues; subscriptions are consistent-hashed onto them
+    SHARD_WORKERS: List[str] = []  # Names for worker.py --shard-worker; shards are spread over these
+    SHARD_REPLICAS: int = 2  # Workers consuming each shard, so one worker going down doesn't stall it
+    
+    # Adaptive worker concurrency (see app.workers.concurrency)
+    ADAPTIVE_CONCURRENCY_ENABLED: bool = False
+    ADAPTIVE_CONCURRENCY_MIN: int = 2  # Pool processes per worker
+    ADAPTIVE_CONCURRENCY_MAX: int = 32
+    ADAPTIVE_CONCURRENCY_INTERVAL_SECONDS: int = 10
+    ADAPTIVE_CONCURRENCY_INCREASE: int = 1  # Processes added per healthy interval
+    ADAPTIVE_CONCURRENCY_DECREASE_FACTOR: float = 0.5  # Limit multiplier on timeouts or DB pressure
+    ADAPTIVE_CONCURRENCY_LATENCY_TARGET_MS: int = 2000  # Average delivery latency to keep growing under
+    ADAPTIVE_CONCURRENCY_DB_WAIT_TARGET_MS: int = 200  # Average claim time before backing off
+    ADAPTIVE_CONCURRENCY_MAX_TIMEOUT_RATE: float = 0.05
+    ADAPTIVE_CONCURRENCY_MIN_SAMPLES: int = 20  # Samples needed in an interval to grow the limit
+    
+    # Attempt fencing (see app.workers.attempts)
+    ATTEMPT_DEDUPE_TTL_SECONDS: int = 86400  # How long a claimed message is remembered; above the broker's redelivery window
     
     # Log Retention
     LOG_RETENTION_HOURS: int = 72  # 3 days
+    LOG_PARTITION_INTERVAL_HOURS: int = 24  # delivery_logs partition size; must divide 24
+    LOG_PARTITION_PREMAKE_HOURS: int = 168  # How far ahead partitions are created
+    LOG_COMPACT_MODE: bool = False  # Store no target_url and truncated error_details
+    LOG_COMPACT_ERROR_DETAILS_MAX_CHARS: int = 256
+    LOG_SUCCESS_POLICY: str = "all"  # options: all, sample, aggregate (delivery counters only)
+    LOG_SUCCESS_SAMPLE_RATE: float = 0.05  # Share of successes logged under the sample policy
+    
+    # Cold log archive (see app.services.archive)
+    LOG_ARCHIVE_ENABLED: bool = False  # Archive logs before retention deletes them
+    LOG_ARCHIVE_DIR: str = "/var/lib/webhook-service/archive"
+    LOG_ARCHIVE_FETCH_SIZE: int = 5000  # Rows per server-side cursor fetch
+    LOG_ARCHIVE_COMPRESS_LEVEL: int = 6  # gzip level, 1-9
+    
+    # Terminal task history (see app.workers.history)
+    TASK_HISTORY_MOVE_AFTER_HOURS: int = 1  # Age of a finished task before it leaves delivery_tasks
+    TASK_HISTORY_BATCH_SIZE: int = 1000
+    TASK_HISTORY_MAX_BATCHES: int = 100  # Per run; the rest waits for the next one
+    TASK_HISTORY_INTERVAL_SECONDS: int = 300
+    COMPLETED_TASK_RETENTION_DAYS: int = 3
     FAILED_TASK_RETENTION_DAYS: int = 7  # 7 days
+    EXPIRED_TASK_RETENTION_DAYS: int = 3
+    
+    # Retention engine (see app.services.retention)
+    RETENTION_CHUNK_SIZE: int = 5000  # Rows per DELETE transaction
+    RETENTION_CHUNK_SLEEP_MS: int = 100  # Pause between chunks
+    RETENTION_MAX_RUN_SECONDS: int = 300  # Per policy and run; the rest resumes from the checkpoint
+    RETENTION_MAX_REPLICATION_LAG_BYTES: int = 0  # Pause while any replica lags more; 0 disables the check
+    RETENTION_INTERVAL_SECONDS: int = 3600  # How often task retention runs
+    SUBSCRIPTION_PURGE_INTERVAL_SECONDS: int = 600  # How often unfinished subscription purges resume
+    SUBSCRIPTION_PURGE_SWEEP_MAX_SECONDS: int = 480  # Per sweep, across subscriptions; below the interval
+    
+    # Delivery counters (see app.workers.counters)
+    DELIVERY_COUNTER_FLUSH_INTERVAL_SECONDS: int = 10  # How often Redis counts reach delivery_counters
+    DELIVERY_STATS_MAX_HOURS: int = 24 * 90  # Widest range a stats request may cover
     
     # Rate Limiting
     RATE_LIMIT_ENABLED: bool = True
@@ -8,6 +8,7 @@ import logging
 
 from app.services.cache import redis_client
 from app.core.config import settings
+from app.db import base as db_base
 
 
 logger = logging.getLogger(__name__)
@@ -187,4 +188,19 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             logger.error(f"Rate limiting error: {str(e)}")
             response = await call_next(request)
             response.headers["X-Rate-Limit-Error"] = "1"
-            return response
\ No newline at end of file
+            return response
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """
+    Marks clients that just wrote, so read-only endpoints serve them from the
+    primary instead of a replica that may not have their write yet (see
+    app.db.base.get_read_db).
+    """
+    
+    WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+    
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        response = await call_next(request)
+        if request.method in self.WRITE_METHODS and response.status_code < 400:
+            db_base.record_write(db_base.client_key(request))
+        return response
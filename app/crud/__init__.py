@@ -2,6 +2,7 @@ from app.crud.crud_subscription import (
     create as create_subscription,
     get as get_subscription,
     get_all as get_all_subscriptions,
+    get_page as get_subscription_page,
     update as update_subscription,
     remove as remove_subscription
 )
@@ -10,8 +11,11 @@ from app.crud.crud_delivery import (
     create_delivery_task,
     get_task,
     get_pending_tasks,
+    search_tasks,
+    estimate_tasks,
     update_task_status,
     create_delivery_log,
+    should_log,
     get_task_logs,
     get_subscription_logs,
     cleanup_old_logs
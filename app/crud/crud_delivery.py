@@ -1,33 +1,121 @@
 from typing import List, Optional, Dict, Any, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import desc, update
+from sqlalchemy.dialects.postgresql import insert
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from app.db.models.delivery_task import DeliveryTask, DeliveryStatus as TaskStatus
+from app.db.models.delivery_task_history import DeliveryTaskHistory
 from app.db.models.delivery_log import DeliveryLog, DeliveryStatus as LogStatus
+from app.db.models.outbox import OutboxEntry
+from app.db.models.delivery_counter import DeliveryCounter
+from app.db.models.subscription import Subscription
+from app.db.models.ordering_sequence import OrderingSequence
 from app.api.schemas.delivery import DeliveryTaskCreate
 from app.core.config import settings
+from app.db import partitions
+from app.services import archive, retention
+from app.api import pagination
 
 
-def create_delivery_task(db: Session, *, obj_in: DeliveryTaskCreate) -> DeliveryTask:
-    """Create a new delivery task."""
+def create_delivery_task(
+    db: Session, *, obj_in: DeliveryTaskCreate, with_outbox: bool = False
+) -> DeliveryTask:
+    """Create a new delivery task.
+    
+    With with_outbox=True an outbox row is written in the same transaction, so
+    the outbox relay is guaranteed to publish the task once it is committed.
+    """
     db_obj = DeliveryTask(
         subscription_id=obj_in.subscription_id,
         payload=obj_in.payload,
         event_type=obj_in.event_type,
         status=TaskStatus.PENDING,
         attempt_count=0,
+        next_attempt_at=obj_in.next_attempt_at,
+        max_retries=obj_in.max_retries if obj_in.max_retries is not None else settings.WEBHOOK_MAX_RETRIES,
+        ordering_key=obj_in.ordering_key,
+        expires_at=obj_in.expires_at,
     )
+    if obj_in.ordering_key is not None:
+        # The key's sequence row stays locked until commit, so tasks of an
+        # ordering key commit in sequence order while other keys go on
+        upsert = insert(OrderingSequence).values(
+            ordering_key=obj_in.ordering_key, subscription_id=obj_in.subscription_id, last_sequence=1
+        )
+        db_obj.sequence = db.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[OrderingSequence.ordering_key],
+                set_={"last_sequence": OrderingSequence.last_sequence + 1},
+            ).returning(OrderingSequence.last_sequence)
+        ).scalar_one()
     db.add(db_obj)
+    if with_outbox:
+        # Flush to get the task ID, but commit both rows together
+        db.flush()
+        db.add(OutboxEntry(delivery_task_id=db_obj.id))
     db.commit()
     db.refresh(db_obj)
     return db_obj
 
 
-def get_task(db: Session, id: UUID) -> Optional[DeliveryTask]:
-    """Get a delivery task by ID."""
-    return db.query(DeliveryTask).filter(DeliveryTask.id == id).first()
+def get_task(db: Session, id: UUID) -> Optional[Union[DeliveryTask, DeliveryTaskHistory]]:
+    """Get a delivery task by ID, falling back to finished tasks moved to history."""
+    task = db.query(DeliveryTask).filter(DeliveryTask.id == id).first()
+    if task is None:
+        task = db.query(DeliveryTaskHistory).filter(DeliveryTaskHistory.id == id).first()
+    return task
+
+
+def _task_search_query(
+    db: Session, model, *, status: Optional[TaskStatus] = None, event_type: Optional[str] = None,
+    subscription_id: Optional[UUID] = None, created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None
+):
+    query = db.query(model)
+    if status is not None:
+        query = query.filter(model.status == status)
+    if event_type is not None:
+        query = query.filter(model.event_type == event_type)
+    if subscription_id is not None:
+        query = query.filter(model.subscription_id == subscription_id)
+    if created_after is not None:
+        query = query.filter(model.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(model.created_at < created_before)
+    return query
+
+
+def search_tasks(
+    db: Session, *, cursor: Optional[str] = None, limit: int = 100, **filters
+) -> List[Union[DeliveryTask, DeliveryTaskHistory]]:
+    """Search delivery tasks, finished ones in history included, newest first.
+    
+    Returns up to limit + 1 tasks after the cursor (see app.api.pagination).
+    Each table is searched with the same keyset and the results merged, so
+    paging stays correct as tasks move to history.
+    """
+    tasks = []
+    for model in (DeliveryTask, DeliveryTaskHistory):
+        query = _task_search_query(db, model, **filters)
+        after = pagination.after_cursor(model, cursor, descending=True)
+        if after is not None:
+            query = query.filter(after)
+        tasks += query.order_by(*pagination.keyset_order(model, descending=True)).limit(limit + 1).all()
+    
+    # A task caught mid-move can show up in both tables
+    unique = {task.id: task for task in tasks}
+    return sorted(unique.values(), key=lambda task: (task.created_at, task.id), reverse=True)[:limit + 1]
+
+
+def estimate_tasks(db: Session, **filters) -> int:
+    """Estimated number of tasks matching search_tasks filters, without counting them."""
+    return sum(
+        pagination.estimate_count(db, _task_search_query(db, model, **filters))
+        for model in (DeliveryTask, DeliveryTaskHistory)
+    )
 
 
 def get_pending_tasks(db: Session, limit: int = 10) -> List[DeliveryTask]:
@@ -42,21 +130,35 @@ def get_pending_tasks(db: Session, limit: int = 10) -> List[DeliveryTask]:
 def update_task_status(
     db: Session, *, task_id: UUID, status: TaskStatus, 
     next_attempt_at: Optional[datetime] = None,
-    increment_attempt: bool = False  # Add flag to control increment
-) -> DeliveryTask:
-    """Update a delivery task status."""
-    task = db.query(DeliveryTask).filter(DeliveryTask.id == task_id).first()
+    increment_attempt: bool = False,  # Add flag to control increment
+    attempt_id: Optional[UUID] = None
+) -> Optional[DeliveryTask]:
+    """Update a delivery task status.
     
-    if task:
-        task.status = status
-        if increment_attempt:  # Only increment if flag is True
-            task.attempt_count += 1
-        task.next_attempt_at = next_attempt_at
-        
-        db.add(task)
-        db.commit()
-        db.refresh(task)
+    With attempt_id, only updates the task while it is still in progress
+    under that claim (see app.workers.attempts); returns None otherwise. The
+    fence and the write are one UPDATE, so a reaper or a newer claim
+    committing in between can't be overwritten.
+    """
+    conditions = [DeliveryTask.id == task_id]
+    if attempt_id is not None:
+        conditions += [DeliveryTask.attempt_id == attempt_id, DeliveryTask.status == TaskStatus.IN_PROGRESS]
     
+    values = {"status": status, "next_attempt_at": next_attempt_at}
+    if increment_attempt:  # Only increment if flag is True
+        values["attempt_count"] = DeliveryTask.attempt_count + 1
+    if status != TaskStatus.IN_PROGRESS:
+        # Leaving IN_PROGRESS releases the worker's lease
+        values["lease_expires_at"] = None
+    
+    task = db.scalars(
+        update(DeliveryTask)
+        .where(*conditions)
+        .values(**values)
+        .returning(DeliveryTask)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    ).first()
+    db.commit()
     return task
 
 
@@ -70,7 +172,15 @@ def create_delivery_log(
     status_code: Optional[int] = None,
     error_details: Optional[str] = None
 ) -> DeliveryLog:
-    """Create a delivery log entry."""
+    """Create a delivery log entry.
+    
+    In compact mode (LOG_COMPACT_MODE) the target URL is left to the
+    subscription and error details are cut to LOG_COMPACT_ERROR_DETAILS_MAX_CHARS.
+    """
+    if settings.LOG_COMPACT_MODE:
+        target_url = None
+        if error_details:
+            error_details = error_details[:settings.LOG_COMPACT_ERROR_DETAILS_MAX_CHARS]
     log = DeliveryLog(
         delivery_task_id=task_id,
         subscription_id=subscription_id,
@@ -86,30 +196,73 @@ def create_delivery_log(
     return log
 
 
+def should_log(task_id: UUID, status: LogStatus) -> bool:
+    """Whether an attempt gets a log row: failures always, successes per LOG_SUCCESS_POLICY.
+    
+    Sampling is decided by the task ID, so a task's success is either kept
+    or dropped the same way every time it is asked about.
+    """
+    if status != LogStatus.SUCCESS or settings.LOG_SUCCESS_POLICY == "all":
+        return True
+    if settings.LOG_SUCCESS_POLICY == "sample":
+        return task_id.int % 10000 < settings.LOG_SUCCESS_SAMPLE_RATE * 10000
+    return False  # aggregate: successes only reach the delivery counters
+
+
+def _resolve_target_urls(db: Session, logs: List[DeliveryLog]) -> List[DeliveryLog]:
+    """Fill in the target URL of compact log rows from their subscription."""
+    missing = {log.subscription_id for log in logs if log.target_url is None}
+    if missing:
+        target_urls = dict(db.query(Subscription.id, Subscription.target_url).filter(
+            Subscription.id.in_(missing)
+        ).all())
+        for log in logs:
+            if log.target_url is None:
+                # Not a change to the row, so it never gets flushed
+                set_committed_value(log, "target_url", target_urls.get(log.subscription_id))
+    return logs
+
+
 def get_task_logs(db: Session, task_id: UUID) -> List[DeliveryLog]:
     """Get all logs for a specific delivery task."""
-    return db.query(DeliveryLog).filter(
+    return _resolve_target_urls(db, db.query(DeliveryLog).filter(
         DeliveryLog.delivery_task_id == task_id
-    ).order_by(DeliveryLog.attempt_number).all()
+    ).order_by(DeliveryLog.attempt_number).all())
 
 
 def get_subscription_logs(
     db: Session, subscription_id: UUID, limit: int = 20
 ) -> List[DeliveryLog]:
     """Get recent logs for a specific subscription."""
-    return db.query(DeliveryLog).filter(
+    return _resolve_target_urls(db, db.query(DeliveryLog).filter(
         DeliveryLog.subscription_id == subscription_id
-    ).order_by(desc(DeliveryLog.created_at)).limit(limit).all()
+    ).order_by(desc(DeliveryLog.created_at)).limit(limit).all())
+
+
+def get_subscription_counters(
+    db: Session, subscription_id: UUID, start: datetime, end: datetime
+) -> List[DeliveryCounter]:
+    """Get a subscription's hourly delivery counters in [start, end), a primary key range scan."""
+    return db.query(DeliveryCounter).filter(
+        DeliveryCounter.subscription_id == subscription_id,
+        DeliveryCounter.bucket >= start,
+        DeliveryCounter.bucket < end
+    ).order_by(DeliveryCounter.bucket).all()
 
 
 def cleanup_old_logs(db: Session) -> int:
-    """Delete logs older than the retention period."""
-    retention_hours = settings.LOG_RETENTION_HOURS
-    cutoff_date = datetime.utcnow() - timedelta(hours=retention_hours)
+    """Delete logs older than the retention period.
     
-    deleted_count = db.query(DeliveryLog).filter(
-        DeliveryLog.created_at < cutoff_date
-    ).delete(synchronize_session=False)
+    Whole partitions before the cutoff are dropped (see app.db.partitions);
+    only the partition straddling it is trimmed, in the retention engine's
+    chunks (see app.services.retention). The count of dropped rows is the
+    planner's estimate. With LOG_ARCHIVE_ENABLED the logs are archived first
+    (see app.services.archive).
+    """
+    now = datetime.utcnow()
+    cutoff_date = retention.LOGS.cutoff(now)
     
-    db.commit()
-    return deleted_count
\ No newline at end of file
+    if settings.LOG_ARCHIVE_ENABLED:
+        archive.archive_expiring(db, cutoff_date)
+    _, dropped_count = partitions.drop_expired_partitions(db, cutoff_date)
+    return dropped_count + retention.run_policy(db, retention.LOGS, now)["deleted"]
\ No newline at end of file
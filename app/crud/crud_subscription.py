@@ -6,6 +6,7 @@ from datetime import datetime
 
 from app.db.models.subscription import Subscription
 from app.api.schemas.subscription import SubscriptionCreate, SubscriptionUpdate
+from app.api import pagination
 
 
 def create(db: Session, *, obj_in: SubscriptionCreate) -> Subscription:
@@ -14,6 +15,12 @@ def create(db: Session, *, obj_in: SubscriptionCreate) -> Subscription:
         target_url=obj_in.target_url,
         secret=obj_in.secret,
         event_types=obj_in.event_types,
+        retry_policy=obj_in.retry_policy.dict() if obj_in.retry_policy else None,
+        dispatch_weight=obj_in.dispatch_weight,
+        priority_lane=obj_in.priority_lane,
+        ordered=obj_in.ordered,
+        event_ttl_seconds=obj_in.event_ttl_seconds,
+        batch_delivery=obj_in.batch_delivery.dict() if obj_in.batch_delivery else None,
     )
     db.add(db_obj)
     db.commit()
@@ -22,13 +29,29 @@ def create(db: Session, *, obj_in: SubscriptionCreate) -> Subscription:
 
 
 def get(db: Session, id: UUID) -> Optional[Subscription]:
-    """Get a subscription by ID."""
-    return db.query(Subscription).filter(Subscription.id == id).first()
+    """Get a subscription by ID, unless it was deleted."""
+    return db.query(Subscription).filter(Subscription.id == id, Subscription.deleted_at.is_(None)).first()
 
 
 def get_all(db: Session, skip: int = 0, limit: int = 100) -> List[Subscription]:
     """Get all subscriptions with pagination."""
-    return db.query(Subscription).offset(skip).limit(limit).all()
+    return db.query(Subscription).filter(
+        Subscription.deleted_at.is_(None)
+    ).offset(skip).limit(limit).all()
+
+
+def get_page(db: Session, cursor: Optional[str] = None, limit: int = 100) -> List[Subscription]:
+    """Get up to limit + 1 subscriptions after a cursor, oldest first (see app.api.pagination)."""
+    query = db.query(Subscription).filter(Subscription.deleted_at.is_(None))
+    after = pagination.after_cursor(Subscription, cursor)
+    if after is not None:
+        query = query.filter(after)
+    return query.order_by(*pagination.keyset_order(Subscription)).limit(limit + 1).all()
+
+
+def estimate_total(db: Session) -> int:
+    """Estimated number of subscriptions, without counting them."""
+    return pagination.estimate_count(db, db.query(Subscription).filter(Subscription.deleted_at.is_(None)))
 
 
 def update(
@@ -51,10 +74,17 @@ def update(
     return db_obj
 
 
-def remove(db: Session, *, id: UUID) -> Subscription:
-    """Remove a subscription."""
-    obj = db.query(Subscription).get(id)
-    db.delete(obj)
+def remove(db: Session, *, id: UUID) -> Optional[Subscription]:
+    """Soft-delete a subscription.
+    
+    Only deleted_at is set, so the request doesn't wait on cascading deletes;
+    the subscription's rows are purged in the background (see app.workers.purge).
+    """
+    obj = get(db, id)
+    if obj is None:
+        return None
+    obj.deleted_at = datetime.utcnow()
+    db.add(obj)
     db.commit()
     return obj
 
@@ -78,6 +108,7 @@ def get_subscription_with_event_type(db: Session, subscription_id: UUID, event_t
     # 2. The subscription's event_types contains the given event type
     return db.query(Subscription).filter(
         Subscription.id == subscription_id,
+        Subscription.deleted_at.is_(None),
         or_(
             Subscription.event_types.is_(None),  # NULL event_types means accept all
             Subscription.event_types.any(event_type)  # PostgreSQL's ANY operator for arrays
@@ -98,5 +129,7 @@ def check_exists(db: Session, subscription_id: UUID) -> bool:
     """
     # Use EXISTS and count only to 1 for efficiency
     return db.query(
-        db.query(Subscription).filter(Subscription.id == subscription_id).exists()
+        db.query(Subscription).filter(
+            Subscription.id == subscription_id, Subscription.deleted_at.is_(None)
+        ).exists()
     ).scalar()
\ No newline at end of file
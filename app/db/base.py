@@ -1,23 +1,112 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
+from fastapi import Request
+from typing import Dict, Optional, Tuple
+import itertools
+import logging
+import time
 
 from app.core.config import settings
 
-# Configure engine with proper connection pooling settings
-engine = create_engine(
-    settings.SQLALCHEMY_DATABASE_URI, 
-    pool_pre_ping=True,
-    pool_size=settings.DB_CONNECTION_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_timeout=30,  # Wait up to 30 seconds for a connection
-    pool_recycle=1800  # Recycle connections after 30 minutes
-)
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(uri: str) -> Engine:
+    # Configure engine with proper connection pooling settings
+    return create_engine(
+        uri, 
+        pool_pre_ping=True,
+        pool_size=settings.DB_CONNECTION_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=30,  # Wait up to 30 seconds for a connection
+        pool_recycle=1800  # Recycle connections after 30 minutes
+    )
+
+
+engine = _create_engine(settings.SQLALCHEMY_DATABASE_URI)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Streaming replicas for read-only endpoints (see get_read_db)
+replica_engines = [_create_engine(uri) for uri in settings.DB_REPLICA_URIS]
+
+# Seconds since the last replayed transaction, 0 when the replica has replayed everything it received,
+# or NULL when it is not streaming - a disconnected receiver has nothing left to replay either
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+RECENT_WRITE_KEY = "db:recent_write:{}"
+
+_replica_lag: Dict[int, Tuple[float, float]] = {}  # Replica index -> (lag, checked at)
+_next_replica = itertools.count()
+
 Base = declarative_base()
 
+def replica_lag(index: int) -> float:
+    """A replica's lag in seconds, re-checked every DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS"""
+    lag, checked_at = _replica_lag.get(index, (None, 0.0))
+    now = time.monotonic()
+    if lag is None or now - checked_at >= settings.DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS:
+        try:
+            with replica_engines[index].connect() as connection:
+                lag = connection.execute(REPLICA_LAG_SQL).scalar()
+            if lag is None:
+                logger.warning(f"Replica {index} is not streaming from the primary")
+                lag = float("inf")
+            else:
+                lag = float(lag)
+        except Exception as e:
+            logger.warning(f"Replica {index} lag check failed: {str(e)}")
+            lag = float("inf")
+        _replica_lag[index] = (lag, now)
+    return lag
+
+
+def pick_replica() -> Optional[Engine]:
+    """The next replica, round-robin, that lags at most DB_REPLICA_MAX_LAG_SECONDS, or None"""
+    count = len(replica_engines)
+    start = next(_next_replica)
+    for offset in range(count):
+        index = (start + offset) % count
+        if replica_lag(index) <= settings.DB_REPLICA_MAX_LAG_SECONDS:
+            return replica_engines[index]
+    return None
+
+
+def client_key(request: Request) -> str:
+    """Client identifier (IP address, or X-Forwarded-For if available)"""
+    client_ip = request.headers.get("X-Forwarded-For", request.client.host if request.client else "")
+    return client_ip.split(",")[0].strip()
+
+
+def record_write(client: str) -> None:
+    """Keep a client's reads on the primary for DB_READ_YOUR_WRITES_SECONDS after it wrote"""
+    if not replica_engines:
+        return
+    from app.services.cache import redis_client
+    try:
+        redis_client.set(RECENT_WRITE_KEY.format(client), 1, ex=settings.DB_READ_YOUR_WRITES_SECONDS)
+    except Exception as e:
+        logger.warning(f"Failed to record write of client {client}: {str(e)}")
+
+
+def wrote_recently(client: str) -> bool:
+    from app.services.cache import redis_client
+    try:
+        return bool(redis_client.exists(RECENT_WRITE_KEY.format(client)))
+    except Exception:
+        # Can't tell, so don't risk serving the client a stale read
+        return True
+
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -26,6 +115,24 @@ def get_db():
     finally:
         db.close()
 
+# Dependency to get a DB session for read-only endpoints
+def get_read_db(request: Request):
+    """
+    Session on a replica that is within DB_REPLICA_MAX_LAG_SECONDS.
+
+    Falls back to the primary without replicas, when all of them lag, and for
+    clients that wrote within DB_READ_YOUR_WRITES_SECONDS, so they always see
+    their own writes.
+    """
+    replica = None
+    if replica_engines and not wrote_recently(client_key(request)):
+        replica = pick_replica()
+    db = SessionLocal(bind=replica) if replica is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 # Optional context manager for non-FastAPI usage
 @contextmanager
 def get_db_context():
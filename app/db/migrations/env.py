@@ -4,7 +4,7 @@ from alembic import context
 
 # Import our models for Alembic to discover
 from app.db.base import Base
-from app.db.models import subscription, delivery_task, delivery_log
+from app.db.models import subscription, delivery_task, delivery_log, outbox
 from app.core.config import settings
 
 # this is the Alembic Config object, which provides
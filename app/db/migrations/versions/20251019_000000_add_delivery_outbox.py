@@ -0,0 +1,32 @@
+"""add delivery_outbox table
+
+Revision ID: 20251019_000000
+Revises: 3cb8028f7ced
+Create Date: 2025-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_000000'
+down_revision = '3cb8028f7ced'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Transactional outbox - rows are short-lived, the relay deletes them once published
+    op.create_table(
+        'delivery_outbox',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('delivery_task_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['delivery_task_id'], ['delivery_tasks.id'], ondelete='CASCADE'),
+    )
+
+
+def downgrade():
+    op.drop_table('delivery_outbox')
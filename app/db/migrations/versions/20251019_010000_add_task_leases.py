@@ -0,0 +1,37 @@
+"""add lease_expires_at to delivery_tasks
+
+Revision ID: 20251019_010000
+Revises: 20251019_000000
+Create Date: 2025-10-19 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_010000'
+down_revision = '20251019_000000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('delivery_tasks', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+    
+    # Tasks stuck IN_PROGRESS before leases existed get an already expired
+    # lease, so the reaper returns them to PENDING on its first run
+    op.execute("UPDATE delivery_tasks SET lease_expires_at = now() WHERE status = 'IN_PROGRESS'")
+    
+    # Partial index - only in-flight tasks are ever scanned by the reaper
+    op.create_index(
+        'ix_delivery_tasks_lease_expires_at',
+        'delivery_tasks',
+        ['lease_expires_at'],
+        postgresql_where=sa.text("status = 'IN_PROGRESS'")
+    )
+
+
+def downgrade():
+    op.drop_index('ix_delivery_tasks_lease_expires_at', table_name='delivery_tasks')
+    op.drop_column('delivery_tasks', 'lease_expires_at')
@@ -0,0 +1,25 @@
+"""add retry_policy to subscriptions
+
+Revision ID: 20251019_020000
+Revises: 20251019_010000
+Create Date: 2025-10-19 02:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_020000'
+down_revision = '20251019_010000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('subscriptions', sa.Column('retry_policy', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('subscriptions', 'retry_policy')
@@ -0,0 +1,24 @@
+"""add dispatch_weight to subscriptions
+
+Revision ID: 20251019_030000
+Revises: 20251019_020000
+Create Date: 2025-10-19 03:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_030000'
+down_revision = '20251019_020000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('subscriptions', sa.Column('dispatch_weight', sa.Float(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    op.drop_column('subscriptions', 'dispatch_weight')
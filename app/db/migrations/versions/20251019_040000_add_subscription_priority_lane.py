@@ -0,0 +1,24 @@
+"""add priority_lane to subscriptions
+
+Revision ID: 20251019_040000
+Revises: 20251019_030000
+Create Date: 2025-10-19 04:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_040000'
+down_revision = '20251019_030000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('subscriptions', sa.Column('priority_lane', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    op.drop_column('subscriptions', 'priority_lane')
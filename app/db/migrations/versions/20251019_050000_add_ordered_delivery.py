@@ -0,0 +1,39 @@
+"""add ordered delivery columns
+
+Revision ID: 20251019_050000
+Revises: 20251019_040000
+Create Date: 2025-10-19 05:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_050000'
+down_revision = '20251019_040000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('subscriptions', sa.Column('ordered', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column('subscriptions', sa.Column('last_sequence', sa.BigInteger(), nullable=False, server_default='0'))
+    op.add_column('delivery_tasks', sa.Column('ordering_key', sa.String(), nullable=True))
+    op.add_column('delivery_tasks', sa.Column('sequence', sa.BigInteger(), nullable=True))
+    
+    # Partial index - unordered tasks don't pay for it
+    op.create_index(
+        'ix_delivery_tasks_ordering_key_sequence',
+        'delivery_tasks',
+        ['ordering_key', 'sequence'],
+        postgresql_where=sa.text("ordering_key IS NOT NULL")
+    )
+
+
+def downgrade():
+    op.drop_index('ix_delivery_tasks_ordering_key_sequence', table_name='delivery_tasks')
+    op.drop_column('delivery_tasks', 'sequence')
+    op.drop_column('delivery_tasks', 'ordering_key')
+    op.drop_column('subscriptions', 'last_sequence')
+    op.drop_column('subscriptions', 'ordered')
@@ -0,0 +1,59 @@
+"""add event TTL and EXPIRED task status
+
+Revision ID: 20251019_060000
+Revises: 20251019_050000
+Create Date: 2025-10-19 06:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_060000'
+down_revision = '20251019_050000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ADD VALUE can't run inside a transaction block before PostgreSQL 12
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE delivery_task_status ADD VALUE IF NOT EXISTS 'EXPIRED'")
+    
+    op.add_column('subscriptions', sa.Column('event_ttl_seconds', sa.Integer(), nullable=True))
+    op.add_column('delivery_tasks', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    
+    # Partial index - only pending tasks with a TTL are ever swept
+    op.create_index(
+        'ix_delivery_tasks_expires_at',
+        'delivery_tasks',
+        ['expires_at'],
+        postgresql_where=sa.text("status = 'PENDING' AND expires_at IS NOT NULL")
+    )
+
+
+def downgrade():
+    op.drop_index('ix_delivery_tasks_expires_at', table_name='delivery_tasks')
+    op.drop_column('delivery_tasks', 'expires_at')
+    op.drop_column('subscriptions', 'event_ttl_seconds')
+    
+    # Enum values can't be dropped - recreate the type without EXPIRED
+    op.execute("UPDATE delivery_tasks SET status = 'FAILED' WHERE status = 'EXPIRED'")
+    op.execute("ALTER TABLE delivery_tasks ALTER COLUMN status DROP DEFAULT")
+    op.drop_index('ix_delivery_tasks_lease_expires_at', table_name='delivery_tasks')
+    op.execute("ALTER TYPE delivery_task_status RENAME TO delivery_task_status_old")
+    op.execute("CREATE TYPE delivery_task_status AS ENUM ('PENDING', 'IN_PROGRESS', 'COMPLETED', 'FAILED')")
+    op.execute("""
+        ALTER TABLE delivery_tasks
+        ALTER COLUMN status TYPE delivery_task_status
+        USING status::text::delivery_task_status
+    """)
+    op.execute("ALTER TABLE delivery_tasks ALTER COLUMN status SET DEFAULT 'PENDING'::delivery_task_status")
+    op.execute("DROP TYPE delivery_task_status_old")
+    op.create_index(
+        'ix_delivery_tasks_lease_expires_at',
+        'delivery_tasks',
+        ['lease_expires_at'],
+        postgresql_where=sa.text("status = 'IN_PROGRESS'")
+    )
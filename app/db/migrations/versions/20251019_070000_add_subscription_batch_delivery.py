@@ -0,0 +1,25 @@
+"""add batch_delivery to subscriptions
+
+Revision ID: 20251019_070000
+Revises: 20251019_060000
+Create Date: 2025-10-19 07:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_070000'
+down_revision = '20251019_060000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('subscriptions', sa.Column('batch_delivery', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('subscriptions', 'batch_delivery')
@@ -0,0 +1,25 @@
+"""add attempt_id to delivery_tasks
+
+Revision ID: 20251019_080000
+Revises: 20251019_070000
+Create Date: 2025-10-19 08:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_080000'
+down_revision = '20251019_070000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('delivery_tasks', sa.Column('attempt_id', postgresql.UUID(as_uuid=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('delivery_tasks', 'attempt_id')
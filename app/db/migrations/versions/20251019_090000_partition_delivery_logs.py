@@ -0,0 +1,118 @@
+"""partition delivery_logs by created_at
+
+Revision ID: 20251019_090000
+Revises: 20251019_080000
+Create Date: 2025-10-19 09:00:00.000000
+
+The existing table is not rewritten. It is renamed to delivery_logs_legacy
+and attached as the partition holding everything before the first daily
+boundary, so the swap only takes brief locks:
+
+- the unique index for the new primary key is built CONCURRENTLY and the
+  partition bound is proven by a CHECK constraint validated outside the swap
+  transaction, so ATTACH PARTITION doesn't scan the table;
+- the parent's indexes and foreign keys match the legacy table's, so they
+  are adopted rather than rebuilt.
+
+The legacy partition is dropped by the partition manager (app.db.partitions)
+once its upper bound falls out of the retention window.
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_090000'
+down_revision = '20251019_080000'
+branch_labels = None
+depends_on = None
+
+# Indexes of the old table, recreated on the partitioned parent
+INDEXES = {
+    'ix_delivery_logs_delivery_task_id': '(delivery_task_id)',
+    'ix_delivery_logs_subscription_id': '(subscription_id)',
+    'ix_delivery_logs_created_at': '(created_at)',
+    'ix_delivery_logs_status': '(status)',
+    'ix_delivery_logs_subscription_created': '(subscription_id, created_at)',
+}
+
+# Partitions created ahead of time; the partition manager keeps extending them
+PREMADE_DAYS = 7
+
+
+def upgrade():
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    first_bound = today + timedelta(days=1)
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS delivery_logs_legacy_pkey "
+            "ON delivery_logs (id, created_at)"
+        )
+        op.execute(
+            f"ALTER TABLE delivery_logs ADD CONSTRAINT delivery_logs_legacy_bound "
+            f"CHECK (created_at < '{first_bound:%Y-%m-%d %H:%M:%S}') NOT VALID"
+        )
+        # Only takes a SHARE UPDATE EXCLUSIVE lock, so writes continue
+        op.execute("ALTER TABLE delivery_logs VALIDATE CONSTRAINT delivery_logs_legacy_bound")
+
+    # The swap - metadata only, so fail fast rather than queue behind long transactions
+    op.execute("SET LOCAL lock_timeout = '10s'")
+    op.execute("ALTER TABLE delivery_logs RENAME TO delivery_logs_legacy")
+    for name in list(INDEXES) + ['ix_delivery_logs_id']:
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_legacy")
+    op.execute(
+        "ALTER TABLE delivery_logs_legacy DROP CONSTRAINT delivery_logs_pkey, "
+        "ADD CONSTRAINT delivery_logs_legacy_pkey PRIMARY KEY USING INDEX delivery_logs_legacy_pkey"
+    )
+
+    op.execute(
+        "CREATE TABLE delivery_logs (LIKE delivery_logs_legacy INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute("ALTER TABLE delivery_logs ADD CONSTRAINT delivery_logs_pkey PRIMARY KEY (id, created_at)")
+    op.execute(
+        "ALTER TABLE delivery_logs ADD CONSTRAINT delivery_logs_delivery_task_id_fkey "
+        "FOREIGN KEY (delivery_task_id) REFERENCES delivery_tasks (id) ON DELETE CASCADE"
+    )
+    op.execute(
+        "ALTER TABLE delivery_logs ADD CONSTRAINT delivery_logs_subscription_id_fkey "
+        "FOREIGN KEY (subscription_id) REFERENCES subscriptions (id) ON DELETE CASCADE"
+    )
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON delivery_logs {columns}")
+
+    op.execute(
+        f"ALTER TABLE delivery_logs ATTACH PARTITION delivery_logs_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{first_bound:%Y-%m-%d %H:%M:%S}')"
+    )
+    op.execute("ALTER TABLE delivery_logs_legacy DROP CONSTRAINT delivery_logs_legacy_bound")
+
+    for day in range(PREMADE_DAYS):
+        start = first_bound + timedelta(days=day)
+        end = start + timedelta(days=1)
+        op.execute(
+            f"CREATE TABLE delivery_logs_p{start:%Y%m%d%H} PARTITION OF delivery_logs "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d %H:%M:%S}') TO ('{end:%Y-%m-%d %H:%M:%S}')"
+        )
+
+
+def downgrade():
+    # Copies every row back into a plain table - only meant for small installs
+    op.execute("CREATE TABLE delivery_logs_plain (LIKE delivery_logs INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO delivery_logs_plain SELECT * FROM delivery_logs")
+    op.execute("DROP TABLE delivery_logs CASCADE")
+    op.execute("ALTER TABLE delivery_logs_plain RENAME TO delivery_logs")
+    op.execute("ALTER TABLE delivery_logs ADD CONSTRAINT delivery_logs_pkey PRIMARY KEY (id)")
+    op.execute(
+        "ALTER TABLE delivery_logs ADD CONSTRAINT delivery_logs_delivery_task_id_fkey "
+        "FOREIGN KEY (delivery_task_id) REFERENCES delivery_tasks (id) ON DELETE CASCADE"
+    )
+    op.execute(
+        "ALTER TABLE delivery_logs ADD CONSTRAINT delivery_logs_subscription_id_fkey "
+        "FOREIGN KEY (subscription_id) REFERENCES subscriptions (id) ON DELETE CASCADE"
+    )
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON delivery_logs {columns}")
+    op.execute("CREATE INDEX ix_delivery_logs_id ON delivery_logs (id)")
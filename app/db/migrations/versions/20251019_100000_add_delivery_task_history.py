@@ -0,0 +1,65 @@
+"""add delivery_task_history for terminal tasks
+
+Revision ID: 20251019_100000
+Revises: 20251019_090000
+Create Date: 2025-10-19 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_100000'
+down_revision = '20251019_090000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The mover's scan; built without blocking writes to the hot table
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_delivery_tasks_terminal_updated_at "
+            "ON delivery_tasks (updated_at) WHERE status IN ('COMPLETED', 'FAILED', 'EXPIRED')"
+        )
+
+    op.execute("CREATE TABLE delivery_task_history (LIKE delivery_tasks INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE delivery_task_history ADD COLUMN moved_at TIMESTAMP NOT NULL DEFAULT now()")
+    op.execute("ALTER TABLE delivery_task_history ADD CONSTRAINT delivery_task_history_pkey PRIMARY KEY (id)")
+    op.execute(
+        "ALTER TABLE delivery_task_history ADD CONSTRAINT delivery_task_history_subscription_id_fkey "
+        "FOREIGN KEY (subscription_id) REFERENCES subscriptions (id) ON DELETE CASCADE"
+    )
+    op.create_index('ix_delivery_task_history_subscription_id', 'delivery_task_history', ['subscription_id'])
+    op.create_index('ix_delivery_task_history_moved_at', 'delivery_task_history', ['moved_at'])
+
+    # Logs outlive their task's move to history, so they can't cascade from it;
+    # they still go with their subscription and with log retention
+    op.execute("ALTER TABLE delivery_logs DROP CONSTRAINT delivery_logs_delivery_task_id_fkey")
+
+
+def downgrade():
+    # Move history rows back before the table goes away
+    op.execute("""
+        DO $$
+        DECLARE columns text;
+        BEGIN
+            SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO columns
+            FROM pg_attribute
+            WHERE attrelid = 'delivery_tasks'::regclass AND attnum > 0 AND NOT attisdropped;
+            EXECUTE format(
+                'INSERT INTO delivery_tasks (%s) SELECT %s FROM delivery_task_history ON CONFLICT (id) DO NOTHING',
+                columns, columns
+            );
+        END $$
+    """)
+    op.drop_table('delivery_task_history')
+    op.execute(
+        "DELETE FROM delivery_logs l WHERE NOT EXISTS "
+        "(SELECT 1 FROM delivery_tasks t WHERE t.id = l.delivery_task_id)"
+    )
+    op.execute(
+        "ALTER TABLE delivery_logs ADD CONSTRAINT delivery_logs_delivery_task_id_fkey "
+        "FOREIGN KEY (delivery_task_id) REFERENCES delivery_tasks (id) ON DELETE CASCADE"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_delivery_tasks_terminal_updated_at")
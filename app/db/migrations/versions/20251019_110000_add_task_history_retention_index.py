@@ -0,0 +1,29 @@
+"""add the retention index of delivery_task_history
+
+Revision ID: 20251019_110000
+Revises: 20251019_100000
+Create Date: 2025-10-19 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_110000'
+down_revision = '20251019_100000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Retention walks each status in (updated_at, id) order
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_delivery_task_history_status_updated_at "
+            "ON delivery_task_history (status, updated_at, id)"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_delivery_task_history_status_updated_at")
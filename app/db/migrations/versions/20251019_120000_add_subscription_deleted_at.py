@@ -0,0 +1,35 @@
+"""add deleted_at to subscriptions for soft deletes
+
+Revision ID: 20251019_120000
+Revises: 20251019_110000
+Create Date: 2025-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_120000'
+down_revision = '20251019_110000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable without a default, so adding it doesn't rewrite the table
+    op.add_column('subscriptions', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+
+    # The purge sweep's scan
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_subscriptions_deleted_at "
+            "ON subscriptions (deleted_at) WHERE deleted_at IS NOT NULL"
+        )
+
+
+def downgrade():
+    # Finish soft deletes the old way before the marker goes away
+    op.execute("DELETE FROM subscriptions WHERE deleted_at IS NOT NULL")
+    op.drop_index('ix_subscriptions_deleted_at', table_name='subscriptions')
+    op.drop_column('subscriptions', 'deleted_at')
@@ -0,0 +1,43 @@
+"""drop the id indexes duplicating delivery task and log primary keys
+
+Revision ID: 20251019_130000
+Revises: 20251019_120000
+Create Date: 2025-10-19 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_130000'
+down_revision = '20251019_120000'
+branch_labels = None
+depends_on = None
+
+
+# Each repeats its table's primary key and doubles the write cost of every insert;
+# the last one is left over on the legacy partition of delivery_logs
+DUPLICATE_INDEXES = {
+    'ix_delivery_tasks_id': 'delivery_tasks',
+    'ix_delivery_logs_id_legacy': 'delivery_logs_legacy',
+}
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name in DUPLICATE_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_delivery_tasks_id ON delivery_tasks (id)")
+        # The legacy partition is gone once its rows have aged out
+        op.execute("""
+            DO $$
+            BEGIN
+                IF to_regclass('delivery_logs_legacy') IS NOT NULL THEN
+                    CREATE INDEX IF NOT EXISTS ix_delivery_logs_id_legacy ON delivery_logs_legacy (id);
+                END IF;
+            END $$
+        """)
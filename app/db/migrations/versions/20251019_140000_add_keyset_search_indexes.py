@@ -0,0 +1,52 @@
+"""add composite indexes for keyset pagination and delivery search
+
+Revision ID: 20251019_140000
+Revises: 20251019_130000
+Create Date: 2025-10-19 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_140000'
+down_revision = '20251019_130000'
+branch_labels = None
+depends_on = None
+
+
+# Every index ends in the (created_at, id) keyset, so a filtered page is one range scan
+NEW_INDEXES = [
+    ('ix_subscriptions_created_at_id', 'subscriptions', 'created_at, id', 'deleted_at IS NULL'),
+    ('ix_delivery_tasks_subscription_created', 'delivery_tasks', 'subscription_id, created_at, id', None),
+    ('ix_delivery_tasks_status_created', 'delivery_tasks', 'status, created_at, id', None),
+    ('ix_delivery_tasks_event_type_created', 'delivery_tasks', 'event_type, created_at, id', None),
+    ('ix_delivery_task_history_subscription_created', 'delivery_task_history', 'subscription_id, created_at, id', None),
+    ('ix_delivery_task_history_created_at', 'delivery_task_history', 'created_at, id', None),
+]
+
+# Prefixes of the new indexes, so they only add write cost
+SUPERSEDED_INDEXES = [
+    ('ix_delivery_tasks_subscription_id', 'delivery_tasks', 'subscription_id'),
+    ('ix_delivery_tasks_status', 'delivery_tasks', 'status'),
+    ('ix_delivery_task_history_subscription_id', 'delivery_task_history', 'subscription_id'),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in NEW_INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"
+                + (f" WHERE {where}" if where else "")
+            )
+        for name, _, _ in SUPERSEDED_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in SUPERSEDED_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})")
+        for name, _, _, _ in NEW_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,36 @@
+"""add delivery_counters for per-subscription hourly stats
+
+Revision ID: 20251019_150000
+Revises: 20251019_140000
+Create Date: 2025-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_150000'
+down_revision = '20251019_140000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The (subscription_id, bucket) key is the only index stats need
+    op.create_table(
+        'delivery_counters',
+        sa.Column('subscription_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('subscriptions.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('attempts', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('succeeded', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('failed', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('expired', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('subscription_id', 'bucket'),
+    )
+
+
+def downgrade():
+    op.drop_table('delivery_counters')
@@ -0,0 +1,166 @@
+"""compact delivery_logs columns
+
+Revision ID: 20251019_160000
+Revises: 20251019_150000
+Create Date: 2025-10-19 16:00:00.000000
+
+ALTER COLUMN ... TYPE would rewrite every partition and rebuild its indexes
+under an ACCESS EXCLUSIVE lock, blocking delivery result writes for the
+whole run. The smallint columns are built next to the old ones instead:
+
+- attempt_number_small, status_small and status_code_small are added as
+  nullable columns (metadata only), and a trigger fills them on every
+  INSERT and UPDATE from then on;
+- existing rows are backfilled partition by partition in chunks of
+  BACKFILL_CHUNK_SIZE, each its own transaction, walking the primary key;
+- NOT NULL is proven by CHECK constraints validated under a SHARE UPDATE
+  EXCLUSIVE lock, and the status index is built CONCURRENTLY per partition
+  and attached to the parent;
+- the swap drops the old columns, renames the new ones and sets NOT NULL
+  (no scan, the checks prove it), all metadata only.
+
+The backfill leaves one dead tuple per existing row for vacuum, and rows
+written before the swap keep the dropped columns' bytes until they age out
+of the retention window. Rows written after it are compact: the smallints
+share one 8-byte word after created_at.
+
+The swap needs the application writing the new layout, so deploy it with
+this revision. The downgrade rewrites the table and is meant for small
+installs only.
+"""
+from alembic import op
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_160000'
+down_revision = '20251019_150000'
+branch_labels = None
+depends_on = None
+
+# Rows updated per backfill transaction
+BACKFILL_CHUNK_SIZE = 5000
+
+# Codes of app.db.models.delivery_log.STATUS_CODES
+STATUS_TO_CODE = "CASE {status}::text WHEN 'SUCCESS' THEN 1 WHEN 'FAILED_ATTEMPT' THEN 2 ELSE 3 END"
+CODE_TO_STATUS = (
+    "(CASE status WHEN 1 THEN 'SUCCESS' WHEN 2 THEN 'FAILED_ATTEMPT' ELSE 'FAILURE' END)::delivery_log_status"
+)
+
+COLUMNS = ['attempt_number', 'status', 'status_code']
+NOT_NULL_COLUMNS = ['attempt_number', 'status']
+
+_PARTITIONS_SQL = text("""
+    SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'delivery_logs'::regclass
+""")
+
+# Partitions without their piece of the parent's ix_delivery_logs_status_small
+_UNINDEXED_PARTITIONS_SQL = text("""
+    SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'delivery_logs'::regclass
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_inherits ii JOIN pg_index x ON x.indexrelid = ii.inhrelid
+          WHERE ii.inhparent = 'ix_delivery_logs_status_small'::regclass AND x.indrelid = c.oid
+      )
+""")
+
+
+def _backfill(bind, partition: str) -> None:
+    chunk = text(f"""
+        WITH batch AS (
+            SELECT id, created_at FROM {partition}
+            WHERE id > CAST(:after AS uuid)
+            ORDER BY id LIMIT :limit
+        )
+        UPDATE {partition} l SET
+            attempt_number_small = l.attempt_number,
+            status_small = {STATUS_TO_CODE.format(status='l.status')},
+            status_code_small = l.status_code
+        FROM batch b
+        WHERE l.id = b.id AND l.created_at = b.created_at
+        RETURNING l.id
+    """)
+    after = '00000000-0000-0000-0000-000000000000'  # Below every UUID
+    while True:
+        ids = [row.id for row in bind.execute(chunk, {"after": after, "limit": BACKFILL_CHUNK_SIZE})]
+        if not ids:
+            return
+        after = str(max(ids))
+
+
+def upgrade():
+    op.execute("SET LOCAL lock_timeout = '10s'")
+    op.execute(
+        "ALTER TABLE delivery_logs ALTER COLUMN target_url DROP NOT NULL, "
+        + ", ".join(f"ADD COLUMN IF NOT EXISTS {column}_small smallint" for column in COLUMNS)
+    )
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION delivery_logs_fill_small() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.attempt_number_small := NEW.attempt_number;
+            NEW.status_small := {STATUS_TO_CODE.format(status='NEW.status')};
+            NEW.status_code_small := NEW.status_code;
+            RETURN NEW;
+        END $$
+    """)
+    op.execute(
+        "CREATE TRIGGER delivery_logs_fill_small BEFORE INSERT OR UPDATE ON delivery_logs "
+        "FOR EACH ROW EXECUTE FUNCTION delivery_logs_fill_small()"
+    )
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for (partition,) in bind.execute(_PARTITIONS_SQL).fetchall():
+            _backfill(bind, partition)
+
+        for column in NOT_NULL_COLUMNS:
+            op.execute(
+                f"ALTER TABLE delivery_logs ADD CONSTRAINT delivery_logs_{column}_small_not_null "
+                f"CHECK ({column}_small IS NOT NULL) NOT VALID"
+            )
+            op.execute(f"ALTER TABLE delivery_logs VALIDATE CONSTRAINT delivery_logs_{column}_small_not_null")
+
+        # Partitions created from here on get their piece of the index with the table
+        op.execute("CREATE INDEX IF NOT EXISTS ix_delivery_logs_status_small ON ONLY delivery_logs (status_small)")
+        for (partition,) in bind.execute(_UNINDEXED_PARTITIONS_SQL).fetchall():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition}_status_small_idx "
+                f"ON {partition} (status_small)"
+            )
+            op.execute(f"ALTER INDEX ix_delivery_logs_status_small ATTACH PARTITION {partition}_status_small_idx")
+
+    # The swap - metadata only, so fail fast rather than queue behind long transactions
+    op.execute("SET LOCAL lock_timeout = '10s'")
+    op.execute("DROP TRIGGER delivery_logs_fill_small ON delivery_logs")
+    op.execute("DROP FUNCTION delivery_logs_fill_small()")
+    # Drops ix_delivery_logs_status with the old status column
+    op.execute("ALTER TABLE delivery_logs " + ", ".join(f"DROP COLUMN {column}" for column in COLUMNS))
+    for column in COLUMNS:
+        op.execute(f"ALTER TABLE delivery_logs RENAME COLUMN {column}_small TO {column}")
+    op.execute(
+        "ALTER TABLE delivery_logs "
+        + ", ".join(f"ALTER COLUMN {column} SET NOT NULL" for column in NOT_NULL_COLUMNS)
+    )
+    op.execute(
+        "ALTER TABLE delivery_logs "
+        + ", ".join(f"DROP CONSTRAINT delivery_logs_{column}_small_not_null" for column in NOT_NULL_COLUMNS)
+    )
+    op.execute("ALTER INDEX ix_delivery_logs_status_small RENAME TO ix_delivery_logs_status")
+    op.execute("DROP TYPE IF EXISTS delivery_log_status")
+
+
+def downgrade():
+    # Rewrites every partition under an ACCESS EXCLUSIVE lock - only meant for small installs
+    op.execute("CREATE TYPE delivery_log_status AS ENUM ('SUCCESS', 'FAILED_ATTEMPT', 'FAILURE')")
+    op.execute(
+        "UPDATE delivery_logs l SET target_url = s.target_url "
+        "FROM subscriptions s WHERE s.id = l.subscription_id AND l.target_url IS NULL"
+    )
+    op.execute(f"""
+        ALTER TABLE delivery_logs
+            ALTER COLUMN target_url SET NOT NULL,
+            ALTER COLUMN attempt_number TYPE integer,
+            ALTER COLUMN status TYPE delivery_log_status USING {CODE_TO_STATUS},
+            ALTER COLUMN status_code TYPE integer
+    """)
@@ -0,0 +1,30 @@
+"""add delivery_counter_flushes so counter flushes apply once
+
+Revision ID: 20251019_170000
+Revises: 20251019_160000
+Create Date: 2025-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_170000'
+down_revision = '20251019_160000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'delivery_counter_flushes',
+        sa.Column('flush_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('applied_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('flush_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('delivery_counter_flushes')
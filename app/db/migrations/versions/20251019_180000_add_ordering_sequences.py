@@ -0,0 +1,57 @@
+"""move ordered sequence numbers to one row per ordering key
+
+Revision ID: 20251019_180000
+Revises: 20251019_170000
+Create Date: 2025-10-19 18:00:00.000000
+
+subscriptions.last_sequence made every ordered ingest of a subscription
+queue on the same row lock, whatever its ordering key. Each key gets its own
+row in ordering_sequences instead. Keys with unfinished tasks start from
+their subscription's last_sequence, so new tasks still sort after them.
+
+The application reads and writes the new table only, so deploy it with this
+revision.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_180000'
+down_revision = '20251019_170000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ordering_sequences',
+        sa.Column('ordering_key', sa.String(), nullable=False),
+        sa.Column('subscription_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('last_sequence', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['subscription_id'], ['subscriptions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('ordering_key'),
+    )
+    op.create_index('ix_ordering_sequences_subscription_id', 'ordering_sequences', ['subscription_id'])
+    op.execute("""
+        INSERT INTO ordering_sequences (ordering_key, subscription_id, last_sequence)
+        SELECT DISTINCT t.ordering_key, t.subscription_id, s.last_sequence
+        FROM delivery_tasks t JOIN subscriptions s ON s.id = t.subscription_id
+        WHERE t.ordering_key IS NOT NULL
+    """)
+    op.drop_column('subscriptions', 'last_sequence')
+
+
+def downgrade():
+    op.add_column('subscriptions', sa.Column('last_sequence', sa.BigInteger(), nullable=False, server_default='0'))
+    op.execute("""
+        UPDATE subscriptions s SET last_sequence = q.last_sequence
+        FROM (
+            SELECT subscription_id, max(last_sequence) AS last_sequence
+            FROM ordering_sequences GROUP BY subscription_id
+        ) q
+        WHERE q.subscription_id = s.id
+    """)
+    op.drop_index('ix_ordering_sequences_subscription_id', table_name='ordering_sequences')
+    op.drop_table('ordering_sequences')
@@ -0,0 +1,35 @@
+"""add status and event type keyset indexes to delivery_task_history
+
+Revision ID: 20251019_190000
+Revises: 20251019_180000
+Create Date: 2025-10-19 19:00:00.000000
+
+GET /api/v1/deliveries searches delivery_task_history with the same filters
+and keyset as delivery_tasks, so it needs the same indexes.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20251019_190000'
+down_revision = '20251019_180000'
+branch_labels = None
+depends_on = None
+
+
+NEW_INDEXES = [
+    ('ix_delivery_task_history_status_created', 'delivery_task_history', 'status, created_at, id'),
+    ('ix_delivery_task_history_event_type_created', 'delivery_task_history', 'event_type, created_at, id'),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in NEW_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _, _ in NEW_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
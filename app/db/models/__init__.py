@@ -1,3 +1,7 @@
 from app.db.models.subscription import Subscription
 from app.db.models.delivery_task import DeliveryTask, DeliveryStatus as TaskStatus
-from app.db.models.delivery_log import DeliveryLog, DeliveryStatus as LogStatus
\ No newline at end of file
+from app.db.models.delivery_task_history import DeliveryTaskHistory
+from app.db.models.delivery_log import DeliveryLog, DeliveryStatus as LogStatus
+from app.db.models.outbox import OutboxEntry
+from app.db.models.delivery_counter import DeliveryCounter, DeliveryCounterFlush
+from app.db.models.ordering_sequence import OrderingSequence
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from sqlalchemy import Column, BigInteger, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class DeliveryCounter(Base):
+    """
+    Delivery outcomes of a subscription in one hour, flushed from Redis by
+    app.workers.counters so stats never have to scan tasks or logs.
+    """
+    __tablename__ = "delivery_counters"
+
+    subscription_id = Column(UUID(as_uuid=True), ForeignKey("subscriptions.id", ondelete="CASCADE"), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)  # Start of the hour, UTC
+    attempts = Column(BigInteger, nullable=False, default=0)
+    succeeded = Column(BigInteger, nullable=False, default=0)
+    failed = Column(BigInteger, nullable=False, default=0)
+    expired = Column(BigInteger, nullable=False, default=0)
+
+
+class DeliveryCounterFlush(Base):
+    """
+    A counter flush already added to delivery_counters, recorded in the same
+    transaction so a flush retried after its commit is not added twice.
+    """
+    __tablename__ = "delivery_counter_flushes"
+
+    flush_id = Column(UUID(as_uuid=True), primary_key=True)
+    applied_at = Column(DateTime, nullable=False, default=datetime.utcnow)
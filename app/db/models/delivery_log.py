@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Index
+from sqlalchemy import Column, SmallInteger, String, DateTime, ForeignKey, Text, Index
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
 import enum
 from datetime import datetime
 
 from app.db.base import Base
+from app.db.ids import uuid7
 
 
 class DeliveryStatus(str, enum.Enum):
@@ -13,18 +14,43 @@ class DeliveryStatus(str, enum.Enum):
     FAILURE = "FAILURE"  # No more retries
 
 
+# Stored codes; never reuse or renumber one
+STATUS_CODES = {
+    DeliveryStatus.SUCCESS: 1,
+    DeliveryStatus.FAILED_ATTEMPT: 2,
+    DeliveryStatus.FAILURE: 3,
+}
+STATUSES = {code: status for status, code in STATUS_CODES.items()}
+
+
+class StatusCode(TypeDecorator):
+    """DeliveryStatus stored as a smallint code instead of an enum label"""
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else STATUS_CODES[DeliveryStatus(value)]
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else STATUSES[value]
+
+
 class DeliveryLog(Base):
     __tablename__ = "delivery_logs"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
-    delivery_task_id = Column(UUID(as_uuid=True), ForeignKey("delivery_tasks.id", ondelete="CASCADE"), nullable=False)
+    # Partitioned by created_at (see app.db.partitions), which must be part of the key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)  # Time-ordered (see app.db.ids)
+    # No foreign key: finished tasks move on to delivery_task_history
+    delivery_task_id = Column(UUID(as_uuid=True), nullable=False)
     subscription_id = Column(UUID(as_uuid=True), ForeignKey("subscriptions.id", ondelete="CASCADE"), nullable=False)
-    target_url = Column(String, nullable=False)
-    attempt_number = Column(Integer, nullable=False)
-    status = Column(Enum(DeliveryStatus), nullable=False)
-    status_code = Column(Integer, nullable=True)
+    # NULL in compact mode (LOG_COMPACT_MODE); readers take the subscription's
+    target_url = Column(String, nullable=True)
+    # The three smallint columns share one 8-byte word of the row
+    attempt_number = Column(SmallInteger, nullable=False)
+    status = Column(StatusCode, nullable=False)
+    status_code = Column(SmallInteger, nullable=True)
     error_details = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
     # Add indexes and constraints
     __table_args__ = (
@@ -32,4 +58,6 @@ class DeliveryLog(Base):
         Index('ix_delivery_logs_subscription_id', subscription_id),
         Index('ix_delivery_logs_created_at', created_at),
         Index('ix_delivery_logs_status', status),
+        Index('ix_delivery_logs_subscription_created', subscription_id, created_at),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
     )
\ No newline at end of file
@@ -1,11 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Index
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Enum, Text, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
-import uuid
 import enum
 from datetime import datetime
 
 from app.db.base import Base
+from app.db.ids import uuid7
 
 
 class DeliveryStatus(str, enum.Enum):
@@ -13,12 +13,13 @@ class DeliveryStatus(str, enum.Enum):
     IN_PROGRESS = "IN_PROGRESS"
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
+    EXPIRED = "EXPIRED"  # Past its TTL, dropped without delivery
 
 
 class DeliveryTask(Base):
     __tablename__ = "delivery_tasks"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)  # Time-ordered (see app.db.ids)
     subscription_id = Column(UUID(as_uuid=True), ForeignKey("subscriptions.id", ondelete="CASCADE"), nullable=False)
     payload = Column(JSONB, nullable=False)
     event_type = Column(String, nullable=True)
@@ -26,13 +27,28 @@ class DeliveryTask(Base):
     attempt_count = Column(Integer, default=0, nullable=False)
     max_retries = Column(Integer, default=5, nullable=False)  # Default max retries as per SRS
     next_attempt_at = Column(DateTime, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)  # Set while a worker holds the task
+    ordering_key = Column(String, nullable=True)  # Only set for ordered subscriptions
+    sequence = Column(BigInteger, nullable=True)  # Ingest order within the subscription
+    expires_at = Column(DateTime, nullable=True)  # Event TTL - never delivered after this
+    attempt_id = Column(UUID(as_uuid=True), nullable=True)  # Fencing token of the latest claim
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Add indexes and constraints
     __table_args__ = (
-        Index('ix_delivery_tasks_subscription_id', subscription_id),
-        Index('ix_delivery_tasks_status', status),
+        # Search filters with the (created_at, id) keyset; also serve lookups by their first column
+        Index('ix_delivery_tasks_subscription_created', subscription_id, created_at, id),
+        Index('ix_delivery_tasks_status_created', status, created_at, id),
+        Index('ix_delivery_tasks_event_type_created', event_type, created_at, id),
         Index('ix_delivery_tasks_created_at', created_at),
         Index('ix_delivery_tasks_next_attempt_at', next_attempt_at),
+        Index('ix_delivery_tasks_lease_expires_at', lease_expires_at,
+              postgresql_where=(status == DeliveryStatus.IN_PROGRESS)),
+        Index('ix_delivery_tasks_ordering_key_sequence', ordering_key, sequence,
+              postgresql_where=ordering_key.isnot(None)),
+        Index('ix_delivery_tasks_expires_at', expires_at,
+              postgresql_where=(status == DeliveryStatus.PENDING) & expires_at.isnot(None)),
+        Index('ix_delivery_tasks_terminal_updated_at', updated_at,
+              postgresql_where=status.in_([DeliveryStatus.COMPLETED, DeliveryStatus.FAILED, DeliveryStatus.EXPIRED])),
     )
\ No newline at end of file
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from datetime import datetime
+
+from app.db.base import Base
+from app.db.models.delivery_task import DeliveryStatus
+
+
+class DeliveryTaskHistory(Base):
+    """Terminal delivery tasks moved out of delivery_tasks (see app.workers.history)
+
+    Mirrors DeliveryTask column for column, so reads can fall back to it
+    transparently; only the bookkeeping columns differ.
+    """
+    __tablename__ = "delivery_task_history"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    subscription_id = Column(UUID(as_uuid=True), ForeignKey("subscriptions.id", ondelete="CASCADE"), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    event_type = Column(String, nullable=True)
+    status = Column(Enum(DeliveryStatus), nullable=False)
+    attempt_count = Column(Integer, nullable=False)
+    max_retries = Column(Integer, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    ordering_key = Column(String, nullable=True)
+    sequence = Column(BigInteger, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+    attempt_id = Column(UUID(as_uuid=True), nullable=True)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    moved_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_delivery_task_history_subscription_created', subscription_id, created_at, id),
+        Index('ix_delivery_task_history_created_at', created_at, id),
+        # Delivery search filters history like delivery_tasks
+        Index('ix_delivery_task_history_status_created', status, created_at, id),
+        Index('ix_delivery_task_history_event_type_created', event_type, created_at, id),
+        Index('ix_delivery_task_history_moved_at', moved_at),
+        # Retention's keyset walk, per status
+        Index('ix_delivery_task_history_status_updated_at', status, updated_at, id),
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, BigInteger, String, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class OrderingSequence(Base):
+    """
+    Last sequence number handed out on one ordering key. Each key has its own
+    row, so ordered ingest only serializes on the key it writes to.
+    """
+    __tablename__ = "ordering_sequences"
+
+    ordering_key = Column(String, primary_key=True)
+    subscription_id = Column(
+        UUID(as_uuid=True), ForeignKey("subscriptions.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    last_sequence = Column(BigInteger, nullable=False, default=0)
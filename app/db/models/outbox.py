@@ -0,0 +1,18 @@
+from sqlalchemy import Column, BigInteger, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+from app.db.base import Base
+
+
+class OutboxEntry(Base):
+    """
+    Transactional outbox row, written in the same transaction as its delivery
+    task and removed by the outbox relay once the task has been published.
+    """
+    __tablename__ = "delivery_outbox"
+
+    # Monotonic key so the relay publishes in insertion order
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    delivery_task_id = Column(UUID(as_uuid=True), ForeignKey("delivery_tasks.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
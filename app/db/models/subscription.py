@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ARRAY, Index, UniqueConstraint
+from sqlalchemy import Column, Integer, Float, Boolean, String, DateTime, ARRAY, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 import uuid
 from datetime import datetime
@@ -13,6 +13,13 @@ class Subscription(Base):
     target_url = Column(String, nullable=False)
     secret = Column(String, nullable=True)
     event_types = Column(ARRAY(String), nullable=True)
+    retry_policy = Column(JSONB, nullable=True)  # None uses settings.WEBHOOK_RETRY_DELAYS
+    dispatch_weight = Column(Float, nullable=False, default=1.0, server_default="1")  # Fair dispatch share
+    priority_lane = Column(String(20), nullable=True)  # None routes by event type
+    ordered = Column(Boolean, nullable=False, default=False, server_default="false")  # FIFO delivery
+    event_ttl_seconds = Column(Integer, nullable=True)  # Default event TTL; None keeps events until delivered
+    batch_delivery = Column(JSONB, nullable=True)  # Coalesced delivery config; None sends one POST per event
+    deleted_at = Column(DateTime, nullable=True)  # Soft-deleted; purged by app.workers.purge
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -20,5 +27,7 @@ class Subscription(Base):
     __table_args__ = (
         Index('ix_subscriptions_target_url', target_url),
         Index('ix_subscriptions_created_at', created_at),
+        Index('ix_subscriptions_created_at_id', created_at, id, postgresql_where=deleted_at.is_(None)),
+        Index('ix_subscriptions_deleted_at', deleted_at, postgresql_where=deleted_at.isnot(None)),
         UniqueConstraint('id', name='uq_subscriptions_id'),
     )
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Partition manager for delivery_logs.
+
+delivery_logs is range-partitioned by created_at into partitions of
+LOG_PARTITION_INTERVAL_HOURS named delivery_logs_pYYYYMMDDHH. maintain()
+keeps LOG_PARTITION_PREMAKE_HOURS of partitions ready ahead of time and
+enforces LOG_RETENTION_HOURS by dropping partitions that lie entirely before
+the cutoff - a metadata operation instead of a bulk DELETE. Only rows of the
+one partition straddling the cutoff are deleted row by row, in the retention
+engine's throttled chunks (app.services.retention), and partition pruning
+keeps those DELETEs to that partition. With LOG_ARCHIVE_ENABLED, expiring
+rows are archived first (see app.services.archive) and nothing is deleted
+unless that succeeds.
+"""
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services import archive, retention
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "delivery_logs"
+BOUND_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+_LIST_PARTITIONS_SQL = text("""
+    SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound,
+           GREATEST(c.reltuples, 0)::bigint AS estimated_rows
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = CAST(:parent AS regclass)
+""")
+
+
+class Partition(NamedTuple):
+    name: str
+    start: Optional[datetime]  # None for MINVALUE
+    end: Optional[datetime]  # None for MAXVALUE
+    estimated_rows: int
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    value = value.strip().strip("'")
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.strptime(value[:19], BOUND_FORMAT)
+
+
+def list_partitions(db: Session) -> List[Partition]:
+    """Range partitions of delivery_logs, oldest first"""
+    partitions = []
+    for row in db.execute(_LIST_PARTITIONS_SQL, {"parent": PARENT_TABLE}):
+        match = _BOUND_RE.search(row.bound or "")
+        if not match:
+            continue  # A DEFAULT partition has no range
+        partitions.append(Partition(
+            row.name, _parse_bound(match.group(1)), _parse_bound(match.group(2)), row.estimated_rows
+        ))
+    return sorted(partitions, key=lambda p: p.start or datetime.min)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT_TABLE}_p{start:%Y%m%d%H}"
+
+
+def _floor(moment: datetime, hours: int) -> datetime:
+    """Start of the interval containing moment (intervals are aligned to midnight)"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=moment.hour - moment.hour % hours)
+
+
+def ensure_partitions(db: Session, now: Optional[datetime] = None) -> List[str]:
+    """
+    Create partitions up to LOG_PARTITION_PREMAKE_HOURS from now.
+
+    Returns:
+        List[str]: Names of the partitions created
+    """
+    now = now or datetime.utcnow()
+    hours = settings.LOG_PARTITION_INTERVAL_HOURS
+    horizon = now + timedelta(hours=settings.LOG_PARTITION_PREMAKE_HOURS)
+
+    bounds = [p.end for p in list_partitions(db) if p.end is not None]
+    start = max(bounds) if bounds else _floor(now, hours)
+
+    created = []
+    db.execute(text("SET LOCAL lock_timeout = '5s'"))
+    while start < horizon:
+        end = start + timedelta(hours=hours)
+        name = partition_name(start)
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{start:{BOUND_FORMAT}}') TO ('{end:{BOUND_FORMAT}}')"
+        ))
+        created.append(name)
+        start = end
+    db.commit()
+
+    if created:
+        logger.info(f"Created {len(created)} delivery log partitions up to {start}")
+    return created
+
+
+def drop_expired_partitions(db: Session, cutoff: datetime) -> Tuple[List[str], int]:
+    """
+    Drop partitions lying entirely before cutoff.
+
+    Returns:
+        Tuple[List[str], int]: Names dropped and their estimated row count
+    """
+    expired = [p for p in list_partitions(db) if p.end is not None and p.end <= cutoff]
+    db.execute(text("SET LOCAL lock_timeout = '5s'"))
+    for partition in expired:
+        db.execute(text(f"DROP TABLE IF EXISTS {partition.name}"))
+    db.commit()
+
+    if expired:
+        logger.info(f"Dropped {len(expired)} expired delivery log partitions")
+    return [p.name for p in expired], sum(p.estimated_rows for p in expired)
+
+
+def maintain(db: Session, now: Optional[datetime] = None) -> dict:
+    """Create upcoming partitions and enforce the log retention period"""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(hours=settings.LOG_RETENTION_HOURS)
+
+    created = ensure_partitions(db, now)
+    # Raises before anything is deleted if the archive can't be written
+    archived = archive.archive_expiring(db, cutoff) if settings.LOG_ARCHIVE_ENABLED else 0
+    dropped, dropped_rows = drop_expired_partitions(db, cutoff)
+    trimmed = retention.run_policy(db, retention.LOGS, now)["deleted"]
+    return {
+        "created": created, "archived_rows": archived,
+        "dropped": dropped, "dropped_rows": dropped_rows, "trimmed_rows": trimmed,
+    }
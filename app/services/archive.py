@@ -0,0 +1,269 @@
+"""
+Cold archive of delivery logs.
+
+With LOG_ARCHIVE_ENABLED, log retention first copies every row it is about
+to delete to gzip-compressed NDJSON files under LOG_ARCHIVE_DIR, one file per
+hour and subscription per run:
+
+    <LOG_ARCHIVE_DIR>/<YYYYMMDDHH>/<subscription id>/logs-<uuid>.ndjson.gz
+
+Rows are streamed hour by hour through a server-side cursor, ordered by
+subscription so only one file is open at a time. Each finished file gets an
+entry in the append-only index.ndjson with its row count, created_at range,
+status code range and statuses, so query() only opens the files that can
+hold matching rows. A watermark file records how far archiving got; if
+archiving fails, retention keeps the logs until a later run succeeds.
+"""
+import gzip
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.delivery_log import STATUSES
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.ndjson"
+WATERMARK_FILE = "watermark"
+HOUR_FORMAT = "%Y%m%d%H"
+
+COLUMNS = [
+    "id", "delivery_task_id", "subscription_id", "target_url", "attempt_number",
+    "status", "status_code", "error_details", "created_at",
+]
+
+# Compact rows take their target URL from the subscription, so files stand alone
+_SELECT_LIST = ", ".join(
+    "COALESCE(l.target_url, s.target_url)" if column == "target_url" else f"l.{column}" for column in COLUMNS
+)
+
+# Uses ix_delivery_logs_subscription_created and prunes to one partition
+_WINDOW_SQL = text(f"""
+    SELECT {_SELECT_LIST}
+    FROM delivery_logs l LEFT JOIN subscriptions s ON s.id = l.subscription_id
+    WHERE l.created_at >= :start AND l.created_at < :end
+    ORDER BY l.subscription_id, l.created_at
+""")
+
+_OLDEST_SQL = text("SELECT MIN(created_at) FROM delivery_logs WHERE created_at < :cutoff")
+
+
+def archive_root() -> Path:
+    return Path(settings.LOG_ARCHIVE_DIR)
+
+
+def _hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def load_watermark() -> Optional[datetime]:
+    """End of the archived range, or None before the first run"""
+    path = archive_root() / WATERMARK_FILE
+    if not path.exists():
+        return None
+    return datetime.fromisoformat(path.read_text().strip())
+
+
+def _save_watermark(moment: datetime) -> None:
+    path = archive_root() / WATERMARK_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(moment.isoformat())
+    os.replace(tmp, path)
+
+
+def _record(row) -> Dict[str, Any]:
+    record = dict(zip(COLUMNS, row))
+    for column in ("id", "delivery_task_id", "subscription_id"):
+        record[column] = str(record[column])
+    record["status"] = STATUSES[record["status"]].value
+    record["created_at"] = record["created_at"].isoformat()
+    return record
+
+
+class _ArchiveFile:
+    """One compressed file of an hour's logs of a subscription, with its index entry"""
+
+    def __init__(self, hour: datetime, subscription_id: str):
+        directory = archive_root() / hour.strftime(HOUR_FORMAT) / subscription_id
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"logs-{uuid.uuid4().hex}.ndjson.gz"
+        self.tmp = self.path.with_name(self.path.name + ".tmp")
+        self.file = gzip.open(self.tmp, "wt", compresslevel=settings.LOG_ARCHIVE_COMPRESS_LEVEL)
+        self.entry = {
+            "file": str(self.path.relative_to(archive_root())),
+            "hour": hour.strftime(HOUR_FORMAT),
+            "subscription_id": subscription_id,
+            "rows": 0,
+            "min_created_at": None,
+            "max_created_at": None,
+            "min_status_code": None,
+            "max_status_code": None,
+            "statuses": [],
+        }
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        entry = self.entry
+        entry["rows"] += 1
+        # Rows arrive in created_at order within a subscription
+        entry["min_created_at"] = entry["min_created_at"] or record["created_at"]
+        entry["max_created_at"] = record["created_at"]
+        code = record["status_code"]
+        if code is not None:
+            entry["min_status_code"] = min(code, entry["min_status_code"] or code)
+            entry["max_status_code"] = max(code, entry["max_status_code"] or code)
+        if record["status"] not in entry["statuses"]:
+            entry["statuses"].append(record["status"])
+
+    def close(self) -> Dict[str, Any]:
+        self.file.close()
+        os.replace(self.tmp, self.path)
+        return self.entry
+
+
+def _append_index(entries: List[Dict[str, Any]]) -> None:
+    if not entries:
+        return
+    with open(archive_root() / INDEX_FILE, "a") as index:
+        for entry in entries:
+            index.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        index.flush()
+        os.fsync(index.fileno())
+
+
+def archive_window(db: Session, start: datetime, end: datetime) -> int:
+    """
+    Archive the logs created in [start, end), which must lie within one hour.
+
+    Returns:
+        int: Number of rows archived
+    """
+    result = db.execute(
+        _WINDOW_SQL, {"start": start, "end": end},
+        execution_options={"stream_results": True, "yield_per": settings.LOG_ARCHIVE_FETCH_SIZE}
+    )
+    entries = []
+    current = None
+    try:
+        for row in result:
+            record = _record(row)
+            if current is None or current.entry["subscription_id"] != record["subscription_id"]:
+                if current is not None:
+                    entries.append(current.close())
+                current = _ArchiveFile(_hour(start), record["subscription_id"])
+            current.write(record)
+        if current is not None:
+            entries.append(current.close())
+            current = None
+    finally:
+        if current is not None:
+            current.file.close()
+            current.tmp.unlink(missing_ok=True)
+        db.commit()
+
+    # Files only become visible to query() once indexed
+    _append_index(entries)
+    return sum(entry["rows"] for entry in entries)
+
+
+def archive_expiring(db: Session, cutoff: datetime) -> int:
+    """
+    Archive every log created before cutoff that an earlier run hasn't.
+
+    Returns:
+        int: Number of rows archived
+    """
+    archive_root().mkdir(parents=True, exist_ok=True)
+    start = load_watermark()
+    if start is None:
+        start = db.execute(_OLDEST_SQL, {"cutoff": cutoff}).scalar()
+        db.commit()
+        if start is None:
+            _save_watermark(cutoff)
+            return 0
+
+    archived = 0
+    while start < cutoff:
+        end = min(_hour(start) + timedelta(hours=1), cutoff)
+        archived += archive_window(db, start, end)
+        _save_watermark(end)
+        start = end
+
+    if archived:
+        logger.info(f"Archived {archived} delivery logs created before {cutoff}")
+    return archived
+
+
+def _index_entries() -> Iterator[Dict[str, Any]]:
+    path = archive_root() / INDEX_FILE
+    if not path.exists():
+        return
+    with open(path) as index:
+        for line in index:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _may_match(entry: Dict[str, Any], subscription_id: Optional[str], start: Optional[datetime],
+               end: Optional[datetime], status: Optional[str], status_code: Optional[int]) -> bool:
+    """Whether a file can hold matching rows, judging by its index entry"""
+    if subscription_id and entry["subscription_id"] != subscription_id:
+        return False
+    if start and datetime.fromisoformat(entry["max_created_at"]) < start:
+        return False
+    if end and datetime.fromisoformat(entry["min_created_at"]) >= end:
+        return False
+    if status and status not in entry["statuses"]:
+        return False
+    if status_code is not None and (
+        entry["min_status_code"] is None
+        or not entry["min_status_code"] <= status_code <= entry["max_status_code"]
+    ):
+        return False
+    return True
+
+
+def query(subscription_id: Optional[str] = None, start: Optional[datetime] = None,
+          end: Optional[datetime] = None, status: Optional[str] = None,
+          status_code: Optional[int] = None, delivery_task_id: Optional[str] = None,
+          limit: int = 100) -> Dict[str, Any]:
+    """
+    Search archived logs, newest files first.
+
+    Returns:
+        Dict[str, Any]: Matching logs and how many files were indexed and scanned
+    """
+    entries = list(_index_entries())
+    candidates = [e for e in entries if _may_match(e, subscription_id, start, end, status, status_code)]
+    candidates.sort(key=lambda e: e["max_created_at"], reverse=True)
+
+    logs = []
+    scanned = 0
+    for entry in candidates:
+        if len(logs) >= limit:
+            break
+        scanned += 1
+        with gzip.open(archive_root() / entry["file"], "rt") as archived:
+            for line in archived:
+                record = json.loads(line)
+                created_at = datetime.fromisoformat(record["created_at"])
+                if start and created_at < start or end and created_at >= end:
+                    continue
+                if status and record["status"] != status:
+                    continue
+                if status_code is not None and record["status_code"] != status_code:
+                    continue
+                if delivery_task_id and record["delivery_task_id"] != delivery_task_id:
+                    continue
+                logs.append(record)
+
+    logs.sort(key=lambda record: record["created_at"], reverse=True)
+    return {"files_indexed": len(entries), "files_scanned": scanned, "logs": logs[:limit]}
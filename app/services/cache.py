@@ -2,6 +2,7 @@ import redis
 import json
 import time
 import hashlib
+import uuid
 from typing import Optional, Any, Dict
 from uuid import UUID
 from contextlib import contextmanager
@@ -376,4 +377,30 @@ def publish_cache_invalidation(subscription_id: UUID):
             return True
     except Exception as e:
         logger.error(f"Failed to publish cache invalidation: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+
+# Only delete a lock if we still own it
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_release_lock_script = redis_client.register_script(RELEASE_LOCK_LUA)
+
+
+def acquire_lock(key: str, ttl_seconds: int, client=None) -> Optional[str]:
+    """Take a lock that expires after ttl_seconds; returns the owner token, or None if it is held"""
+    client = client or redis_client
+    token = uuid.uuid4().hex
+    if client.set(key, token, nx=True, ex=ttl_seconds):
+        return token
+    return None
+
+
+def release_lock(key: str, token: str, client=None) -> bool:
+    """Release a lock if it is still ours; a lock that expired and was taken by someone else stays"""
+    client = client or redis_client
+    return bool(_release_lock_script(keys=[key], args=[token], client=client))
@@ -0,0 +1,156 @@
+"""
+Redis sorted-set delay queue for scheduled deliveries and retries.
+
+Each delayed delivery is a single (due_time, task_id) member in one of
+DELAY_QUEUE_SHARDS sorted sets, so a waiting task costs a few dozen bytes in
+Redis instead of a resident Celery message in every worker's prefetch buffer.
+The mover (app.workers.scheduler) pops due entries in batches with a Lua
+script, which makes pop-and-remove atomic across concurrent movers.
+
+A popped entry moves to its shard's processing set, scored by when it was
+taken, and only leaves it once the mover has queued it (ack). Entries a
+crashed mover left behind for DELAY_QUEUE_PROCESSING_TIMEOUT_SECONDS go
+back to their shard (recover), so a retry is never lost between pop and
+enqueue - at worst it is queued twice, which workers already tolerate.
+
+Backends that can't delay a message themselves also park coalesced batch
+kicks here (see app.workers.coalescing); their members are the subscription
+ID behind COALESCE_PREFIX instead of a task ID.
+"""
+import logging
+import time
+import zlib
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.cache import redis_client
+
+logger = logging.getLogger(__name__)
+
+COALESCE_PREFIX = "coalesce:"
+
+# KEYS: shard, its processing set
+# ARGV: due cutoff, max members, time taken
+# Atomically move up to ARGV[2] members due at or before ARGV[1] to processing
+POP_DUE_LUA = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, item in ipairs(items) do
+    redis.call('ZADD', KEYS[2], ARGV[3], item)
+    redis.call('ZREM', KEYS[1], item)
+end
+return items
+"""
+
+# KEYS: processing set, its shard
+# ARGV: taken-before cutoff, max members, new due time
+# Put members taken before ARGV[1] and never acked back in the shard
+RECOVER_LUA = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, item in ipairs(items) do
+    redis.call('ZADD', KEYS[2], ARGV[3], item)
+    redis.call('ZREM', KEYS[1], item)
+end
+return #items
+"""
+
+_pop_due_script = redis_client.register_script(POP_DUE_LUA)
+_recover_script = redis_client.register_script(RECOVER_LUA)
+
+
+def shard_key(shard: int) -> str:
+    """Redis key of a delay queue shard"""
+    return f"{settings.DELAY_QUEUE_KEY_PREFIX}:{shard}"
+
+
+def shard_for(task_id: str) -> int:
+    """Pick the shard a task is stored in"""
+    return zlib.crc32(task_id.encode()) % settings.DELAY_QUEUE_SHARDS
+
+
+def processing_key(shard: int) -> str:
+    """Redis key of the entries popped from a shard but not yet acked"""
+    return f"{shard_key(shard)}:processing"
+
+
+def schedule(task_id: str, due: float, client=None) -> None:
+    """
+    Schedule a delivery task to be queued at the given time.
+
+    Args:
+        task_id: ID of the delivery task
+        due: Epoch timestamp (seconds) at which the task becomes due
+    """
+    client = client or redis_client
+    client.zadd(shard_key(shard_for(task_id)), {task_id: due})
+
+
+def schedule_many(task_ids: List[str], due: float, client=None) -> None:
+    """Schedule several delivery tasks for the same time in one round trip"""
+    client = client or redis_client
+    pipe = client.pipeline(transaction=False)
+    for task_id in task_ids:
+        pipe.zadd(shard_key(shard_for(task_id)), {task_id: due})
+    pipe.execute()
+
+
+def pop_due(limit: int = None, now: Optional[float] = None, client=None) -> List[str]:
+    """
+    Atomically move due task IDs from every shard to processing and return them.
+
+    All shards are popped in one pipelined round trip, each taking at most
+    limit entries. Callers ack() the entries once they are queued.
+    """
+    client = client or redis_client
+    limit = limit or settings.DELAY_QUEUE_MOVE_BATCH_SIZE
+    now = time.time() if now is None else now
+
+    pipe = client.pipeline(transaction=False)
+    for shard in range(settings.DELAY_QUEUE_SHARDS):
+        _pop_due_script(
+            keys=[shard_key(shard), processing_key(shard)], args=[now, limit, time.time()], client=pipe
+        )
+
+    due = []
+    for items in pipe.execute():
+        due.extend(items)
+    return due
+
+
+def ack(task_ids: List[str], client=None) -> None:
+    """Drop popped entries from processing once they have been queued"""
+    if not task_ids:
+        return
+    client = client or redis_client
+    pipe = client.pipeline(transaction=False)
+    for task_id in task_ids:
+        pipe.zrem(processing_key(shard_for(task_id)), task_id)
+    pipe.execute()
+
+
+def recover(timeout: Optional[float] = None, limit: int = None, client=None) -> int:
+    """
+    Make entries popped more than timeout seconds ago, and never acked, due again.
+
+    Returns:
+        int: Number of entries recovered
+    """
+    client = client or redis_client
+    timeout = settings.DELAY_QUEUE_PROCESSING_TIMEOUT_SECONDS if timeout is None else timeout
+    limit = limit or settings.DELAY_QUEUE_MOVE_BATCH_SIZE
+    now = time.time()
+
+    pipe = client.pipeline(transaction=False)
+    for shard in range(settings.DELAY_QUEUE_SHARDS):
+        _recover_script(
+            keys=[processing_key(shard), shard_key(shard)], args=[now - timeout, limit, now], client=pipe
+        )
+    return sum(pipe.execute())
+
+
+def size(client=None) -> int:
+    """Total number of delayed deliveries across all shards"""
+    client = client or redis_client
+    pipe = client.pipeline(transaction=False)
+    for shard in range(settings.DELAY_QUEUE_SHARDS):
+        pipe.zcard(shard_key(shard))
+    return sum(pipe.execute())
@@ -0,0 +1,155 @@
+"""
+Per-subscription fair queue.
+
+With FAIR_DISPATCH_ENABLED, new deliveries are not published straight to the
+shared worker queue. Each subscription gets its own Redis list of task IDs,
+and subscriptions with a backlog sit in a round-robin ring. The dispatcher
+(app.workers.fair_dispatcher) serves the ring with deficit round-robin: each
+visit adds weight * FAIR_QUANTUM to the subscription's deficit and takes up
+to that many tasks, so a tenant ingesting a million events gets its share of
+the workers, not all of them. A dispatch pass shares one budget of tasks
+across its visits; a visit the budget cuts short carries the rest of its
+deficit over, but never more than one visit's worth.
+
+Every operation is a single Lua call touching one sub-queue, so dispatching
+costs O(1) no matter how many subscriptions are active.
+"""
+import logging
+import uuid
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.cache import redis_client
+
+logger = logging.getLogger(__name__)
+
+# KEYS: sub-queue, ring, active set, weights hash
+# ARGV: subscription ID, weight ('' keeps the current one), task IDs...
+PUSH_LUA = """
+local unpack = table.unpack or unpack
+redis.call('RPUSH', KEYS[1], unpack(ARGV, 3))
+if ARGV[2] ~= '' then
+    redis.call('HSET', KEYS[4], ARGV[1], ARGV[2])
+end
+if redis.call('SADD', KEYS[3], ARGV[1]) == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[1])
+end
+return redis.call('LLEN', KEYS[1])
+"""
+
+# KEYS: ring, active set, weights hash, deficits hash, budget of the pass
+# ARGV: sub-queue key prefix, quantum
+DISPATCH_LUA = """
+local budget = tonumber(redis.call('GET', KEYS[5]) or '0')
+if budget <= 0 then
+    return false
+end
+local sub = redis.call('LPOP', KEYS[1])
+if not sub then
+    return false
+end
+local qkey = ARGV[1] .. sub
+local weight = tonumber(redis.call('HGET', KEYS[3], sub) or '1')
+local share = weight * tonumber(ARGV[2])
+local deficit = tonumber(redis.call('HGET', KEYS[4], sub) or '0') + share
+local n = math.min(math.floor(deficit), budget)
+local items = {}
+if n > 0 then
+    items = redis.call('LPOP', qkey, n) or {}
+    redis.call('DECRBY', KEYS[5], #items)
+end
+-- What the budget left untaken carries over, up to one share
+deficit = math.min(deficit - #items, share)
+if redis.call('LLEN', qkey) > 0 then
+    redis.call('HSET', KEYS[4], sub, deficit)
+    redis.call('RPUSH', KEYS[1], sub)
+else
+    -- An emptied sub-queue leaves the ring and forfeits its deficit
+    redis.call('HDEL', KEYS[4], sub)
+    redis.call('HDEL', KEYS[3], sub)
+    redis.call('SREM', KEYS[2], sub)
+end
+return {sub, items, tostring(weight)}
+"""
+
+_push_script = redis_client.register_script(PUSH_LUA)
+_dispatch_script = redis_client.register_script(DISPATCH_LUA)
+
+
+def _key(name: str) -> str:
+    return f"{settings.FAIR_QUEUE_KEY_PREFIX}:{name}"
+
+
+def queue_key(subscription_id: str) -> str:
+    """Redis key of a subscription's sub-queue"""
+    return _key(f"q:{subscription_id}")
+
+
+def push(subscription_id: str, task_ids: List[str], weight: Optional[float] = None, client=None) -> int:
+    """
+    Add delivery tasks to the end of a subscription's sub-queue.
+
+    Args:
+        subscription_id: Subscription the tasks belong to
+        task_ids: IDs of the delivery tasks
+        weight: The subscription's dispatch weight (None keeps the current one)
+
+    Returns:
+        int: The sub-queue's backlog after the push
+    """
+    if not task_ids:
+        return backlog(subscription_id, client=client)
+    client = client or redis_client
+    return _push_script(
+        keys=[queue_key(subscription_id), _key("ring"), _key("active"), _key("weights")],
+        args=[subscription_id, "" if weight is None else weight, *task_ids],
+        client=client
+    )
+
+
+def dispatch(rounds: int, limit: int, client=None) -> List[Tuple[str, List[str], float]]:
+    """
+    Serve up to `rounds` sub-queues from the ring in one pipelined round trip.
+
+    Args:
+        rounds: Number of ring positions to visit
+        limit: Upper bound on the tasks taken by all visits together
+
+    Returns:
+        List[Tuple[str, List[str], float]]: (subscription ID, task IDs, weight) per
+        visit that yielded tasks; the weight lets a caller push the tasks back as they were
+    """
+    client = client or redis_client
+    budget_key = _key(f"budget:{uuid.uuid4().hex}")
+    keys = [_key("ring"), _key("active"), _key("weights"), _key("deficits"), budget_key]
+    args = [_key("q:"), settings.FAIR_QUANTUM]
+
+    pipe = client.pipeline(transaction=False)
+    pipe.set(budget_key, max(1, limit), ex=60)
+    for _ in range(rounds):
+        _dispatch_script(keys=keys, args=args, client=pipe)
+    pipe.delete(budget_key)
+
+    served = []
+    for result in pipe.execute()[1:-1]:
+        if result and result[1]:
+            served.append((
+                _decode(result[0]), [_decode(item) for item in result[1]], float(_decode(result[2]))
+            ))
+    return served
+
+
+def backlog(subscription_id: str, client=None) -> int:
+    """Number of deliveries waiting in a subscription's sub-queue"""
+    client = client or redis_client
+    return client.llen(queue_key(subscription_id))
+
+
+def active_count(client=None) -> int:
+    """Number of subscriptions with a backlog"""
+    client = client or redis_client
+    return client.scard(_key("active"))
+
+
+def _decode(value) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
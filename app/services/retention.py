@@ -0,0 +1,213 @@
+"""
+Retention engine.
+
+Each table with a retention period has one declarative RetentionPolicy in
+POLICIES. run_policy() deletes a policy's expired rows in chunks of
+RETENTION_CHUNK_SIZE, walking (time column, id) in key order so no chunk
+rescans rows an earlier one already deleted:
+
+- each chunk is its own short transaction, followed by a pause of
+  RETENTION_CHUNK_SLEEP_MS and, with RETENTION_MAX_REPLICATION_LAG_BYTES set,
+  a wait until every replica has caught up to within that lag;
+- the last key deleted is checkpointed in Redis after every chunk, so a run
+  stopped by RETENTION_MAX_RUN_SECONDS - or by a crash - resumes where it
+  left off instead of starting over;
+- every run reports rows deleted and rows per second, in the log and in
+  GET /api/v1/status/retention.
+"""
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.cache import redis_client, redis_timeout_handler
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "retention:checkpoint"  # policy name -> last deleted key
+STATS_KEY = "retention:stats"  # policy name -> last run's report
+
+
+class RetentionPolicy(NamedTuple):
+    name: str
+    table: str
+    time_column: str
+    retention_setting: str  # Settings attribute holding the retention period
+    unit: str  # "hours" or "days"
+    where: str = "TRUE"
+
+    def cutoff(self, now: datetime) -> datetime:
+        return now - timedelta(**{self.unit: getattr(settings, self.retention_setting)})
+
+
+LOGS = RetentionPolicy("logs", "delivery_logs", "created_at", "LOG_RETENTION_HOURS", "hours")
+COMPLETED_TASKS = RetentionPolicy(
+    "completed_tasks", "delivery_task_history", "updated_at", "COMPLETED_TASK_RETENTION_DAYS", "days",
+    "status = 'COMPLETED'"
+)
+FAILED_TASKS = RetentionPolicy(
+    "failed_tasks", "delivery_task_history", "updated_at", "FAILED_TASK_RETENTION_DAYS", "days",
+    "status = 'FAILED'"
+)
+EXPIRED_TASKS = RetentionPolicy(
+    "expired_tasks", "delivery_task_history", "updated_at", "EXPIRED_TASK_RETENTION_DAYS", "days",
+    "status = 'EXPIRED'"
+)
+
+POLICIES = [LOGS, COMPLETED_TASKS, FAILED_TASKS, EXPIRED_TASKS]
+TASK_POLICIES = [COMPLETED_TASKS, FAILED_TASKS, EXPIRED_TASKS]
+
+_REPLICATION_LAG_SQL = text("""
+    SELECT COALESCE(MAX(pg_wal_lsn_diff(pg_current_wal_lsn(), replay_lsn)), 0)
+    FROM pg_stat_replication
+""")
+
+
+def _chunk_sql(policy: RetentionPolicy, resume: bool):
+    after = f"AND ({policy.time_column}, id) > (:after_time, :after_id)" if resume else ""
+    # Matching the time column too lets partitioned tables prune
+    return text(f"""
+        WITH chunk AS (
+            SELECT id, {policy.time_column} AS key_time FROM {policy.table}
+            WHERE {policy.where} AND {policy.time_column} < :cutoff {after}
+            ORDER BY {policy.time_column}, id
+            LIMIT :limit
+        )
+        DELETE FROM {policy.table} AS target
+        USING chunk
+        WHERE target.id = chunk.id AND target.{policy.time_column} = chunk.key_time
+        RETURNING chunk.key_time, chunk.id
+    """)
+
+
+def load_checkpoint(policy: RetentionPolicy) -> Optional[Tuple[datetime, str]]:
+    """Last key deleted by an unfinished run of the policy"""
+    try:
+        with redis_timeout_handler():
+            value = redis_client.hget(CHECKPOINT_KEY, policy.name)
+            if value:
+                checkpoint = json.loads(value)
+                return datetime.fromisoformat(checkpoint["time"]), checkpoint["id"]
+    except Exception as e:
+        logger.warning(f"Failed to load retention checkpoint of {policy.name}: {str(e)}")
+    return None
+
+
+def save_checkpoint(policy: RetentionPolicy, checkpoint: Optional[Tuple[datetime, str]]) -> None:
+    try:
+        with redis_timeout_handler():
+            if checkpoint is None:
+                redis_client.hdel(CHECKPOINT_KEY, policy.name)
+            else:
+                redis_client.hset(CHECKPOINT_KEY, policy.name, json.dumps(
+                    {"time": checkpoint[0].isoformat(), "id": str(checkpoint[1])}
+                ))
+    except Exception as e:
+        logger.warning(f"Failed to save retention checkpoint of {policy.name}: {str(e)}")
+
+
+def wait_for_replicas(db: Session, sleep: Callable[[float], None]) -> None:
+    """Hold off while any replica lags more than RETENTION_MAX_REPLICATION_LAG_BYTES"""
+    max_lag = settings.RETENTION_MAX_REPLICATION_LAG_BYTES
+    if not max_lag:
+        return
+    for _ in range(60):
+        lag = db.execute(_REPLICATION_LAG_SQL).scalar() or 0
+        db.commit()
+        if lag <= max_lag:
+            return
+        logger.info(f"Replication lag {lag} bytes is above {max_lag}, pausing retention")
+        sleep(1.0)
+
+
+def run_policy(db: Session, policy: RetentionPolicy, now: Optional[datetime] = None,
+               max_seconds: Optional[float] = None, sleep: Callable[[float], None] = time.sleep) -> Dict:
+    """
+    Delete a policy's expired rows in checkpointed chunks.
+
+    Returns:
+        Dict: The run's report - rows deleted, seconds, rows per second and
+        whether every expired row is gone
+    """
+    cutoff = policy.cutoff(now or datetime.utcnow())
+    chunk_size = settings.RETENTION_CHUNK_SIZE
+    max_seconds = settings.RETENTION_MAX_RUN_SECONDS if max_seconds is None else max_seconds
+    checkpoint = load_checkpoint(policy)
+
+    started = time.monotonic()
+    deleted = 0
+    complete = False
+    while True:
+        params = {"cutoff": cutoff, "limit": chunk_size}
+        if checkpoint is not None:
+            params.update(after_time=checkpoint[0], after_id=checkpoint[1])
+        rows = db.execute(_chunk_sql(policy, checkpoint is not None), params).all()
+        db.commit()
+
+        deleted += len(rows)
+        if rows:
+            last = max(rows, key=lambda row: (row.key_time, str(row.id)))
+            checkpoint = (last.key_time, str(last.id))
+        if len(rows) < chunk_size:
+            complete = True
+            break
+
+        save_checkpoint(policy, checkpoint)
+        if time.monotonic() - started >= max_seconds:
+            break
+        sleep(settings.RETENTION_CHUNK_SLEEP_MS / 1000.0)
+        wait_for_replicas(db, sleep)
+
+    # A finished run starts from the oldest row next time
+    if complete:
+        save_checkpoint(policy, None)
+
+    seconds = time.monotonic() - started
+    report = {
+        "deleted": deleted,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(deleted / seconds, 1) if seconds > 0 else None,
+        "complete": complete,
+        "cutoff": cutoff.isoformat(),
+        "finished_at": datetime.utcnow().isoformat(),
+    }
+    _save_report(policy, report)
+    if deleted:
+        logger.info(f"Retention {policy.name}: deleted {deleted} rows in {report['seconds']}s "
+                    f"({report['rows_per_second']} rows/s){'' if complete else ', will resume'}")
+    return report
+
+
+def _save_report(policy: RetentionPolicy, report: Dict) -> None:
+    try:
+        with redis_timeout_handler():
+            redis_client.hset(STATS_KEY, policy.name, json.dumps(report))
+    except Exception as e:
+        logger.warning(f"Failed to save retention report of {policy.name}: {str(e)}")
+
+
+def run_policies(db: Session, policies: List[RetentionPolicy]) -> Dict[str, Dict]:
+    """Run several policies one after another; a failing policy doesn't stop the rest"""
+    reports = {}
+    for policy in policies:
+        try:
+            reports[policy.name] = run_policy(db, policy)
+        except Exception:
+            logger.exception(f"Retention policy {policy.name} failed")
+            if db.is_active:
+                db.rollback()
+    return reports
+
+
+def last_reports() -> Dict[str, Dict]:
+    """Last run's report of every policy"""
+    reports = redis_client.hgetall(STATS_KEY)
+    return {
+        (name.decode() if isinstance(name, bytes) else name): json.loads(value)
+        for name, value in reports.items()
+    }
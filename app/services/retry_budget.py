@@ -0,0 +1,96 @@
+"""
+Cluster-wide retry budget.
+
+Limits the share of delivery throughput spent on retries. Every attempt is
+counted in a short Redis window. A retry is charged to the window it will
+run in and admitted at its planned delay while that window's retries stay
+below RETRY_BUDGET_RATIO of the same window's attempts (plus a small floor so
+quiet periods can still retry). A window that hasn't started has no attempts
+yet, so the current window's count stands in for them. Retries over budget
+are deferred to a later, randomised time - never dropped - and charged to
+the window they are moved to.
+"""
+import logging
+import random
+import time
+
+from app.core.config import settings
+from app.services.cache import redis_client, redis_timeout_handler
+
+logger = logging.getLogger(__name__)
+
+RETRY_BUDGET_KEY = "retry_budget:{}:{}"  # window, counter (attempts | retries)
+
+
+def _window(now: float = None) -> int:
+    return int((now or time.time()) // settings.RETRY_BUDGET_WINDOW_SECONDS)
+
+
+def record_attempt() -> None:
+    """Count one delivery attempt (first attempt or retry) in the current window"""
+    if not settings.RETRY_BUDGET_ENABLED:
+        return
+
+    key = RETRY_BUDGET_KEY.format(_window(), "attempts")
+    try:
+        with redis_timeout_handler():
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.incr(key)
+            pipe.expire(key, settings.RETRY_BUDGET_WINDOW_SECONDS * 2)
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record attempt for retry budget: {str(e)}")
+
+
+def admit_retry(delay: float) -> float:
+    """
+    Admit a retry against the budget.
+
+    Args:
+        delay: Planned delay in seconds from the retry policy
+
+    Returns:
+        float: The delay to use - unchanged if within budget, deferred otherwise
+    """
+    if not settings.RETRY_BUDGET_ENABLED:
+        return delay
+
+    # Retries are charged to the window they will run in
+    now = time.time()
+    window = _window(now + delay)
+    retries_key = RETRY_BUDGET_KEY.format(window, "retries")
+
+    try:
+        with redis_timeout_handler():
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.get(RETRY_BUDGET_KEY.format(window, "attempts"))
+            pipe.get(RETRY_BUDGET_KEY.format(_window(now), "attempts"))
+            pipe.incr(retries_key)
+            pipe.expire(retries_key, settings.RETRY_BUDGET_WINDOW_SECONDS * 2 + int(delay))
+            window_attempts, current_attempts, retries, _ = pipe.execute()
+    except Exception as e:
+        # Fail open - a Redis problem shouldn't stop retries
+        logger.warning(f"Retry budget check failed, admitting retry: {str(e)}")
+        return delay
+
+    attempts = max(int(window_attempts or 0), int(current_attempts or 0))
+    allowed = settings.RETRY_BUDGET_RATIO * attempts + settings.RETRY_BUDGET_MIN_RETRIES
+    if retries <= allowed:
+        return delay
+
+    # Over budget: push it out by a randomised amount so deferred retries spread
+    deferred = delay + random.uniform(1, 2) * settings.RETRY_BUDGET_DEFER_SECONDS
+    logger.info(f"Retry budget exhausted ({retries} retries vs {allowed:.0f} allowed), deferring by {deferred - delay:.0f}s")
+
+    # The charge moves with the retry
+    deferred_key = RETRY_BUDGET_KEY.format(_window(now + deferred), "retries")
+    try:
+        with redis_timeout_handler():
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.decr(retries_key)
+            pipe.incr(deferred_key)
+            pipe.expire(deferred_key, settings.RETRY_BUDGET_WINDOW_SECONDS * 2 + int(deferred))
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to move deferred retry to its new window: {str(e)}")
+    return deferred
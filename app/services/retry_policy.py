@@ -0,0 +1,77 @@
+"""
+Retry delay policies.
+
+Subscriptions may carry a retry_policy (see RetryPolicy in
+app.api.schemas.subscription); tasks of subscriptions without one use
+settings.WEBHOOK_RETRY_DELAYS. Every strategy is jittered so that tasks which
+failed together during an outage don't all retry at the same instant.
+"""
+import random
+from typing import Optional, Dict, Any
+
+from app.core.config import settings
+
+EXPONENTIAL = "exponential"
+CAPPED = "capped"
+DECORRELATED_JITTER = "decorrelated_jitter"
+CUSTOM = "custom"
+
+# Defaults for policies that leave a field out
+DEFAULT_BASE_DELAY = 10
+DEFAULT_MAX_DELAY = 3600
+
+
+def _jitter(delay: float) -> float:
+    """Spread a delay by +/- RETRY_JITTER_RATIO"""
+    ratio = settings.RETRY_JITTER_RATIO
+    return delay * random.uniform(1 - ratio, 1 + ratio)
+
+
+def max_retries_for(policy: Optional[Dict[str, Any]]) -> int:
+    """Maximum number of attempts for tasks of a subscription with this policy"""
+    if policy and policy.get("max_retries") is not None:
+        return policy["max_retries"]
+    return settings.WEBHOOK_MAX_RETRIES
+
+
+def retry_delay(policy: Optional[Dict[str, Any]], attempt_count: int) -> Optional[float]:
+    """
+    Delay in seconds before the next attempt.
+
+    Args:
+        policy: Subscription retry policy, or None for the global defaults
+        attempt_count: Number of attempts made so far (1 after the first attempt)
+
+    Returns:
+        Optional[float]: Delay in seconds, or None if the policy has no more retries
+    """
+    retry_number = max(attempt_count, 1)
+
+    if not policy:
+        delays = settings.WEBHOOK_RETRY_DELAYS
+        if retry_number > len(delays):
+            return None
+        return _jitter(delays[retry_number - 1])
+
+    strategy = policy.get("strategy", EXPONENTIAL)
+    base = policy.get("base_delay") or DEFAULT_BASE_DELAY
+    cap = policy.get("max_delay") or DEFAULT_MAX_DELAY
+
+    if strategy == CUSTOM:
+        delays = policy.get("delays") or []
+        if retry_number > len(delays):
+            return None
+        return _jitter(delays[retry_number - 1])
+
+    if strategy == CAPPED:
+        # "Equal jitter": half fixed, half random, never above the cap
+        delay = min(cap, base * 2 ** (retry_number - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    if strategy == DECORRELATED_JITTER:
+        # The previous sleep isn't stored, so its upper bound stands in for it
+        previous = min(cap, base * 3 ** (retry_number - 1))
+        return min(cap, random.uniform(base, previous * 3))
+
+    # Exponential (uncapped apart from the policy's max_delay safety net)
+    return min(_jitter(base * 2 ** (retry_number - 1)), cap)
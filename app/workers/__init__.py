@@ -1 +1 @@
-from app.workers import tasks, celery_app, cleanup
\ No newline at end of file
+from app.workers import tasks, celery_app, cleanup, leases, ordering, expiry, coalescing, history, purge, counters
\ No newline at end of file
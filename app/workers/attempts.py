@@ -0,0 +1,51 @@
+"""
+Delivery attempt fencing.
+
+Every claim of a delivery task stamps it with a fresh attempt ID in the same
+UPDATE that takes the lease. The ID is sent to the receiver in the
+X-Webhook-Attempt-Id header, and recording the result is fenced on it, so a
+worker whose lease was reaped can no longer overwrite the outcome of the
+attempt that replaced it.
+
+With task_acks_late, a worker restart redelivers messages it had already
+taken. Once a message has claimed a task, its message ID is remembered in
+Redis, so a redelivered copy is dropped by one EXISTS call instead of going
+through the row lock. A message that died before its claim is not
+remembered and is processed normally. A message that died after its claim is
+dropped; the lease reaper returns its task to the queue once the lease
+expires.
+"""
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.services.cache import redis_client, redis_timeout_handler
+
+logger = logging.getLogger(__name__)
+
+ATTEMPT_HEADER = "X-Webhook-Attempt-Id"
+MESSAGE_KEY = "attempt:msg:{}"  # message ID -> attempt ID it claimed
+
+
+def is_duplicate(message_id: Optional[str]) -> bool:
+    """Whether a message already claimed its task (fails open if Redis is down)"""
+    if not message_id:
+        return False
+    try:
+        with redis_timeout_handler():
+            return bool(redis_client.exists(MESSAGE_KEY.format(message_id)))
+    except Exception as e:
+        logger.warning(f"Attempt dedupe check failed, processing message {message_id}: {str(e)}")
+        return False
+
+
+def record_claim(message_id: Optional[str], attempt_id) -> None:
+    """Remember that a message claimed its task as the given attempt"""
+    if not message_id:
+        return
+    try:
+        with redis_timeout_handler():
+            redis_client.set(MESSAGE_KEY.format(message_id), str(attempt_id),
+                             ex=settings.ATTEMPT_DEDUPE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Failed to record claim of message {message_id}: {str(e)}")
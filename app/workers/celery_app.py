@@ -21,7 +21,15 @@ celery_app = Celery(
 # Configure Celery
 celery_app.conf.task_routes = {
     "app.workers.tasks.*": {"queue": "webhooks"},
+    "app.workers.ordering.*": {"queue": "webhooks"},
+    "app.workers.coalescing.kick_due_batches": {"queue": "maintenance"},
+    "app.workers.coalescing.*": {"queue": "webhooks"},
     "app.workers.cleanup.*": {"queue": "maintenance"},
+    "app.workers.leases.*": {"queue": "maintenance"},
+    "app.workers.expiry.*": {"queue": "maintenance"},
+    "app.workers.history.*": {"queue": "maintenance"},
+    "app.workers.purge.*": {"queue": "maintenance"},
+    "app.workers.counters.*": {"queue": "maintenance"},
 }
 
 celery_app.conf.beat_schedule = {
@@ -29,20 +37,46 @@ celery_app.conf.beat_schedule = {
         "task": "app.workers.cleanup.cleanup_old_logs",
         "schedule": 3600.0,  # Run every hour (3600 seconds)
     },
-    "cleanup-failed-tasks": {
-        "task": "app.workers.cleanup.cleanup_failed_tasks",
-        "schedule": 86400.0,  # Run once a day (86400 seconds)
+    "enforce-task-retention": {
+        "task": "app.workers.cleanup.enforce_task_retention",
+        "schedule": float(settings.RETENTION_INTERVAL_SECONDS),
+    },
+    "reap-expired-leases": {
+        "task": "app.workers.leases.reap_expired_leases",
+        "schedule": float(settings.LEASE_REAPER_INTERVAL_SECONDS),
+    },
+    "expire-stale-tasks": {
+        "task": "app.workers.expiry.expire_stale_tasks",
+        "schedule": float(settings.EXPIRY_SWEEP_INTERVAL_SECONDS),
+    },
+    "purge-deleted-subscriptions": {
+        "task": "app.workers.purge.purge_deleted_subscriptions",
+        "schedule": float(settings.SUBSCRIPTION_PURGE_INTERVAL_SECONDS),
+    },
+    "move-terminal-tasks": {
+        "task": "app.workers.history.move_terminal_tasks",
+        "schedule": float(settings.TASK_HISTORY_INTERVAL_SECONDS),
+    },
+    "kick-due-batches": {
+        "task": "app.workers.coalescing.kick_due_batches",
+        "schedule": float(settings.COALESCE_SWEEP_INTERVAL_SECONDS),
+    },
+    "flush-delivery-counters": {
+        "task": "app.workers.counters.flush_counters",
+        "schedule": float(settings.DELIVERY_COUNTER_FLUSH_INTERVAL_SECONDS),
     },
 }
 
 # Optional settings
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
+    task_serializer=settings.CELERY_TASK_SERIALIZER,
+    accept_content=["msgpack", "json"],  # Keep accepting json so in-flight messages drain after upgrades
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
     worker_prefetch_multiplier=1,
     task_acks_late=True,  # Tasks are acknowledged after execution, not when received
     task_reject_on_worker_lost=True,  # Ensure tasks aren't lost when worker is terminated
+    # Workers consuming several priority lanes always drain them in the order given
+    broker_transport_options={"queue_order_strategy": "priority"},
 )
\ No newline at end of file
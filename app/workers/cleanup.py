@@ -1,21 +1,14 @@
 import logging
 from celery import Task
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from datetime import timedelta
 
 from app.workers.celery_app import celery_app
 from app.db.base import SessionLocal
-from app.crud import crud_delivery
-from app.core.config import settings
-from app.db.models.delivery_task import DeliveryStatus
-from app.db.models.delivery_log import DeliveryLog
+from app.db import partitions
+from app.services import retention
 
 logger = logging.getLogger(__name__)
 
-# Log retention period in hours as per SRS
-LOG_RETENTION_HOURS = 72
-
 
 class MaintenanceTask(Task):
     """Base class for maintenance tasks with database session handling"""
@@ -36,20 +29,24 @@ class MaintenanceTask(Task):
 
 @celery_app.task(base=MaintenanceTask, bind=True)
 def cleanup_old_logs(self):
-    """Clean up delivery logs older than the retention period"""
+    """Clean up delivery logs older than the retention period
+    
+    Also creates upcoming delivery_logs partitions; expired partitions are
+    dropped rather than deleted row by row (see app.db.partitions). With
+    LOG_ARCHIVE_ENABLED expiring logs are archived first, and a failed
+    archive run leaves them in place until the next one.
+    """
     logger.info("Starting cleanup of old delivery logs")
     
     try:
         db = self.db
-        retention_threshold = datetime.utcnow() - timedelta(hours=LOG_RETENTION_HOURS)
-        
-        # Delete logs older than retention period
-        deleted_count = db.query(DeliveryLog).filter(
-            DeliveryLog.created_at < retention_threshold
-        ).delete()
-        
-        db.commit()
-        logger.info(f"Deleted {deleted_count} old delivery logs")
+        result = partitions.maintain(db)
+        deleted_count = result["dropped_rows"] + result["trimmed_rows"]
+        logger.info(
+            f"Archived {result['archived_rows']} logs, "
+            f"dropped {len(result['dropped'])} log partitions (~{result['dropped_rows']} rows), "
+            f"trimmed {result['trimmed_rows']} rows, created {len(result['created'])} partitions"
+        )
         
         return deleted_count
     
@@ -61,38 +58,19 @@ def cleanup_old_logs(self):
 
 
 @celery_app.task(base=MaintenanceTask, bind=True)
-def cleanup_failed_tasks(self):
-    """Clean up failed delivery tasks older than the retention period."""
-    logger.info("Starting failed tasks cleanup")
+def enforce_task_retention(self):
+    """Delete finished tasks from history once their status' retention period is over
     
-    try:
-        db = self.db
-        retention_days = settings.FAILED_TASK_RETENTION_DAYS
-        cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
-        
-        # Begin transaction
-        with db.begin():
-            # Find failed tasks older than retention period
-            query = db.query(crud_delivery.model).filter(
-                crud_delivery.model.status == DeliveryStatus.FAILED,
-                crud_delivery.model.updated_at < cutoff_date
-            )
-            
-            # Count for logging
-            count = query.count()
-            
-            if count > 0:
-                # Delete the tasks
-                query.delete(synchronize_session=False)
-                logger.info(f"Failed task cleanup completed: {count} tasks removed")
-            else:
-                logger.info("No failed tasks to clean up")
-        
-        return count
+    Completed, failed and expired tasks each have their own period; deletes
+    run in the retention engine's throttled chunks (see app.services.retention).
+    """
+    logger.info("Starting task retention")
     
-    except Exception as e:
-        logger.exception("Error performing failed tasks cleanup")
-        return 0
+    reports = retention.run_policies(self.db, retention.TASK_POLICIES)
+    deleted_count = sum(report["deleted"] for report in reports.values())
+    logger.info(f"Task retention completed: {deleted_count} tasks removed")
+    
+    return deleted_count
 
 
 # Schedule the cleanup task to run every hour
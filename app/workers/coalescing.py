@@ -0,0 +1,306 @@
+"""
+Coalesced batch delivery.
+
+Subscriptions with a batch_delivery config (see BatchDelivery in
+app.api.schemas.subscription) receive many events per POST. Their tasks are
+not delivered from their own messages: ingest - or any worker that picks one
+up - only kicks the subscription, at most once per linger window. When the
+kick runs, process_coalesced_batch claims up to max_size due tasks of the
+subscription with FOR UPDATE SKIP LOCKED, sends the ones that fit within
+max_bytes as a single JSON array or NDJSON body, and records an outcome per
+task from the one response. Concurrent kicks for the same subscription simply
+claim disjoint tasks. Backends that can't delay a message (Redis Streams)
+park the lingering kick in the delay queue. Every COALESCE_SWEEP_INTERVAL_SECONDS
+kick_due_batches kicks batching subscriptions that still have due tasks, so a
+kick lost along the way only delays them.
+
+A 2xx response means every event was accepted, except those whose IDs the
+receiver lists in an optional {"failed": [...]} response body; those - or the
+whole batch on any other response - are retried through the normal retry
+policy and come back through the kick path.
+"""
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+from celery import Task
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.db.models import Subscription
+from app.db.models.delivery_log import DeliveryStatus as LogStatus
+from app.services.cache import redis_client
+from app.workers.celery_app import celery_app
+from app.workers import lanes, leases
+from app.workers.cleanup import MaintenanceTask
+
+logger = logging.getLogger(__name__)
+
+JSON_ARRAY = "json_array"
+NDJSON = "ndjson"
+
+COALESCE_KICK_KEY = "coalesce:kick:{}"
+
+# Defaults for configs that leave a field out
+DEFAULT_MAX_SIZE = 100
+DEFAULT_LINGER_MS = 1000
+DEFAULT_MAX_BYTES = 1024 * 1024
+
+# Claims due tasks of one subscription; ordered tasks keep their own path
+_CLAIM_DUE_SQL = text("""
+    UPDATE delivery_tasks
+    SET status = 'IN_PROGRESS', attempt_count = attempt_count + 1,
+        attempt_id = gen_random_uuid(), lease_expires_at = :lease, updated_at = :now
+    WHERE id IN (
+        SELECT id FROM delivery_tasks
+        WHERE subscription_id = :subscription_id
+          AND status = 'PENDING'
+          AND (next_attempt_at IS NULL OR next_attempt_at <= :now)
+          AND (expires_at IS NULL OR expires_at > :now)
+          AND ordering_key IS NULL
+        ORDER BY created_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, attempt_id, payload, event_type, attempt_count, max_retries, created_at
+""")
+
+# Batching subscriptions with due tasks that their kicks would claim
+_DUE_BATCHING_SQL = text("""
+    SELECT s.id, s.batch_delivery, s.priority_lane
+    FROM subscriptions s
+    WHERE s.batch_delivery IS NOT NULL AND s.deleted_at IS NULL
+      AND EXISTS (
+          SELECT 1 FROM delivery_tasks t
+          WHERE t.subscription_id = s.id
+            AND t.status = 'PENDING'
+            AND (t.next_attempt_at IS NULL OR t.next_attempt_at <= :now)
+            AND t.ordering_key IS NULL
+      )
+""")
+
+# Hands back claimed tasks that didn't fit in the batch
+_UNCLAIM_SQL = text("""
+    UPDATE delivery_tasks
+    SET status = 'PENDING', attempt_count = attempt_count - 1, lease_expires_at = NULL
+    WHERE id = ANY(:ids) AND status = 'IN_PROGRESS'
+""")
+
+
+def batch_config(batch_delivery: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """A subscription's batch_delivery with defaults filled in, or None if it's off"""
+    if not batch_delivery:
+        return None
+    return {
+        "max_size": batch_delivery.get("max_size") or DEFAULT_MAX_SIZE,
+        "linger_ms": batch_delivery.get("linger_ms", DEFAULT_LINGER_MS),
+        "max_bytes": batch_delivery.get("max_bytes") or DEFAULT_MAX_BYTES,
+        "format": batch_delivery.get("format") or JSON_ARRAY,
+    }
+
+
+def kick(subscription_id, batch_delivery: Dict[str, Any], lane: Optional[str] = None,
+         immediate: bool = False) -> bool:
+    """
+    Ask a worker to deliver the subscription's due tasks once its linger time passes.
+
+    Only the first kick in a linger window is queued; later ones are covered
+    by it. immediate=True skips both the linger and the de-duplication.
+
+    Returns:
+        bool: Whether a kick was queued
+    """
+    from app.workers import queue
+
+    linger_ms = batch_config(batch_delivery)["linger_ms"]
+    if not immediate and linger_ms > 0:
+        if not redis_client.set(COALESCE_KICK_KEY.format(subscription_id), 1, nx=True, px=linger_ms):
+            return False
+
+    countdown = 0 if immediate else linger_ms / 1000.0
+    queue.get_backend().enqueue_coalesced(
+        str(subscription_id), countdown=countdown, lane=lanes.route(lane, subscription_id)
+    )
+    return True
+
+
+def encode_batch(items: List[Dict[str, Any]], fmt: str) -> bytes:
+    """Serialize batch items as a JSON array or as newline-delimited JSON"""
+    if fmt == NDJSON:
+        return b"".join(json.dumps(item, separators=(",", ":")).encode() + b"\n" for item in items)
+    return json.dumps(items, separators=(",", ":")).encode()
+
+
+def _batch_item(row) -> Dict[str, Any]:
+    return {"id": str(row.id), "event_type": row.event_type, "payload": row.payload}
+
+
+def fit_batch(rows: List[Any], max_bytes: int) -> int:
+    """Number of leading rows whose items fit within max_bytes (always at least one)"""
+    size = 2  # Array brackets; NDJSON uses the same budget for newlines
+    for count, row in enumerate(rows):
+        size += len(json.dumps(_batch_item(row), separators=(",", ":"))) + 1
+        if size > max_bytes and count > 0:
+            return count
+    return len(rows)
+
+
+def deliver_batch(target_url: str, body: bytes, fmt: str, count: int) -> Dict[str, Any]:
+    """POST a batch body; returns the shared result and the IDs the receiver rejected"""
+    content_type = "application/x-ndjson" if fmt == NDJSON else "application/json"
+    try:
+        with httpx.Client(timeout=settings.WEBHOOK_BATCH_DELIVERY_TIMEOUT_SECONDS) as client:
+            response = client.post(
+                target_url, content=body,
+                headers={"Content-Type": content_type, "X-Webhook-Batch-Size": str(count)}
+            )
+    except Exception as e:
+        return {"ok": False, "status_code": None, "error_details": str(e), "failed": set()}
+
+    ok = 200 <= response.status_code < 300
+    failed: Set[str] = set()
+    if ok:
+        try:
+            failed = {str(item) for item in (response.json() or {}).get("failed", [])}
+        except (ValueError, AttributeError):
+            pass  # Any 2xx without a parseable body accepts the whole batch
+    return {
+        "ok": ok,
+        "status_code": response.status_code,
+        "error_details": None if ok else f"HTTP {response.status_code}",
+        "failed": failed,
+    }
+
+
+def run_coalesced_batch(db: Session, subscription_id: uuid.UUID) -> int:
+    """
+    Claim, deliver and record one batch of a subscription's due tasks.
+
+    Returns:
+        int: Number of tasks sent
+    """
+    from app.workers.tasks import _process_delivery_result
+
+    subscription = db.query(Subscription).filter(
+        Subscription.id == subscription_id, Subscription.deleted_at.is_(None)
+    ).first()
+    db.commit()
+    config = batch_config(subscription.batch_delivery) if subscription else None
+    if config is None:
+        logger.info(f"Subscription {subscription_id} is gone or no longer batches deliveries")
+        return 0
+
+    now = datetime.utcnow()
+    rows = db.execute(_CLAIM_DUE_SQL, {
+        "subscription_id": subscription_id, "now": now,
+        "lease": leases.lease_deadline(now), "limit": config["max_size"]
+    }).all()
+    rows.sort(key=lambda row: row.created_at)
+
+    # Anything beyond the byte cap goes back for the next batch
+    fits = fit_batch(rows, config["max_bytes"])
+    rows, leftover = rows[:fits], rows[fits:]
+    if leftover:
+        db.execute(_UNCLAIM_SQL, {"ids": [row.id for row in leftover]})
+    db.commit()
+
+    if not rows:
+        return 0
+
+    body = encode_batch([_batch_item(row) for row in rows], config["format"])
+    with leases.keeper().hold([row.id for row in rows]):
+        result = deliver_batch(subscription.target_url, body, config["format"], len(rows))
+
+    lane = lanes.lane_for(None, subscription.priority_lane)
+    for row in rows:
+        rejected = str(row.id) in result["failed"]
+        success = result["ok"] and not rejected
+        delivery_info = {
+            'attempt_id': row.attempt_id,
+            'target_url': subscription.target_url,
+            'subscription_id': subscription.id,
+            'attempt_count': row.attempt_count,
+            'max_retries': row.max_retries,
+            'retry_policy': subscription.retry_policy,
+            'lane': lane,
+        }
+        delivery_result = {
+            'status': LogStatus.SUCCESS if success else LogStatus.FAILED_ATTEMPT,
+            'status_code': result["status_code"],
+            'error_details': "Rejected by receiver" if rejected else result["error_details"],
+        }
+        _process_delivery_result(db, row.id, delivery_info, delivery_result)
+
+    logger.info(f"Delivered batch of {len(rows)} events to subscription {subscription_id} "
+                f"({len(result['failed'])} rejected, status {result['status_code']})")
+
+    # A full batch (or one cut short by the byte cap) means more are probably waiting
+    if leftover or len(rows) + len(leftover) >= config["max_size"]:
+        kick(subscription.id, subscription.batch_delivery, lane, immediate=True)
+
+    return len(rows)
+
+
+class CoalescingTask(Task):
+    """Base class for coalesced batch deliveries with database session handling"""
+    _db = None
+
+    @property
+    def db(self) -> Session:
+        if self._db is None:
+            self._db = SessionLocal()
+        return self._db
+
+    def after_return(self, *args, **kwargs):
+        """Close the database connection after task execution"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+@celery_app.task(base=CoalescingTask, bind=True, max_retries=settings.WEBHOOK_MAX_RETRIES)
+def process_coalesced_batch(self, subscription_id: str):
+    """Deliver one batch of a subscription's due tasks (see the module docstring)"""
+    db = self.db
+    try:
+        return run_coalesced_batch(db, uuid.UUID(subscription_id))
+    except SQLAlchemyError as e:
+        logger.exception(f"Database error while delivering batch for subscription {subscription_id}")
+        if db.is_active:
+            db.rollback()
+        raise self.retry(exc=e, countdown=settings.WEBHOOK_RETRY_DELAYS[0])
+    except Exception:
+        logger.exception(f"Error delivering batch for subscription {subscription_id}")
+        if db.is_active:
+            db.rollback()
+        return 0
+
+
+@celery_app.task(base=MaintenanceTask, bind=True)
+def kick_due_batches(self):
+    """Kick every batching subscription with due tasks (see the module docstring)"""
+    db = self.db
+    try:
+        rows = db.execute(_DUE_BATCHING_SQL, {"now": datetime.utcnow()}).all()
+        db.commit()
+
+        kicked = 0
+        for row in rows:
+            if batch_config(row.batch_delivery) is None:
+                continue
+            if kick(row.id, row.batch_delivery, lanes.lane_for(None, row.priority_lane)):
+                kicked += 1
+        if kicked:
+            logger.info(f"Kicked {kicked} batching subscriptions with due tasks")
+        return kicked
+    except Exception:
+        logger.exception("Error kicking batching subscriptions")
+        if db.is_active:
+            db.rollback()
+        return 0
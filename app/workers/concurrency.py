@@ -0,0 +1,169 @@
+"""
+Adaptive worker concurrency.
+
+With ADAPTIVE_CONCURRENCY_ENABLED, worker.py starts Celery with --autoscale
+and AIMDAutoscaler in place of the stock demand-based autoscaler. Delivery
+processes report one sample per attempt - outbound latency, whether it timed
+out, and how long claiming the task took (a stand-in for DB pool wait) - into
+a per-worker Redis hash. Every ADAPTIVE_CONCURRENCY_INTERVAL_SECONDS the
+autoscaler drains that hash and adjusts the number of pool processes, i.e.
+the worker's in-flight limit, additive-increase/multiplicative-decrease:
+
+- timeouts above ADAPTIVE_CONCURRENCY_MAX_TIMEOUT_RATE, pool timeouts or a
+  claim time above ADAPTIVE_CONCURRENCY_DB_WAIT_TARGET_MS cut the limit by
+  ADAPTIVE_CONCURRENCY_DECREASE_FACTOR;
+- otherwise, with enough samples and latency within
+  ADAPTIVE_CONCURRENCY_LATENCY_TARGET_MS, the limit grows by
+  ADAPTIVE_CONCURRENCY_INCREASE;
+- anything else holds it.
+
+The limit stays within ADAPTIVE_CONCURRENCY_MIN/MAX and is exported per
+worker for GET /api/v1/status/concurrency.
+"""
+import logging
+import os
+import socket
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from celery.worker.autoscale import Autoscaler
+
+from app.core.config import settings
+from app.services.cache import redis_client, redis_timeout_handler
+
+logger = logging.getLogger(__name__)
+
+# worker.py names the worker node here so its pool processes report to it
+NODE_ENV = "WEBHOOK_WORKER_NODE"
+
+SAMPLES_KEY = "concurrency:samples:{}"  # node
+LIMIT_KEY = "concurrency:limit:{}"  # node
+
+
+def node_id() -> str:
+    """Name of the worker node this process belongs to"""
+    return os.environ.get(NODE_ENV) or socket.gethostname()
+
+
+def record_samples(samples: Iterable[Tuple[float, bool, float]], saturated: bool = False) -> None:
+    """
+    Record delivery samples for this worker's controller.
+
+    Args:
+        samples: (delivery seconds, timed out, claim seconds) per attempt
+        saturated: Whether claiming hit the DB pool timeout
+    """
+    if not settings.ADAPTIVE_CONCURRENCY_ENABLED:
+        return
+
+    samples = list(samples)
+    key = SAMPLES_KEY.format(node_id())
+    try:
+        with redis_timeout_handler():
+            pipe = redis_client.pipeline(transaction=False)
+            for elapsed, timed_out, db_wait in samples:
+                pipe.hincrby(key, "count", 1)
+                pipe.hincrby(key, "latency_ms", int(elapsed * 1000))
+                pipe.hincrby(key, "db_wait_ms", int(db_wait * 1000))
+                if timed_out:
+                    pipe.hincrby(key, "timeouts", 1)
+            if saturated:
+                pipe.hincrby(key, "saturated", 1)
+            pipe.expire(key, settings.ADAPTIVE_CONCURRENCY_INTERVAL_SECONDS * 6)
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record concurrency samples: {str(e)}")
+
+
+def drain_samples(node: str) -> Dict[str, int]:
+    """Read and reset a worker's samples"""
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hgetall(SAMPLES_KEY.format(node))
+    pipe.delete(SAMPLES_KEY.format(node))
+    counters = pipe.execute()[0]
+    return {
+        (field.decode() if isinstance(field, bytes) else field): int(value)
+        for field, value in counters.items()
+    }
+
+
+def publish_limit(node: str, limit: int) -> None:
+    redis_client.set(LIMIT_KEY.format(node), limit, ex=settings.ADAPTIVE_CONCURRENCY_INTERVAL_SECONDS * 6)
+
+
+def current_limits() -> Dict[str, int]:
+    """Current in-flight limit of every live worker"""
+    prefix = LIMIT_KEY.format("")
+    limits = {}
+    for key in redis_client.scan_iter(match=f"{prefix}*"):
+        key = key.decode() if isinstance(key, bytes) else key
+        value = redis_client.get(key)
+        if value is not None:
+            limits[key[len(prefix):]] = int(value)
+    return limits
+
+
+class AIMDController:
+    """Additive-increase/multiplicative-decrease in-flight limit"""
+
+    def __init__(self, min_limit: int, max_limit: int, initial: Optional[int] = None):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, initial or self.min_limit))
+
+    def update(self, samples: Dict[str, int]) -> int:
+        """Adjust the limit from one interval's samples and return it"""
+        count = samples.get("count", 0)
+        timeout_rate = samples.get("timeouts", 0) / count if count else 0.0
+        db_wait_ms = samples.get("db_wait_ms", 0) / count if count else 0.0
+        latency_ms = samples.get("latency_ms", 0) / count if count else 0.0
+
+        if (samples.get("saturated", 0)
+                or timeout_rate > settings.ADAPTIVE_CONCURRENCY_MAX_TIMEOUT_RATE
+                or db_wait_ms > settings.ADAPTIVE_CONCURRENCY_DB_WAIT_TARGET_MS):
+            self.limit = max(self.min_limit, int(self.limit * settings.ADAPTIVE_CONCURRENCY_DECREASE_FACTOR))
+        elif (count >= settings.ADAPTIVE_CONCURRENCY_MIN_SAMPLES
+                and latency_ms <= settings.ADAPTIVE_CONCURRENCY_LATENCY_TARGET_MS):
+            self.limit = min(self.max_limit, self.limit + settings.ADAPTIVE_CONCURRENCY_INCREASE)
+        return self.limit
+
+
+class AIMDAutoscaler(Autoscaler):
+    """Celery autoscaler sizing the pool with an AIMDController (see the module docstring)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.keepalive = settings.ADAPTIVE_CONCURRENCY_INTERVAL_SECONDS
+        self.controller = AIMDController(self.min_concurrency, self.max_concurrency)
+        self._last_update = 0.0
+
+    def _maybe_scale(self, req=None):
+        node = node_id()
+        now = time.monotonic()
+        # Only a full interval's samples say anything about the current limit
+        if now - self._last_update >= self.keepalive:
+            self._last_update = now
+            previous = self.controller.limit
+            try:
+                limit = self.controller.update(drain_samples(node))
+                publish_limit(node, limit)
+            except Exception:
+                logger.exception("Failed to update adaptive concurrency, keeping the current limit")
+                limit = previous
+            if limit != previous:
+                logger.info(f"Adaptive concurrency limit {previous} -> {limit}")
+
+        limit = self.controller.limit
+        procs = self.processes
+        if limit > procs:
+            self.scale_up(limit - procs)
+            return True
+        if limit < procs:
+            self.scale_down(procs - limit)
+            return True
+        return False
+
+    def info(self):
+        info = super().info()
+        info["limit"] = self.controller.limit
+        return info
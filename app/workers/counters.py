@@ -0,0 +1,173 @@
+"""
+Per-subscription delivery counters.
+
+The delivery result path counts attempts, successes, failures and expiries
+with HINCRBY on one Redis hash, keyed by subscription and hour:
+
+    delivery_counters:pending  {<subscription id>|<YYYYMMDDHH>|<counter>: n}
+
+Every DELIVERY_COUNTER_FLUSH_INTERVAL_SECONDS, flush_counters renames the hash
+out of the way - new increments start a fresh one - and adds its totals to
+delivery_counters with a single upsert, one row per subscription and hour.
+The renamed hash is only deleted once the upsert commits, so a failed flush
+is retried by the next run. The renamed hash carries a flush ID, recorded in
+delivery_counter_flushes in the upsert's transaction, so a flush whose
+commit went through but whose hash survived (the delete failed, or the
+worker died) is not added a second time. Stats read a subscription's buckets
+by primary key and lag the result path by at most one flush interval.
+"""
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import redis
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.cache import redis_client, redis_timeout_handler, acquire_lock, release_lock
+from app.workers.celery_app import celery_app
+from app.workers.cleanup import MaintenanceTask
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "delivery_counters:pending"
+FLUSHING_KEY = "delivery_counters:flushing"
+FLUSH_LOCK_KEY = "delivery_counters:flush_lock"
+BUCKET_FORMAT = "%Y%m%d%H"
+FLUSH_ID_FIELD = "flush_id"  # Field of the renamed hash holding its flush ID
+# Applied flush IDs are kept this long; a hash left behind longer is added again
+FLUSH_ID_RETENTION = timedelta(days=1)
+
+COUNTERS = ["attempts", "succeeded", "failed", "expired"]
+
+_MARK_APPLIED_SQL = text("""
+    INSERT INTO delivery_counter_flushes (flush_id, applied_at) VALUES (CAST(:flush_id AS uuid), :now)
+    ON CONFLICT (flush_id) DO NOTHING
+""")
+
+_PRUNE_APPLIED_SQL = text("DELETE FROM delivery_counter_flushes WHERE applied_at < :cutoff")
+
+# Counts of subscriptions purged since they were recorded are dropped
+_UPSERT_SQL = text("""
+    INSERT INTO delivery_counters (subscription_id, bucket, attempts, succeeded, failed, expired)
+    SELECT v.subscription_id, v.bucket, v.attempts, v.succeeded, v.failed, v.expired
+    FROM unnest(
+        CAST(:subscription_ids AS uuid[]), CAST(:buckets AS timestamp[]),
+        CAST(:attempts AS bigint[]), CAST(:succeeded AS bigint[]),
+        CAST(:failed AS bigint[]), CAST(:expired AS bigint[])
+    ) AS v(subscription_id, bucket, attempts, succeeded, failed, expired)
+    WHERE EXISTS (SELECT 1 FROM subscriptions s WHERE s.id = v.subscription_id)
+    ON CONFLICT (subscription_id, bucket) DO UPDATE SET
+        attempts = delivery_counters.attempts + EXCLUDED.attempts,
+        succeeded = delivery_counters.succeeded + EXCLUDED.succeeded,
+        failed = delivery_counters.failed + EXCLUDED.failed,
+        expired = delivery_counters.expired + EXCLUDED.expired
+""")
+
+
+def bucket_of(moment: datetime) -> datetime:
+    """Start of the hour bucket a moment falls in"""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _field(subscription_id, counter: str, at: datetime) -> str:
+    return f"{subscription_id}|{at.strftime(BUCKET_FORMAT)}|{counter}"
+
+
+def add(pipe, subscription_id, counter: str, amount: int = 1, at: Optional[datetime] = None) -> None:
+    """Queue an increment on a pipeline, for callers batching other Redis writes"""
+    pipe.hincrby(PENDING_KEY, _field(subscription_id, counter, at or datetime.utcnow()), amount)
+
+
+def record(subscription_id, **counts: int) -> None:
+    """Count delivery outcomes of a subscription in the current hour, e.g. record(id, attempts=1)"""
+    try:
+        with redis_timeout_handler():
+            pipe = redis_client.pipeline(transaction=False)
+            now = datetime.utcnow()
+            for counter, amount in counts.items():
+                add(pipe, subscription_id, counter, amount, now)
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record delivery counters of subscription {subscription_id}: {str(e)}")
+
+
+def aggregate(fields: Dict[str, str]) -> Dict[Tuple[str, datetime], Dict[str, int]]:
+    """Pending hash fields summed into rows keyed by (subscription ID, bucket)"""
+    rows: Dict[Tuple[str, datetime], Dict[str, int]] = {}
+    for field, value in fields.items():
+        try:
+            subscription_id, bucket, counter = field.split("|")
+            key = (subscription_id, datetime.strptime(bucket, BUCKET_FORMAT))
+        except ValueError:
+            logger.warning(f"Skipping malformed delivery counter field: {field}")
+            continue
+        if counter not in COUNTERS:
+            continue
+        row = rows.setdefault(key, dict.fromkeys(COUNTERS, 0))
+        row[counter] += int(value)
+    return rows
+
+
+def flush(db: Session) -> int:
+    """
+    Add the pending Redis counts to delivery_counters.
+
+    Returns:
+        int: Number of (subscription, hour) rows written
+    """
+    token = acquire_lock(FLUSH_LOCK_KEY, settings.DELIVERY_COUNTER_FLUSH_INTERVAL_SECONDS * 10, client=redis_client)
+    if token is None:
+        return 0
+    try:
+        # A hash left by a failed flush goes first; nothing new joins it
+        if not redis_client.exists(FLUSHING_KEY):
+            try:
+                redis_client.rename(PENDING_KEY, FLUSHING_KEY)
+            except redis.exceptions.ResponseError:
+                return 0  # Nothing recorded since the last flush
+        # Kept by a retried hash, so its retries share one ID
+        redis_client.hsetnx(FLUSHING_KEY, FLUSH_ID_FIELD, str(uuid.uuid4()))
+
+        fields = redis_client.hgetall(FLUSHING_KEY)
+        flush_id = fields.pop(FLUSH_ID_FIELD)
+        rows = aggregate(fields)
+        if rows:
+            now = datetime.utcnow()
+            db.execute(_PRUNE_APPLIED_SQL, {"cutoff": now - FLUSH_ID_RETENTION})
+            if db.execute(_MARK_APPLIED_SQL, {"flush_id": flush_id, "now": now}).rowcount:
+                keys = list(rows)
+                params = {
+                    "subscription_ids": [subscription_id for subscription_id, _ in keys],
+                    "buckets": [bucket for _, bucket in keys],
+                }
+                for counter in COUNTERS:
+                    params[counter] = [rows[key][counter] for key in keys]
+                db.execute(_UPSERT_SQL, params)
+            else:
+                logger.warning(f"Delivery counter flush {flush_id} was already applied, dropping its hash")
+                rows = {}
+            db.commit()
+
+        redis_client.delete(FLUSHING_KEY)
+        return len(rows)
+    finally:
+        release_lock(FLUSH_LOCK_KEY, token, client=redis_client)
+
+
+@celery_app.task(base=MaintenanceTask, bind=True)
+def flush_counters(self):
+    """Flush pending delivery counters to the database (see the module docstring)"""
+    db = self.db
+    try:
+        flushed = flush(db)
+        if flushed:
+            logger.info(f"Flushed delivery counters of {flushed} subscription-hours")
+        return flushed
+    except Exception:
+        logger.exception("Error flushing delivery counters")
+        if db.is_active:
+            db.rollback()
+        return 0
@@ -0,0 +1,151 @@
+"""
+Event time-to-live.
+
+Tasks ingested with an X-Event-TTL header, or for a subscription with
+event_ttl_seconds, carry an expires_at. Workers never claim a task past it:
+the claim paths in app.workers.tasks mark such tasks EXPIRED instead of
+delivering them, and the periodic expire_stale_tasks sweep expires pending
+tasks in bounded batches so a backlog built up during an outage is dropped
+without a single outbound call. A task still leased by a live worker is
+never expired underneath it; that worker's result decides its outcome.
+Expired tasks are counted per subscription.
+"""
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, or_, update, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.delivery_task import DeliveryTask, DeliveryStatus as TaskStatus
+from app.services.cache import redis_client, redis_timeout_handler
+from app.workers.celery_app import celery_app
+from app.workers import counters
+from app.workers.cleanup import MaintenanceTask
+
+logger = logging.getLogger(__name__)
+
+EXPIRED_COUNTS_KEY = "delivery_expired_counts"  # subscription ID -> expired tasks
+TOTAL_FIELD = "total"
+
+
+def expires_at_for(ttl_seconds: Optional[int], start: datetime) -> Optional[datetime]:
+    """Expiry time of an event with the given TTL, or None without one"""
+    if not ttl_seconds:
+        return None
+    return start + timedelta(seconds=ttl_seconds)
+
+
+def record_expired(subscription_ids: Iterable) -> None:
+    """Count expired tasks per subscription and in total, and in the delivery counters"""
+    counts: Dict[str, int] = {}
+    for subscription_id in subscription_ids:
+        counts[str(subscription_id)] = counts.get(str(subscription_id), 0) + 1
+    if not counts:
+        return
+
+    try:
+        with redis_timeout_handler():
+            pipe = redis_client.pipeline(transaction=False)
+            for subscription_id, count in counts.items():
+                pipe.hincrby(EXPIRED_COUNTS_KEY, subscription_id, count)
+                counters.add(pipe, subscription_id, "expired", count)
+            pipe.hincrby(EXPIRED_COUNTS_KEY, TOTAL_FIELD, sum(counts.values()))
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record expired task counts: {str(e)}")
+
+
+def expired_count(subscription_id: Optional[str] = None) -> int:
+    """Expired tasks of one subscription, or of all of them"""
+    value = redis_client.hget(EXPIRED_COUNTS_KEY, str(subscription_id) if subscription_id else TOTAL_FIELD)
+    return int(value or 0)
+
+
+def expire_tasks(db: Session, task_uuids: List[uuid.UUID]) -> int:
+    """
+    Mark the given tasks EXPIRED if they are unfinished and past their TTL.
+
+    Returns:
+        int: Number of tasks expired
+    """
+    if not task_uuids:
+        return 0
+
+    with db.begin():
+        return expire_in_transaction(db, task_uuids, datetime.utcnow())
+
+
+def expire_in_transaction(db: Session, task_uuids: List[uuid.UUID], now: datetime) -> int:
+    """expire_tasks for callers that already opened a transaction"""
+    rows = db.execute(
+        update(DeliveryTask)
+        .where(
+            DeliveryTask.id.in_(task_uuids),
+            # Only claimable tasks: a live lease means a worker is still delivering it
+            or_(
+                DeliveryTask.status == TaskStatus.PENDING,
+                and_(
+                    DeliveryTask.status == TaskStatus.IN_PROGRESS,
+                    or_(DeliveryTask.lease_expires_at.is_(None), DeliveryTask.lease_expires_at <= now)
+                )
+            ),
+            DeliveryTask.expires_at <= now
+        )
+        .values(status=TaskStatus.EXPIRED, next_attempt_at=None, lease_expires_at=None, updated_at=now)
+        .returning(DeliveryTask.subscription_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    record_expired(row.subscription_id for row in rows)
+    if rows:
+        logger.info(f"Expired {len(rows)} delivery tasks past their TTL")
+    return len(rows)
+
+
+# Uses the partial index ix_delivery_tasks_expires_at
+# (expires_at WHERE status = 'PENDING' AND expires_at IS NOT NULL)
+_EXPIRE_STALE_SQL = text("""
+    UPDATE delivery_tasks
+    SET status = 'EXPIRED', next_attempt_at = NULL, updated_at = now()
+    WHERE id IN (
+        SELECT id FROM delivery_tasks
+        WHERE status = 'PENDING' AND expires_at IS NOT NULL AND expires_at <= :now
+        ORDER BY expires_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING subscription_id
+""")
+
+
+@celery_app.task(base=MaintenanceTask, bind=True)
+def expire_stale_tasks(self):
+    """Expire pending tasks past their TTL in bounded batches"""
+    db = self.db
+    batch_size = settings.EXPIRY_SWEEP_BATCH_SIZE
+    expired = 0
+
+    try:
+        while True:
+            subscription_ids = [row.subscription_id for row in db.execute(
+                _EXPIRE_STALE_SQL, {"now": datetime.utcnow(), "limit": batch_size}
+            )]
+            db.commit()
+
+            record_expired(subscription_ids)
+            expired += len(subscription_ids)
+
+            if len(subscription_ids) < batch_size:
+                break
+
+        if expired:
+            logger.info(f"Expired {expired} pending delivery tasks past their TTL")
+        return expired
+
+    except Exception:
+        logger.exception("Error expiring stale delivery tasks")
+        db.rollback()
+        return expired
@@ -0,0 +1,75 @@
+"""
+Fair dispatcher.
+
+Moves deliveries from the per-subscription sub-queues (app.services.fair_queue)
+to the configured queue backend in deficit round-robin order. The worker
+queue is only topped up to FAIR_DISPATCH_TARGET_DEPTH, so the backlog - and
+the choice of whose delivery runs next - stays in the fair queue instead of
+piling up FIFO in front of the workers.
+"""
+import logging
+import threading
+from typing import Optional
+
+from app.core.config import settings
+from app.services import fair_queue
+from app.workers import queue, lanes
+
+logger = logging.getLogger(__name__)
+
+
+def dispatch_once() -> int:
+    """
+    Dispatch one round of deliveries to the queue backend.
+
+    Returns:
+        int: Number of deliveries dispatched
+    """
+    backend = queue.get_backend()
+    target = settings.FAIR_DISPATCH_TARGET_DEPTH
+
+    depth = backend.depth()
+    room = target - depth if depth is not None else target
+    if room <= 0:
+        return 0
+
+    # Each visit takes its full weight * FAIR_QUANTUM share until the room is used up
+    served = fair_queue.dispatch(settings.FAIR_DISPATCH_ROUNDS, limit=room)
+    if not served:
+        return 0
+
+    # Sub-queue members carry their priority lane (see lanes.tag)
+    members = [member for _, items, _ in served for member in items]
+    try:
+        for lane, task_ids in lanes.group_by_lane(members).items():
+            backend.enqueue_many(task_ids, lane=lane)
+    except Exception:
+        # Put them back so the next pass retries instead of losing them; a
+        # delivery may be queued twice, which workers already tolerate
+        logger.exception(f"Failed to enqueue {len(members)} fair-queued deliveries, requeueing")
+        for subscription_id, items, weight in served:
+            fair_queue.push(subscription_id, items, weight=weight)
+        raise
+
+    logger.debug(f"Dispatched {len(members)} deliveries from {len(served)} subscriptions")
+    return len(members)
+
+
+def run_dispatcher(stop_event: Optional[threading.Event] = None) -> None:
+    """Dispatch deliveries until stop_event is set"""
+    stop_event = stop_event or threading.Event()
+    poll_interval = settings.FAIR_DISPATCH_POLL_INTERVAL_MS / 1000.0
+    logger.info("Fair dispatcher started")
+
+    while not stop_event.is_set():
+        try:
+            dispatched = dispatch_once()
+        except Exception:
+            logger.exception("Fair dispatcher pass failed")
+            dispatched = 0
+
+        # Keep going without sleeping while there is work and room for it
+        if not dispatched:
+            stop_event.wait(poll_interval)
+
+    logger.info("Fair dispatcher stopped")
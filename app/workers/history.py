@@ -0,0 +1,71 @@
+"""
+Hot/cold split of delivery tasks.
+
+delivery_tasks should only hold work in flight. move_terminal_tasks relocates
+COMPLETED, FAILED and EXPIRED tasks whose last update is older than
+TASK_HISTORY_MOVE_AFTER_HOURS to delivery_task_history, one batch per
+statement: a DELETE ... RETURNING feeding an INSERT ... SELECT, so a task is
+never in both tables or in neither. Batches use SKIP LOCKED and stop after
+TASK_HISTORY_MAX_BATCHES, so a large backlog is worked off over several runs
+without long-held locks. Reads by task ID fall back to the history table
+(see crud_delivery.get_task).
+"""
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.models.delivery_task import DeliveryTask
+from app.workers.celery_app import celery_app
+from app.workers.cleanup import MaintenanceTask
+
+logger = logging.getLogger(__name__)
+
+# Every DeliveryTask column by name, so the tables don't need the same column order
+_COLUMNS = ", ".join(column.name for column in DeliveryTask.__table__.columns)
+
+# Uses the partial index ix_delivery_tasks_terminal_updated_at
+MOVE_BATCH_SQL = text(f"""
+    WITH moved AS (
+        DELETE FROM delivery_tasks
+        WHERE id IN (
+            SELECT id FROM delivery_tasks
+            WHERE status IN ('COMPLETED', 'FAILED', 'EXPIRED') AND updated_at < :cutoff
+            ORDER BY updated_at
+            LIMIT :limit
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING {_COLUMNS}
+    )
+    INSERT INTO delivery_task_history ({_COLUMNS}, moved_at)
+    SELECT {_COLUMNS}, :now FROM moved
+    ON CONFLICT (id) DO NOTHING
+""")
+
+
+@celery_app.task(base=MaintenanceTask, bind=True)
+def move_terminal_tasks(self):
+    """Move old terminal tasks to delivery_task_history in bounded batches"""
+    db = self.db
+    batch_size = settings.TASK_HISTORY_BATCH_SIZE
+    now = datetime.utcnow()
+    cutoff = now - timedelta(hours=settings.TASK_HISTORY_MOVE_AFTER_HOURS)
+    moved = 0
+
+    try:
+        for _ in range(settings.TASK_HISTORY_MAX_BATCHES):
+            count = db.execute(MOVE_BATCH_SQL, {"cutoff": cutoff, "limit": batch_size, "now": now}).rowcount
+            db.commit()
+            moved += count
+            if count < batch_size:
+                break
+
+        if moved:
+            logger.info(f"Moved {moved} terminal delivery tasks to history")
+        return moved
+
+    except Exception:
+        logger.exception("Error moving terminal delivery tasks to history")
+        db.rollback()
+        return moved
@@ -0,0 +1,188 @@
+"""
+Priority lanes.
+
+Deliveries are routed to one of PRIORITY_LANES by their subscription's
+priority_lane or, failing that, by the first PRIORITY_LANE_EVENT_TYPES pattern
+matching their event type. Each lane is its own Celery queue, so lanes can be
+given dedicated worker capacity (see worker.py --lane). A lane's workers also
+consume the lanes below it, in priority order, so idle high-lane capacity
+steals lower-lane work while lower lanes never take high-lane work.
+
+With sharded routing (see app.workers.sharding) the default lane is further
+split into one queue per shard; route() picks a delivery's shard queue.
+
+Queue wait - the time from a delivery becoming due to a worker claiming it -
+is recorded per lane in one-minute Redis histograms so each lane can be sized.
+"""
+import fnmatch
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+
+from app.core.config import settings
+from app.services.cache import redis_client, redis_timeout_handler
+from app.workers import sharding
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANE = "default"
+# The default lane keeps the original queue name so existing workers drain it
+DEFAULT_QUEUE = "webhooks"
+# Separates a task ID from its lane in Redis-held queues (delay queue, fair queue)
+LANE_SEPARATOR = "@"
+
+LATENCY_KEY = "lane_latency:{}:{}"  # lane, minute
+# Histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000]
+
+
+def lane_for(event_type: Optional[str], subscription_lane: Optional[str] = None) -> str:
+    """Pick the lane for a delivery"""
+    if subscription_lane in settings.PRIORITY_LANES:
+        return subscription_lane
+    if event_type:
+        for pattern, lane in settings.PRIORITY_LANE_EVENT_TYPES.items():
+            if fnmatch.fnmatchcase(event_type, pattern):
+                return lane
+    return DEFAULT_LANE
+
+
+def route(lane: Optional[str], subscription_id=None) -> Optional[str]:
+    """Where to queue a delivery: its lane, or its subscription's shard when sharding the default lane"""
+    if not settings.SHARDED_ROUTING_ENABLED or subscription_id is None:
+        return lane
+    if lane and lane != DEFAULT_LANE:
+        # Priority lanes and already-routed shards stay as they are
+        return lane
+    return sharding.shard_route(sharding.shard_for(subscription_id))
+
+
+def queue_for(lane: Optional[str]) -> str:
+    """Celery queue of a lane or shard"""
+    if sharding.is_shard_route(lane):
+        return f"{DEFAULT_QUEUE}.{lane}"
+    if not lane or lane == DEFAULT_LANE or lane not in settings.PRIORITY_LANES:
+        return DEFAULT_QUEUE
+    return f"{DEFAULT_QUEUE}.{lane}"
+
+
+def worker_queues(lane: str) -> List[str]:
+    """Queues a lane's workers consume: their own, then every lower lane's"""
+    lanes = settings.PRIORITY_LANES
+    if lane not in lanes:
+        raise ValueError(f"Unknown lane '{lane}', expected one of: {', '.join(lanes)}")
+    return [queue_for(name) for name in lanes[lanes.index(lane):]]
+
+
+def shard_queues(shards: Optional[Iterable[int]] = None) -> List[str]:
+    """Queues of the given shards, or of all of them"""
+    if shards is None:
+        shards = range(settings.SHARD_COUNT)
+    return [queue_for(sharding.shard_route(shard)) for shard in shards]
+
+
+def all_queues() -> List[str]:
+    """Every delivery queue: each lane's, plus the shard queues when sharding"""
+    queues = [queue_for(name) for name in settings.PRIORITY_LANES]
+    if settings.SHARDED_ROUTING_ENABLED:
+        queues += shard_queues()
+    return queues
+
+
+def tag(task_id: str, lane: Optional[str]) -> str:
+    """Attach a lane to a task ID for storage in a Redis-held queue"""
+    if not lane or lane == DEFAULT_LANE:
+        return task_id
+    return f"{task_id}{LANE_SEPARATOR}{lane}"
+
+
+def untag(member: str) -> Tuple[str, str]:
+    """Split a (possibly) tagged task ID into (task ID, lane)"""
+    task_id, _, lane = member.partition(LANE_SEPARATOR)
+    return task_id, lane or DEFAULT_LANE
+
+
+def group_by_lane(members: Iterable[str]) -> Dict[str, List[str]]:
+    """Untag members and group their task IDs by lane"""
+    grouped: Dict[str, List[str]] = {}
+    for member in members:
+        task_id, lane = untag(member)
+        grouped.setdefault(lane, []).append(task_id)
+    return grouped
+
+
+def record_latencies(samples: Iterable[Tuple[str, float]]) -> None:
+    """
+    Record queue wait samples.
+
+    Args:
+        samples: (lane, seconds waited) pairs
+    """
+    samples = list(samples)
+    if not samples:
+        return
+
+    minute = int(time.time() // 60)
+    ttl = (settings.LANE_LATENCY_RETENTION_MINUTES + 1) * 60
+    try:
+        with redis_timeout_handler():
+            pipe = redis_client.pipeline(transaction=False)
+            for lane, seconds in samples:
+                key = LATENCY_KEY.format(lane, minute)
+                wait_ms = max(0, int(seconds * 1000))
+                pipe.hincrby(key, "count", 1)
+                pipe.hincrby(key, "sum_ms", wait_ms)
+                pipe.hincrby(key, _bucket(wait_ms), 1)
+                pipe.expire(key, ttl)
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record lane latency: {str(e)}")
+
+
+def latency_stats(minutes: int = 5) -> Dict[str, Dict[str, Any]]:
+    """Per-lane queue wait over the last `minutes` minutes (percentiles are bucket upper bounds)"""
+    now_minute = int(time.time() // 60)
+    lanes = settings.PRIORITY_LANES
+
+    pipe = redis_client.pipeline(transaction=False)
+    for lane in lanes:
+        for minute in range(now_minute - minutes + 1, now_minute + 1):
+            pipe.hgetall(LATENCY_KEY.format(lane, minute))
+    results = pipe.execute()
+
+    stats = {}
+    for i, lane in enumerate(lanes):
+        totals: Dict[str, int] = {}
+        for counters in results[i * minutes:(i + 1) * minutes]:
+            for field, value in counters.items():
+                field = field.decode() if isinstance(field, bytes) else field
+                totals[field] = totals.get(field, 0) + int(value)
+
+        count = totals.get("count", 0)
+        stats[lane] = {
+            "queue": queue_for(lane),
+            "count": count,
+            "avg_ms": round(totals.get("sum_ms", 0) / count, 1) if count else None,
+            "p50_ms": _percentile(totals, count, 0.50),
+            "p95_ms": _percentile(totals, count, 0.95),
+            "p99_ms": _percentile(totals, count, 0.99),
+        }
+    return stats
+
+
+def _bucket(wait_ms: int) -> str:
+    for bound in LATENCY_BUCKETS_MS:
+        if wait_ms <= bound:
+            return f"le_{bound}"
+    return "le_inf"
+
+
+def _percentile(totals: Dict[str, int], count: int, quantile: float) -> Optional[float]:
+    if not count:
+        return None
+    seen = 0
+    for bound in LATENCY_BUCKETS_MS:
+        seen += totals.get(f"le_{bound}", 0)
+        if seen >= count * quantile:
+            return float(bound)
+    return None  # Beyond the largest bucket
@@ -0,0 +1,171 @@
+"""
+Delivery task leases.
+
+Claiming a task sets lease_expires_at; while a delivery is in flight the
+LeaseKeeper extends the leases of every task the process holds in one bulk
+UPDATE. If a worker dies its leases simply run out, and the periodic
+reap_expired_leases task returns those tasks to PENDING in bounded batches
+and queues them again.
+"""
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from celery import Task
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.base import SessionLocal, get_db_context
+from app.db.models.delivery_task import DeliveryTask, DeliveryStatus as TaskStatus
+from app.workers.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+
+def lease_deadline(now: Optional[datetime] = None) -> datetime:
+    """Expiry time for a lease taken or extended now"""
+    return (now or datetime.utcnow()) + timedelta(seconds=settings.WEBHOOK_LEASE_SECONDS)
+
+
+class LeaseKeeper:
+    """Background thread that extends the leases of in-flight deliveries in bulk"""
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or settings.WEBHOOK_LEASE_HEARTBEAT_SECONDS
+        self._lock = threading.Lock()
+        # task ID -> when its lease currently expires (as far as we know)
+        self._held: Dict[uuid.UUID, float] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def hold(self, task_ids: Iterable[uuid.UUID]):
+        """Keep the leases of task_ids alive for the duration of the block"""
+        task_ids = list(task_ids)
+        expires = time.time() + settings.WEBHOOK_LEASE_SECONDS
+        with self._lock:
+            for task_id in task_ids:
+                self._held[task_id] = expires
+            self._ensure_thread()
+        try:
+            yield
+        finally:
+            with self._lock:
+                for task_id in task_ids:
+                    self._held.pop(task_id, None)
+
+    def _ensure_thread(self) -> None:
+        # Started lazily so every forked worker process gets its own thread
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="lease-keeper", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.extend_expiring()
+            except Exception:
+                logger.exception("Failed to extend delivery task leases")
+
+    def extend_expiring(self) -> int:
+        """Extend every held lease that would expire before the next heartbeat or two"""
+        horizon = time.time() + self.interval * 2
+        with self._lock:
+            expiring = [task_id for task_id, expires in self._held.items() if expires <= horizon]
+        if not expiring:
+            return 0
+
+        new_deadline = lease_deadline()
+        with get_db_context() as db:
+            db.query(DeliveryTask).filter(
+                DeliveryTask.id.in_(expiring),
+                DeliveryTask.status == TaskStatus.IN_PROGRESS
+            ).update({DeliveryTask.lease_expires_at: new_deadline}, synchronize_session=False)
+            db.commit()
+
+        expires = time.time() + settings.WEBHOOK_LEASE_SECONDS
+        with self._lock:
+            for task_id in expiring:
+                if task_id in self._held:
+                    self._held[task_id] = expires
+
+        logger.debug(f"Extended {len(expiring)} delivery task leases")
+        return len(expiring)
+
+
+_keeper = LeaseKeeper()
+
+
+def keeper() -> LeaseKeeper:
+    """Get the process-wide lease keeper"""
+    return _keeper
+
+
+class ReaperTask(Task):
+    """Base class for the lease reaper with database session handling"""
+    _db = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = SessionLocal()
+        return self._db
+
+    def after_return(self, *args, **kwargs):
+        """Close the database connection after task execution"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+# Uses the partial index ix_delivery_tasks_lease_expires_at
+# (lease_expires_at WHERE status = 'IN_PROGRESS')
+_REAP_EXPIRED_SQL = text("""
+    UPDATE delivery_tasks
+    SET status = 'PENDING', lease_expires_at = NULL, updated_at = now()
+    WHERE id IN (
+        SELECT id FROM delivery_tasks
+        WHERE status = 'IN_PROGRESS' AND lease_expires_at < :now
+        ORDER BY lease_expires_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id
+""")
+
+
+@celery_app.task(base=ReaperTask, bind=True)
+def reap_expired_leases(self):
+    """Return tasks whose lease expired to PENDING and queue them again"""
+    from app.workers import queue
+
+    db = self.db
+    batch_size = settings.LEASE_REAPER_BATCH_SIZE
+    reaped = 0
+
+    try:
+        while True:
+            task_ids = [str(row.id) for row in db.execute(
+                _REAP_EXPIRED_SQL, {"now": datetime.utcnow(), "limit": batch_size}
+            )]
+            db.commit()
+
+            if task_ids:
+                queue.get_backend().enqueue_many(task_ids)
+                reaped += len(task_ids)
+
+            if len(task_ids) < batch_size:
+                break
+
+        if reaped:
+            logger.warning(f"Returned {reaped} tasks with expired leases to PENDING")
+        return reaped
+
+    except Exception:
+        logger.exception("Error reaping expired delivery task leases")
+        db.rollback()
+        return reaped
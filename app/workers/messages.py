@@ -0,0 +1,81 @@
+"""
+Compact message envelopes for webhook delivery tasks.
+
+Ingest already holds the raw payload and the subscription it accepted the
+webhook for, so it can embed both in the task message. The worker only trusts
+the embedded copy while the subscription's version stamp still matches the
+database; otherwise it falls back to reading the task and subscription rows.
+"""
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from app.core.config import settings
+
+# Bump when the envelope layout changes so old messages fall back to the DB
+ENVELOPE_FORMAT = 1
+
+# Envelopes carry raw bytes, which only binary serializers can transport
+BINARY_SERIALIZERS = ("msgpack",)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def envelopes_enabled() -> bool:
+    """Check whether ingest should embed envelopes in task messages"""
+    return (
+        settings.WEBHOOK_MESSAGE_ENVELOPES
+        and settings.CELERY_TASK_SERIALIZER in BINARY_SERIALIZERS
+    )
+
+
+def subscription_version_stamp(updated_at: Optional[datetime]) -> Optional[int]:
+    """Turn a subscription's updated_at into an integer version stamp (microseconds)"""
+    if updated_at is None:
+        return None
+    delta = updated_at - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def build_delivery_envelope(subscription, payload: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Build the envelope embedded in a delivery task message.
+
+    Args:
+        subscription: Subscription the webhook was accepted for
+        payload: Raw request body as received by ingest
+
+    Returns:
+        Optional[Dict]: Envelope, or None if the subscription has no version stamp
+    """
+    stamp = subscription_version_stamp(subscription.updated_at)
+    if stamp is None:
+        return None
+
+    # Single-letter keys keep the message small on the broker
+    return {
+        "f": ENVELOPE_FORMAT,
+        "u": str(subscription.target_url),
+        "p": bytes(payload),
+        "s": stamp,
+    }
+
+
+def unpack_delivery_envelope(envelope: Any) -> Optional[Dict[str, Any]]:
+    """
+    Unpack an envelope received by the worker.
+
+    Returns:
+        Optional[Dict]: target_url, payload and stamp, or None if the envelope
+        is missing or in a format this worker does not understand
+    """
+    if not isinstance(envelope, dict) or envelope.get("f") != ENVELOPE_FORMAT:
+        return None
+
+    try:
+        return {
+            "target_url": envelope["u"],
+            "payload": envelope["p"],
+            "stamp": envelope["s"],
+        }
+    except KeyError:
+        return None
@@ -0,0 +1,163 @@
+"""
+Ordered (FIFO) delivery.
+
+Tasks of subscriptions with ordered=True get an ordering key (the
+subscription, optionally narrowed by the X-Ordering-Key ingest header) and a
+sequence number from the key's ordering_sequences row, assigned in the same
+transaction as the insert so commit order matches sequence order. Ingest on
+one key never waits for another key's transactions.
+
+Ordered tasks are never delivered straight from their own message. Messages
+for them only "kick" their ordering key: process_ordered_key takes a short
+Redis lease on the key and delivers the key's head - its lowest-sequence
+unfinished task - if that is due. A head waiting for a retry blocks only its
+own key. After releasing the lease the worker kicks the key again if a new
+head is due, so each key has at most one delivery in flight while different
+keys are spread over all workers. Unordered tasks never touch this module.
+"""
+import logging
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from celery import Task
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.db.models.delivery_task import DeliveryTask, DeliveryStatus as TaskStatus
+from app.db.models.subscription import Subscription
+from app.services.cache import redis_client
+from app.workers.celery_app import celery_app
+from app.workers import lanes
+
+logger = logging.getLogger(__name__)
+
+ORDERING_LEASE_KEY = "ordered:lease:{}"
+
+# Only delete the lease if we still own it
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_release_script = redis_client.register_script(RELEASE_LUA)
+
+
+def ordering_key_for(subscription_id, partition: Optional[str] = None) -> str:
+    """Ordering key of a subscription, optionally narrowed to one partition of it"""
+    return f"{subscription_id}:{partition}" if partition else str(subscription_id)
+
+
+def acquire_lease(ordering_key: str, client=None) -> Optional[str]:
+    """Take the key's lease; returns the owner token, or None if it is held"""
+    client = client or redis_client
+    token = uuid.uuid4().hex
+    if client.set(ORDERING_LEASE_KEY.format(ordering_key), token, nx=True,
+                  ex=settings.WEBHOOK_LEASE_SECONDS):
+        return token
+    return None
+
+
+def release_lease(ordering_key: str, token: str, client=None) -> None:
+    """Release the key's lease if it is still ours"""
+    client = client or redis_client
+    _release_script(keys=[ORDERING_LEASE_KEY.format(ordering_key)], args=[token], client=client)
+
+
+def kick(ordering_key: str, lane: Optional[str] = None) -> None:
+    """Ask a worker to deliver the key's head"""
+    from app.workers import queue
+    # Ordering keys start with their subscription ID
+    subscription_id = ordering_key.split(":", 1)[0]
+    queue.get_backend().enqueue_ordered(ordering_key, lane=lanes.route(lane, subscription_id))
+
+
+def find_head(db: Session, ordering_key: str):
+    """The key's lowest-sequence unfinished task, with its subscription's priority_lane, or None"""
+    return db.query(
+        DeliveryTask.id, DeliveryTask.status, DeliveryTask.event_type,
+        DeliveryTask.next_attempt_at, DeliveryTask.lease_expires_at, Subscription.priority_lane
+    ).join(Subscription, Subscription.id == DeliveryTask.subscription_id).filter(
+        DeliveryTask.ordering_key == ordering_key,
+        DeliveryTask.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS])
+    ).order_by(DeliveryTask.sequence).first()
+
+
+def _is_due(head, now: datetime) -> bool:
+    if head.status == TaskStatus.IN_PROGRESS:
+        # Only a dead worker's expired lease makes an in-flight head claimable
+        return head.lease_expires_at is None or head.lease_expires_at < now
+    return head.next_attempt_at is None or head.next_attempt_at <= now
+
+
+def run_ordered_key(db: Session, ordering_key: str) -> bool:
+    """
+    Deliver the head of an ordering key if it is due and nobody else holds the key.
+
+    Returns:
+        bool: Whether a delivery was attempted
+    """
+    from app.workers.tasks import execute_delivery
+
+    token = acquire_lease(ordering_key)
+    if token is None:
+        # The holder kicks the key again after releasing it
+        return False
+
+    attempted = False
+    try:
+        head = find_head(db, ordering_key)
+        db.commit()
+        if head is not None and _is_due(head, datetime.utcnow()):
+            execute_delivery(db, head.id, ordered=True)
+            attempted = True
+    finally:
+        release_lease(ordering_key, token)
+
+    # A kick that lost the race for the lease relies on this check
+    head = find_head(db, ordering_key)
+    db.commit()
+    if head is not None and _is_due(head, datetime.utcnow()):
+        kick(ordering_key, lanes.lane_for(head.event_type, head.priority_lane))
+
+    return attempted
+
+
+class OrderedTask(Task):
+    """Base class for ordered deliveries with database session handling"""
+    _db = None
+
+    @property
+    def db(self) -> Session:
+        if self._db is None:
+            self._db = SessionLocal()
+        return self._db
+
+    def after_return(self, *args, **kwargs):
+        """Close the database connection after task execution"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+@celery_app.task(base=OrderedTask, bind=True, max_retries=settings.WEBHOOK_MAX_RETRIES)
+def process_ordered_key(self, ordering_key: str):
+    """Deliver the head of an ordering key (see the module docstring)"""
+    db = self.db
+    try:
+        return run_ordered_key(db, ordering_key)
+    except SQLAlchemyError as e:
+        # Nothing else would kick the key again, so retry the kick itself
+        logger.exception(f"Database error while processing ordering key {ordering_key}")
+        if db.is_active:
+            db.rollback()
+        raise self.retry(exc=e, countdown=settings.WEBHOOK_RETRY_DELAYS[0])
+    except Exception:
+        logger.exception(f"Error processing ordering key {ordering_key}")
+        if db.is_active:
+            db.rollback()
+        return False
@@ -0,0 +1,115 @@
+"""
+Transactional outbox relay.
+
+Ingest writes an OutboxEntry in the same transaction as each DeliveryTask
+(WEBHOOK_OUTBOX_ENABLED), so a task can never be committed without a record
+that it still has to be published. The relay claims outbox rows in batches
+with FOR UPDATE SKIP LOCKED (several relays can run side by side), publishes
+them through the queue backend in one round of broker calls and deletes them
+in the same transaction.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import get_db_context
+from app.db.models.outbox import OutboxEntry
+from app.db.models.delivery_task import DeliveryTask
+from app.db.models.subscription import Subscription
+from app.services import fair_queue
+from app.workers import queue, lanes
+
+logger = logging.getLogger(__name__)
+
+
+def relay_outbox_batch(db: Session, limit: int = None) -> int:
+    """
+    Publish and delete one batch of outbox rows.
+
+    If publishing fails the transaction rolls back and the rows are picked up
+    again by the next relay pass, so delivery is at-least-once; workers ignore
+    tasks that are no longer pending.
+
+    Returns:
+        int: Number of tasks published
+    """
+    limit = limit or settings.OUTBOX_RELAY_BATCH_SIZE
+
+    with db.begin():
+        rows = db.query(
+            OutboxEntry.id, OutboxEntry.delivery_task_id,
+            DeliveryTask.subscription_id, DeliveryTask.next_attempt_at,
+            DeliveryTask.event_type, Subscription.priority_lane, Subscription.dispatch_weight
+        ).join(
+            DeliveryTask, DeliveryTask.id == OutboxEntry.delivery_task_id
+        ).join(
+            Subscription, Subscription.id == DeliveryTask.subscription_id
+        ).order_by(
+            OutboxEntry.id
+        ).limit(limit).with_for_update(of=OutboxEntry, skip_locked=True).all()
+
+        if not rows:
+            return 0
+
+        backend = queue.get_backend()
+        now = datetime.utcnow()
+        lane_task_ids = {}
+        fair_task_ids = {}
+        weights = {}
+        for row in rows:
+            task_id = str(row.delivery_task_id)
+            lane = lanes.route(lanes.lane_for(row.event_type, row.priority_lane), row.subscription_id)
+            if row.next_attempt_at is not None and row.next_attempt_at > now:
+                # Scheduled delivery (ingest deliver_at) - hand it to the delay queue
+                backend.schedule(
+                    task_id, countdown=(row.next_attempt_at - now).total_seconds(), lane=lane
+                )
+            elif settings.FAIR_DISPATCH_ENABLED:
+                fair_task_ids.setdefault(str(row.subscription_id), []).append(lanes.tag(task_id, lane))
+                weights[str(row.subscription_id)] = row.dispatch_weight
+            else:
+                lane_task_ids.setdefault(lane, []).append(task_id)
+
+        # The weight goes with every push, since a drained sub-queue forgets it
+        for subscription_id, members in fair_task_ids.items():
+            fair_queue.push(subscription_id, members, weight=weights[subscription_id])
+
+        for lane, task_ids in lane_task_ids.items():
+            if settings.WEBHOOK_BATCH_PUBLISH_ENABLED:
+                batch_size = settings.WEBHOOK_BATCH_MAX_SIZE
+                for i in range(0, len(task_ids), batch_size):
+                    backend.enqueue_batch(task_ids[i:i + batch_size], lane=lane)
+            else:
+                backend.enqueue_many(task_ids, lane=lane)
+
+        db.query(OutboxEntry).filter(
+            OutboxEntry.id.in_([row.id for row in rows])
+        ).delete(synchronize_session=False)
+
+    logger.debug(f"Relayed {len(rows)} delivery tasks from the outbox")
+    return len(rows)
+
+
+def run_relay(stop_event: Optional[threading.Event] = None) -> None:
+    """Relay outbox rows until stop_event is set, idling while the outbox is empty"""
+    stop_event = stop_event or threading.Event()
+    poll_interval = settings.OUTBOX_RELAY_POLL_INTERVAL_MS / 1000.0
+    logger.info("Outbox relay started")
+
+    while not stop_event.is_set():
+        try:
+            with get_db_context() as db:
+                relayed = relay_outbox_batch(db)
+        except Exception:
+            logger.exception("Outbox relay pass failed")
+            relayed = 0
+
+        # Keep draining while there is a backlog, otherwise wait for new rows
+        if relayed < settings.OUTBOX_RELAY_BATCH_SIZE:
+            stop_event.wait(poll_interval)
+
+    logger.info("Outbox relay stopped")
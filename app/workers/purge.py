@@ -0,0 +1,184 @@
+"""
+Subscription purge.
+
+Deleting a subscription only stamps its deleted_at; from then on ingest
+treats it as missing and workers drop its deliveries instead of sending them.
+The rows that belonged to it are removed afterwards by purge_subscription,
+queued by the delete and re-run by the purge_deleted_subscriptions sweep
+until it finishes. The purge deletes the subscription's tasks, task history
+and logs in chunks of RETENTION_CHUNK_SIZE, one short transaction each,
+throttled like the retention engine (see app.services.retention). The
+subscription row itself goes last, when nothing is left to cascade. Progress
+is kept in Redis for GET /api/v1/subscriptions/{id}/purge.
+
+Only one run purges a subscription at a time: run_purge holds a Redis lock
+on it, so the purge queued by the delete and the sweep never interleave
+their progress updates. The sweep itself stops after
+SUBSCRIPTION_PURGE_SWEEP_MAX_SECONDS, so runs don't pile up behind each other.
+"""
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services import retention
+from app.services.cache import redis_client, redis_timeout_handler, acquire_lock, release_lock
+from app.workers.celery_app import celery_app
+from app.workers.cleanup import MaintenanceTask
+
+logger = logging.getLogger(__name__)
+
+PURGE_PROGRESS_KEY = "subscription:purge:{}"
+PURGE_PROGRESS_TTL = 7 * 86400  # Kept this long after the purge finishes
+PURGE_LOCK_KEY = "subscription:purge:{}:lock"
+# Longest a run may overshoot max_seconds: one chunk, its pause and a replica wait
+PURGE_LOCK_GRACE_SECONDS = 300
+
+# Dependent tables in purge order; each has an index on subscription_id
+PURGE_TABLES = ["delivery_tasks", "delivery_task_history", "delivery_logs", "ordering_sequences"]
+# Row key of tables not keyed by id
+_ROW_KEYS = {"ordering_sequences": "ordering_key"}
+
+_DELETED_SQL = text("""
+    SELECT id FROM subscriptions WHERE deleted_at IS NOT NULL ORDER BY deleted_at LIMIT :limit
+""")
+
+_DELETE_SUBSCRIPTION_SQL = text("DELETE FROM subscriptions WHERE id = :id AND deleted_at IS NOT NULL")
+
+
+def _chunk_sql(table: str):
+    key = _ROW_KEYS.get(table, "id")
+    return text(f"""
+        DELETE FROM {table}
+        WHERE subscription_id = :id
+          AND {key} IN (SELECT {key} FROM {table} WHERE subscription_id = :id LIMIT :limit)
+    """)
+
+
+def get_progress(subscription_id) -> Optional[Dict]:
+    """Purge progress of a deleted subscription, or None if nothing was recorded"""
+    progress = redis_client.get(PURGE_PROGRESS_KEY.format(subscription_id))
+    return json.loads(progress) if progress else None
+
+
+def _save_progress(subscription_id, progress: Dict) -> None:
+    progress["updated_at"] = datetime.utcnow().isoformat()
+    try:
+        with redis_timeout_handler():
+            ttl = PURGE_PROGRESS_TTL if progress["state"] == "done" else None
+            redis_client.set(PURGE_PROGRESS_KEY.format(subscription_id), json.dumps(progress), ex=ttl)
+    except Exception as e:
+        logger.warning(f"Failed to save purge progress of subscription {subscription_id}: {str(e)}")
+
+
+def start(subscription_id) -> None:
+    """Record a just-deleted subscription's purge as pending and queue it"""
+    _save_progress(subscription_id, {"state": "pending", "deleted": {}})
+    try:
+        purge_subscription.delay(str(subscription_id))
+    except Exception:
+        # purge_deleted_subscriptions picks it up on its next run
+        logger.exception(f"Failed to queue purge of subscription {subscription_id}")
+
+
+def run_purge(db: Session, subscription_id: uuid.UUID, max_seconds: Optional[float] = None,
+              sleep=time.sleep) -> Optional[Dict]:
+    """
+    Purge a deleted subscription's rows in chunks until done or out of time.
+
+    Returns:
+        Optional[Dict]: The purge's progress - rows deleted per table and its
+        state - or None if another run is purging the subscription
+    """
+    max_seconds = settings.RETENTION_MAX_RUN_SECONDS if max_seconds is None else max_seconds
+    lock_key = PURGE_LOCK_KEY.format(subscription_id)
+    token = acquire_lock(lock_key, int(max_seconds) + PURGE_LOCK_GRACE_SECONDS, client=redis_client)
+    if token is None:
+        logger.info(f"Subscription {subscription_id} is already being purged")
+        return None
+    try:
+        return _purge(db, subscription_id, max_seconds, sleep)
+    finally:
+        release_lock(lock_key, token, client=redis_client)
+
+
+def _purge(db: Session, subscription_id: uuid.UUID, max_seconds: float, sleep) -> Dict:
+    chunk_size = settings.RETENTION_CHUNK_SIZE
+    try:
+        progress = get_progress(subscription_id)
+    except Exception as e:
+        logger.warning(f"Failed to load purge progress of subscription {subscription_id}: {str(e)}")
+        progress = None
+    progress = progress or {"deleted": {}}
+    progress["state"] = "purging"
+    started = time.monotonic()
+
+    for table in PURGE_TABLES:
+        while True:
+            deleted = db.execute(_chunk_sql(table), {"id": subscription_id, "limit": chunk_size}).rowcount
+            db.commit()
+            progress["deleted"][table] = progress["deleted"].get(table, 0) + deleted
+            if deleted < chunk_size:
+                break
+
+            _save_progress(subscription_id, progress)
+            if time.monotonic() - started >= max_seconds:
+                # The sweep picks the rest up on its next run
+                return progress
+            sleep(settings.RETENTION_CHUNK_SLEEP_MS / 1000.0)
+            retention.wait_for_replicas(db, sleep)
+
+    db.execute(_DELETE_SUBSCRIPTION_SQL, {"id": subscription_id})
+    db.commit()
+    progress["state"] = "done"
+    _save_progress(subscription_id, progress)
+    logger.info(f"Purged subscription {subscription_id}: {progress['deleted']}")
+    return progress
+
+
+@celery_app.task(base=MaintenanceTask, bind=True)
+def purge_subscription(self, subscription_id: str):
+    """Purge the rows of one deleted subscription (see the module docstring)"""
+    db = self.db
+    try:
+        return run_purge(db, uuid.UUID(subscription_id))
+    except Exception:
+        logger.exception(f"Error purging subscription {subscription_id}")
+        if db.is_active:
+            db.rollback()
+        return None
+
+
+@celery_app.task(base=MaintenanceTask, bind=True)
+def purge_deleted_subscriptions(self):
+    """Continue unfinished purges, oldest deletion first, for up to SUBSCRIPTION_PURGE_SWEEP_MAX_SECONDS"""
+    db = self.db
+    try:
+        subscription_ids = [row.id for row in db.execute(_DELETED_SQL, {"limit": 100})]
+        db.commit()
+    except Exception:
+        logger.exception("Error listing deleted subscriptions")
+        db.rollback()
+        return 0
+
+    deadline = time.monotonic() + settings.SUBSCRIPTION_PURGE_SWEEP_MAX_SECONDS
+    visited = 0
+    for subscription_id in subscription_ids:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            # The rest waits for the next sweep
+            break
+        visited += 1
+        try:
+            run_purge(db, subscription_id, max_seconds=min(settings.RETENTION_MAX_RUN_SECONDS, remaining))
+        except Exception:
+            logger.exception(f"Error purging subscription {subscription_id}")
+            if db.is_active:
+                db.rollback()
+    return visited
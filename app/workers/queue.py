@@ -0,0 +1,193 @@
+"""
+Pluggable delivery queue backends.
+
+Ingest and the delivery logic in app.workers.tasks only talk to the backend
+returned by get_backend(), so deployments can choose between Celery (default)
+and a lightweight Redis Streams queue with DELIVERY_QUEUE_BACKEND.
+
+Every method takes an optional priority lane or shard route (see
+app.workers.lanes); the Celery backend publishes each to its own queue, the
+Streams backend has a single stream and ignores it.
+"""
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, List, Dict
+
+from app.core.config import settings
+from app.workers import lanes
+
+logger = logging.getLogger(__name__)
+
+
+class QueueBackend(ABC):
+    """Interface every delivery queue backend implements"""
+    name = "base"
+    # Whether messages can carry an app.workers.messages envelope
+    supports_envelopes = False
+
+    @abstractmethod
+    def enqueue(self, task_id: str, envelope: Optional[dict] = None, lane: Optional[str] = None) -> None:
+        """Queue one delivery task for immediate processing"""
+
+    def enqueue_many(self, task_ids: List[str], lane: Optional[str] = None) -> None:
+        """Queue several delivery tasks, one message each"""
+        for task_id in task_ids:
+            self.enqueue(task_id, lane=lane)
+
+    def enqueue_batch(self, task_ids: List[str], lane: Optional[str] = None) -> None:
+        """Queue several delivery tasks as cheaply as the backend allows"""
+        self.enqueue_many(task_ids, lane=lane)
+
+    @abstractmethod
+    def enqueue_ordered(self, ordering_key: str, lane: Optional[str] = None) -> None:
+        """Queue a kick for an ordering key (see app.workers.ordering)"""
+
+    @abstractmethod
+    def enqueue_coalesced(self, subscription_id: str, countdown: float = 0, lane: Optional[str] = None) -> None:
+        """Queue a batch delivery for a subscription (see app.workers.coalescing)"""
+
+    def schedule(self, task_id: str, countdown: float, lane: Optional[str] = None) -> None:
+        """Queue a delivery task to be processed after countdown seconds
+        
+        Delayed tasks wait in the Redis delay queue until the mover
+        (app.workers.scheduler) hands them back to enqueue_many.
+        """
+        from app.services import delay_queue
+        delay_queue.schedule(lanes.tag(task_id, lane), time.time() + max(0.0, countdown))
+
+    def schedule_coalesced(self, subscription_id: str, countdown: float, lane: Optional[str] = None) -> None:
+        """Queue a batch delivery after countdown seconds through the delay queue
+
+        The mover hands it back to enqueue_coalesced once it is due.
+        """
+        from app.services import delay_queue
+        delay_queue.schedule(
+            lanes.tag(delay_queue.COALESCE_PREFIX + subscription_id, lane), time.time() + max(0.0, countdown)
+        )
+
+    def depth(self, lane: Optional[str] = None) -> Optional[int]:
+        """Number of deliveries waiting for a worker, or None if unknown"""
+        return None
+
+
+class CeleryQueueBackend(QueueBackend):
+    """Celery/kombu backend - one process_webhook_delivery message per task"""
+    name = "celery"
+    supports_envelopes = True
+
+    def enqueue(self, task_id: str, envelope: Optional[dict] = None, lane: Optional[str] = None) -> None:
+        from app.workers.tasks import process_webhook_delivery
+        process_webhook_delivery.apply_async(args=[task_id, envelope], queue=lanes.queue_for(lane))
+
+    def enqueue_many(self, task_ids: List[str], lane: Optional[str] = None) -> None:
+        from app.workers.celery_app import celery_app
+        from app.workers.tasks import process_webhook_delivery
+
+        # Reuse one producer (and broker connection) for the whole group
+        with celery_app.producer_or_acquire() as producer:
+            for task_id in task_ids:
+                process_webhook_delivery.apply_async(
+                    args=[task_id], queue=lanes.queue_for(lane), producer=producer
+                )
+
+    def enqueue_batch(self, task_ids: List[str], lane: Optional[str] = None) -> None:
+        from app.workers.tasks import process_webhook_batch
+        process_webhook_batch.apply_async(args=[list(task_ids)], queue=lanes.queue_for(lane))
+
+    def enqueue_ordered(self, ordering_key: str, lane: Optional[str] = None) -> None:
+        from app.workers.ordering import process_ordered_key
+        process_ordered_key.apply_async(args=[ordering_key], queue=lanes.queue_for(lane))
+
+    def enqueue_coalesced(self, subscription_id: str, countdown: float = 0, lane: Optional[str] = None) -> None:
+        from app.workers.coalescing import process_coalesced_batch
+        process_coalesced_batch.apply_async(
+            args=[subscription_id], countdown=countdown or None, queue=lanes.queue_for(lane)
+        )
+
+    def schedule(self, task_id: str, countdown: float, lane: Optional[str] = None) -> None:
+        if settings.DELAY_QUEUE_ENABLED:
+            super().schedule(task_id, countdown, lane=lane)
+            return
+
+        from app.workers.tasks import process_webhook_delivery
+        process_webhook_delivery.apply_async(
+            args=[task_id], countdown=max(0.0, countdown), queue=lanes.queue_for(lane)
+        )
+
+    def depth(self, lane: Optional[str] = None) -> Optional[int]:
+        from app.workers.celery_app import celery_app
+
+        # The Redis transport keeps each queue as a list named after it;
+        # without a lane this is the total across all lanes
+        queues = [lanes.queue_for(lane)] if lane else lanes.all_queues()
+        with celery_app.connection_for_read() as connection:
+            client = connection.default_channel.client
+            return sum(client.llen(name) for name in queues)
+
+
+class RedisStreamsQueueBackend(QueueBackend):
+    """
+    Redis Streams backend.
+
+    Each delivery is a single stream entry holding the task ID; workers in
+    app.workers.streams consume it through a consumer group. Entries are not
+    capped with MAXLEN: consumers XDEL them once acknowledged, which already
+    bounds the stream, and a cap would only ever trim unconsumed deliveries.
+    """
+    name = "streams"
+
+    def __init__(self, client=None):
+        if client is None:
+            from app.services.cache import redis_client as client
+        self.client = client
+        self.stream_key = settings.STREAMS_DELIVERY_KEY
+
+    def enqueue(self, task_id: str, envelope: Optional[dict] = None, lane: Optional[str] = None) -> None:
+        self.client.xadd(self.stream_key, {"t": task_id})
+
+    def enqueue_many(self, task_ids: List[str], lane: Optional[str] = None) -> None:
+        if not task_ids:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipe.xadd(self.stream_key, {"t": task_id})
+        pipe.execute()
+
+    def enqueue_ordered(self, ordering_key: str, lane: Optional[str] = None) -> None:
+        self.client.xadd(self.stream_key, {"k": ordering_key})
+
+    def enqueue_coalesced(self, subscription_id: str, countdown: float = 0, lane: Optional[str] = None) -> None:
+        # Streams have no delayed entries, so a lingering kick waits in the delay queue
+        if countdown > 0:
+            self.schedule_coalesced(subscription_id, countdown, lane=lane)
+            return
+        self.client.xadd(self.stream_key, {"c": subscription_id})
+
+    def depth(self, lane: Optional[str] = None) -> Optional[int]:
+        # Consumers delete entries once acknowledged
+        return self.client.xlen(self.stream_key)
+
+
+_BACKENDS: Dict[str, type] = {
+    CeleryQueueBackend.name: CeleryQueueBackend,
+    RedisStreamsQueueBackend.name: RedisStreamsQueueBackend,
+}
+
+_backend: Optional[QueueBackend] = None
+
+
+def get_backend() -> QueueBackend:
+    """Get the configured delivery queue backend"""
+    global _backend
+    if _backend is None:
+        try:
+            backend_cls = _BACKENDS[settings.DELIVERY_QUEUE_BACKEND]
+        except KeyError:
+            raise ValueError(
+                f"Unknown DELIVERY_QUEUE_BACKEND '{settings.DELIVERY_QUEUE_BACKEND}', "
+                f"expected one of: {', '.join(_BACKENDS)}"
+            )
+        _backend = backend_cls()
+        logger.info(f"Using '{_backend.name}' delivery queue backend")
+    return _backend
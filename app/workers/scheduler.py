@@ -0,0 +1,92 @@
+"""
+Delay queue mover.
+
+Moves deliveries whose time has come from the Redis delay queue
+(app.services.delay_queue) onto the configured queue backend, along with the
+coalesced batch kicks parked there. Several movers
+can run side by side - popping is atomic, so each entry is moved once. Popped
+entries are acked only once queued; every mover periodically recovers the
+ones a crashed mover left unacked.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.services import delay_queue
+from app.workers import queue, lanes
+
+logger = logging.getLogger(__name__)
+
+
+def move_due_deliveries(now: Optional[float] = None) -> int:
+    """
+    Move one batch of due deliveries from every shard to the queue backend.
+
+    Returns:
+        int: Number of deliveries moved
+    """
+    members = delay_queue.pop_due(now=now)
+    if not members:
+        return 0
+
+    backend = queue.get_backend()
+    kicks, task_members = [], []
+    for member in members:
+        (kicks if member.startswith(delay_queue.COALESCE_PREFIX) else task_members).append(member)
+    pending = lanes.group_by_lane(task_members)
+    try:
+        while kicks:
+            subscription_id, lane = lanes.untag(kicks[0])
+            backend.enqueue_coalesced(subscription_id[len(delay_queue.COALESCE_PREFIX):], lane=lane)
+            kicks.pop(0)
+        for lane in list(pending):
+            backend.enqueue_many(pending[lane], lane=lane)
+            del pending[lane]
+    except Exception:
+        # Put the rest back so the next pass retries them right away instead
+        # of waiting for recovery
+        unmoved = kicks + [lanes.tag(task_id, lane) for lane, task_ids in pending.items() for task_id in task_ids]
+        logger.exception(f"Failed to enqueue {len(unmoved)} due deliveries, rescheduling")
+        delay_queue.schedule_many(unmoved, time.time())
+        delay_queue.ack(members)
+        raise
+
+    delay_queue.ack(members)
+
+    logger.debug(f"Moved {len(members)} due deliveries to the queue")
+    return len(members)
+
+
+def run_mover(stop_event: Optional[threading.Event] = None) -> None:
+    """Move due deliveries until stop_event is set"""
+    stop_event = stop_event or threading.Event()
+    poll_interval = settings.DELAY_QUEUE_POLL_INTERVAL_MS / 1000.0
+    full_batch = settings.DELAY_QUEUE_MOVE_BATCH_SIZE
+    recover_interval = settings.DELAY_QUEUE_PROCESSING_TIMEOUT_SECONDS
+    last_recovery = None
+    logger.info("Delay queue mover started")
+
+    while not stop_event.is_set():
+        # On startup, then once per timeout: requeue what a crashed mover popped
+        if last_recovery is None or time.monotonic() - last_recovery >= recover_interval:
+            try:
+                recovered = delay_queue.recover()
+                if recovered:
+                    logger.warning(f"Recovered {recovered} due deliveries popped but never queued")
+                last_recovery = time.monotonic()
+            except Exception:
+                logger.exception("Delay queue recovery failed")
+
+        try:
+            moved = move_due_deliveries()
+        except Exception:
+            logger.exception("Delay queue mover pass failed")
+            moved = 0
+
+        # Keep going without sleeping while shards are returning full batches
+        if moved < full_batch:
+            stop_event.wait(poll_interval)
+
+    logger.info("Delay queue mover stopped")
@@ -0,0 +1,72 @@
+"""
+Sharded routing.
+
+With SHARDED_ROUTING_ENABLED, default-lane deliveries are spread over
+SHARD_COUNT queues by a jump consistent hash of their subscription ID, so all
+of a subscription's deliveries land on the same queue. Shards are in turn
+bound to the workers named in SHARD_WORKERS by rendezvous (highest random
+weight) hashing: each shard is consumed by its SHARD_REPLICAS highest-scoring
+workers. A worker therefore only sees a slice of the subscriptions and keeps
+connections and cache entries warm for that slice alone.
+
+Both mappings move as little as possible when they change. Adding or removing
+a worker only moves the shards that worker wins or held (about
+SHARD_COUNT / len(SHARD_WORKERS) of them), and growing SHARD_COUNT from N to
+M only moves about 1 - N/M of the subscriptions.
+"""
+import hashlib
+from typing import List, Optional, Sequence
+
+from app.core.config import settings
+
+# Shards travel through the queue backends and Redis-held queues as
+# pseudo-lanes named shard-<n> (see app.workers.lanes.route)
+SHARD_PREFIX = "shard-"
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping and Veach) of a 64-bit key onto `buckets` buckets"""
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_for(subscription_id, shard_count: Optional[int] = None) -> int:
+    """Shard of a subscription"""
+    return jump_hash(_hash64(str(subscription_id)), shard_count or settings.SHARD_COUNT)
+
+
+def shard_route(shard: int) -> str:
+    """Pseudo-lane carrying a shard"""
+    return f"{SHARD_PREFIX}{shard}"
+
+
+def is_shard_route(lane: Optional[str]) -> bool:
+    return bool(lane) and lane.startswith(SHARD_PREFIX)
+
+
+def owners(shard: int, workers: Optional[Sequence[str]] = None, replicas: Optional[int] = None) -> List[str]:
+    """Workers consuming a shard, best first"""
+    workers = settings.SHARD_WORKERS if workers is None else workers
+    replicas = replicas or settings.SHARD_REPLICAS
+    ranked = sorted(workers, key=lambda worker: _hash64(f"{worker}:{shard}"), reverse=True)
+    return ranked[:replicas]
+
+
+def shards_for_worker(worker: str, workers: Optional[Sequence[str]] = None,
+                      replicas: Optional[int] = None, shard_count: Optional[int] = None) -> List[int]:
+    """Shards a worker consumes"""
+    workers = settings.SHARD_WORKERS if workers is None else workers
+    if worker not in workers:
+        raise ValueError(f"Unknown shard worker '{worker}', expected one of: {', '.join(workers)}")
+    return [
+        shard for shard in range(shard_count or settings.SHARD_COUNT)
+        if worker in owners(shard, workers, replicas)
+    ]
@@ -0,0 +1,193 @@
+"""
+Redis Streams delivery worker.
+
+Consumes the stream written by RedisStreamsQueueBackend through a consumer
+group and runs the same delivery logic as the Celery tasks. Entries are only
+acknowledged once processed, so a crashed consumer's entries are picked up by
+another consumer with XAUTOCLAIM; entries that keep failing are moved to a
+dead-letter stream by the pending-entries reaper.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Optional
+
+import redis
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db.base import get_db_context
+from app.workers.queue import RedisStreamsQueueBackend
+from app.workers.tasks import execute_delivery
+from app.workers.ordering import run_ordered_key
+from app.workers.coalescing import run_coalesced_batch
+from app.workers.scheduler import move_due_deliveries
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[str, Dict[str, str]]
+
+
+class StreamsConsumer:
+    """A single consumer in the delivery stream's consumer group"""
+
+    def __init__(self, consumer_name: str = None, backend: RedisStreamsQueueBackend = None):
+        self.backend = backend or RedisStreamsQueueBackend()
+        self.client = self.backend.client
+        self.stream_key = self.backend.stream_key
+        self.dead_letter_key = f"{self.stream_key}:dead"
+        self.group = settings.STREAMS_CONSUMER_GROUP
+        self.consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self._pool = ThreadPoolExecutor(max_workers=settings.STREAMS_CONCURRENCY)
+        self._last_maintenance = 0.0
+
+    def ensure_group(self) -> None:
+        """Create the consumer group (and the stream) if they don't exist yet"""
+        try:
+            self.client.xgroup_create(self.stream_key, self.group, id="0", mkstream=True)
+            logger.info(f"Created consumer group {self.group} on {self.stream_key}")
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> None:
+        """Consume deliveries until stop_event is set"""
+        stop_event = stop_event or threading.Event()
+        self.ensure_group()
+        logger.info(f"Streams consumer {self.consumer_name} started on {self.stream_key}")
+
+        while not stop_event.is_set():
+            try:
+                self.poll_once()
+            except redis.exceptions.ConnectionError:
+                logger.error("Redis connection error in streams consumer, backing off")
+                time.sleep(1)
+
+        self._pool.shutdown(wait=True)
+        logger.info(f"Streams consumer {self.consumer_name} stopped")
+
+    def poll_once(self) -> int:
+        """Run periodic maintenance, then read and process one batch of new entries"""
+        if time.time() - self._last_maintenance >= settings.STREAMS_REAPER_INTERVAL_SECONDS:
+            self._last_maintenance = time.time()
+            self.reclaim()
+            reap_pending(self.client, self.stream_key, self.group)
+
+        # Streams deployments may not run a separate delay mover
+        try:
+            move_due_deliveries()
+        except Exception:
+            logger.exception("Failed to move due deliveries from the delay queue")
+
+        response = self.client.xreadgroup(
+            self.group, self.consumer_name, {self.stream_key: ">"},
+            count=settings.STREAMS_READ_COUNT, block=settings.STREAMS_BLOCK_MS
+        )
+        if not response:
+            return 0
+
+        _, entries = response[0]
+        return self.process(entries)
+
+    def reclaim(self) -> int:
+        """Take over entries that crashed or stalled consumers left pending"""
+        start_id = "0-0"
+        reclaimed = 0
+        while True:
+            result = self.client.xautoclaim(
+                self.stream_key, self.group, self.consumer_name,
+                min_idle_time=settings.STREAMS_CLAIM_IDLE_MS,
+                start_id=start_id, count=settings.STREAMS_READ_COUNT
+            )
+            start_id, entries = result[0], result[1]
+            # Entries deleted from the stream while pending come back empty
+            entries = [entry for entry in entries if entry and entry[1]]
+            if entries:
+                reclaimed += self.process(entries)
+            if start_id in ("0-0", b"0-0"):
+                break
+
+        if reclaimed:
+            logger.info(f"Reclaimed {reclaimed} stalled stream entries")
+        return reclaimed
+
+    def process(self, entries: List[Entry]) -> int:
+        """Process entries concurrently and acknowledge the ones that are done"""
+        outcomes = list(self._pool.map(self._handle_entry, entries))
+        done = [entry_id for (entry_id, _), ok in zip(entries, outcomes) if ok]
+
+        if done:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.xack(self.stream_key, self.group, *done)
+            pipe.xdel(self.stream_key, *done)
+            pipe.execute()
+
+        return len(done)
+
+    def _handle_entry(self, entry: Entry) -> bool:
+        """Deliver one entry; returns False to leave it pending for redelivery"""
+        entry_id, fields = entry
+        task_id = fields.get("t")
+        ordering_key = fields.get("k")
+        batch_subscription_id = fields.get("c")
+        if not task_id and not ordering_key and not batch_subscription_id:
+            logger.error(f"Dropping malformed stream entry {entry_id}")
+            return True
+
+        try:
+            with get_db_context() as db:
+                if task_id:
+                    # Reclaimed entries keep their ID, so it identifies redeliveries
+                    execute_delivery(db, uuid.UUID(task_id), message_id=f"{self.stream_key}:{entry_id}")
+                elif ordering_key:
+                    run_ordered_key(db, ordering_key)
+                else:
+                    run_coalesced_batch(db, uuid.UUID(batch_subscription_id))
+            return True
+        except SQLAlchemyError:
+            # Leave the entry pending so it is reclaimed once the DB recovers
+            logger.exception(f"Database error while processing stream entry {entry_id} (task {task_id})")
+            return False
+        except Exception:
+            logger.exception(f"Error processing stream entry {entry_id} (task {task_id})")
+            return True
+
+
+def reap_pending(client, stream_key: str, group: str) -> int:
+    """
+    Move entries that exceeded STREAMS_MAX_DELIVERIES to the dead-letter
+    stream and remove idle consumers that have nothing pending.
+
+    Returns:
+        int: Number of entries dead-lettered
+    """
+    dead_letter_key = f"{stream_key}:dead"
+    dead = []
+
+    pending = client.xpending_range(
+        stream_key, group, min="-", max="+", count=settings.STREAMS_READ_COUNT * 10,
+        idle=settings.STREAMS_CLAIM_IDLE_MS
+    )
+    for entry in pending:
+        if entry["times_delivered"] > settings.STREAMS_MAX_DELIVERIES:
+            dead.append(entry["message_id"])
+
+    if dead:
+        pipe = client.pipeline(transaction=False)
+        for entry_id in dead:
+            for _, fields in client.xrange(stream_key, min=entry_id, max=entry_id):
+                pipe.xadd(dead_letter_key, dict(fields, source_id=entry_id))
+        pipe.xack(stream_key, group, *dead)
+        pipe.xdel(stream_key, *dead)
+        pipe.execute()
+        logger.error(f"Moved {len(dead)} repeatedly failing stream entries to {dead_letter_key}")
+
+    for consumer in client.xinfo_consumers(stream_key, group):
+        if consumer["pending"] == 0 and consumer["idle"] > settings.STREAMS_CLAIM_IDLE_MS * 10:
+            client.xgroup_delconsumer(stream_key, group, consumer["name"])
+
+    return len(dead)
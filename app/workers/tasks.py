@@ -4,8 +4,14 @@ import httpx
 import asyncio
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
+from sqlalchemy import update, or_, and_, func
 import uuid
-from sqlalchemy.exc import SQLAlchemyError
+import time
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union, List
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
 
 from app.workers.celery_app import celery_app
 from app.core.config import settings
@@ -14,20 +20,57 @@ from app.db.models import Subscription
 from app.db.models.delivery_task import DeliveryTask, DeliveryStatus as TaskStatus
 from app.db.models.delivery_log import DeliveryLog, DeliveryStatus as LogStatus
 from app.crud import crud_subscription, crud_delivery
-from app.services import cache
+from app.services import cache, retry_policy, retry_budget
+from app.workers import messages, queue, leases, lanes, ordering, expiry, coalescing, concurrency, attempts, counters
 
 logger = logging.getLogger(__name__)
 
-# Define retry backoff intervals in seconds as per SRS
-RETRY_BACKOFF_INTERVALS = [10, 30, 60, 300, 900]  # 10s, 30s, 1m, 5m, 15m
-MAX_RETRIES = 5
+# Retry backoff intervals in seconds come from settings.WEBHOOK_RETRY_DELAYS
+MAX_RETRIES = settings.WEBHOOK_MAX_RETRIES
 
 
-def calculate_next_attempt_time(attempt_count: int) -> datetime:
-    """Calculate the next attempt time based on the attempt count"""
-    if attempt_count >= len(RETRY_BACKOFF_INTERVALS):
+def calculate_next_attempt_time(attempt_count: int, policy: Optional[dict] = None) -> Optional[datetime]:
+    """Calculate the next attempt time from the attempt count and the subscription's retry policy"""
+    delay = retry_policy.retry_delay(policy, attempt_count)
+    if delay is None:
         return None  # No more retries
-    return datetime.utcnow() + timedelta(seconds=RETRY_BACKOFF_INTERVALS[attempt_count])
+    # Retries over the cluster-wide budget are deferred, never dropped
+    delay = retry_budget.admit_retry(delay)
+    return datetime.utcnow() + timedelta(seconds=delay)
+
+
+def _due_at():
+    """When a task became due: its retry or scheduled time, else its creation"""
+    return func.coalesce(DeliveryTask.next_attempt_at, DeliveryTask.created_at).label('due_at')
+
+
+def _concurrency_sample(delivery_result: dict, claim_seconds: float) -> tuple:
+    """Sample for the adaptive concurrency controller (see app.workers.concurrency)"""
+    return delivery_result.get('elapsed', 0.0), delivery_result.get('timed_out', False), claim_seconds
+
+
+def _record_queue_wait(delivery_infos: List[dict]) -> None:
+    """Record how long claimed tasks waited for a worker, per priority lane"""
+    now = datetime.utcnow()
+    lanes.record_latencies(
+        (info['lane'], (now - info['due_at']).total_seconds())
+        for info in delivery_infos if info.get('due_at') is not None
+    )
+
+
+def _claimable(now: datetime):
+    """SQL condition for tasks a worker may claim: pending, or in progress with an
+    expired lease, and not past their TTL"""
+    return and_(
+        or_(
+            DeliveryTask.status == TaskStatus.PENDING,
+            and_(
+                DeliveryTask.status == TaskStatus.IN_PROGRESS,
+                or_(DeliveryTask.lease_expires_at.is_(None), DeliveryTask.lease_expires_at < now)
+            )
+        ),
+        or_(DeliveryTask.expires_at.is_(None), DeliveryTask.expires_at > now)
+    )
 
 
 class WebhookTask(Task):
@@ -49,8 +92,15 @@ class WebhookTask(Task):
 
 
 @celery_app.task(base=WebhookTask, bind=True, max_retries=MAX_RETRIES)
-def process_webhook_delivery(self, task_id: str):
-    """Process a webhook delivery task"""
+def process_webhook_delivery(self, task_id: str, envelope: Optional[dict] = None):
+    """
+    Process a webhook delivery task
+
+    Args:
+        task_id: ID of the delivery task
+        envelope: Optional payload and subscription snapshot embedded by ingest
+                  (see app.workers.messages); only sent with the first attempt
+    """
     logger.info(f"Processing webhook delivery task: {task_id}")
     
     # Check global cache version to detect subscription changes
@@ -63,20 +113,7 @@ def process_webhook_delivery(self, task_id: str):
     try:
         task_uuid = uuid.UUID(task_id)
         db = self.db
-
-        # Get task info and prepare for delivery
-        delivery_info = _prepare_webhook_delivery(db, task_uuid)
-        if not delivery_info:
-            return False
-        
-        # Deliver the webhook outside any transaction
-        delivery_result = deliver_webhook(
-            target_url=delivery_info['target_url'],
-            payload=delivery_info['payload']
-        )
-        
-        # Handle the result
-        return _process_delivery_result(db, task_uuid, delivery_info, delivery_result)
+        return execute_delivery(db, task_uuid, envelope, message_id=self.request.id)
         
     except SQLAlchemyError as e:
         logger.exception(f"Database error while processing webhook task {task_id}")
@@ -86,7 +123,8 @@ def process_webhook_delivery(self, task_id: str):
         # Retry on database errors with exponential backoff
         retry_count = self.request.retries if hasattr(self.request, 'retries') else 0
         if retry_count < MAX_RETRIES:
-            retry_delay = RETRY_BACKOFF_INTERVALS[retry_count]
+            retry_delays = settings.WEBHOOK_RETRY_DELAYS
+            retry_delay = retry_delays[min(retry_count, len(retry_delays) - 1)]
             logger.info(f"Retrying task {task_id} in {retry_delay} seconds (attempt {retry_count + 1}/{MAX_RETRIES})")
             self.retry(countdown=retry_delay, exc=e)
         
@@ -98,7 +136,200 @@ def process_webhook_delivery(self, task_id: str):
         return False
 
 
-def _prepare_webhook_delivery(db: Session, task_uuid: uuid.UUID) -> dict:
+def execute_delivery(
+    db: Session, task_uuid: uuid.UUID, envelope: Optional[dict] = None, ordered: bool = False,
+    message_id: Optional[str] = None
+) -> bool:
+    """
+    Claim, deliver and record one attempt of a delivery task.
+
+    This is the delivery logic shared by every queue backend (see
+    app.workers.queue); database errors propagate so the caller can decide
+    how to redeliver the message. ordered=True is passed by
+    app.workers.ordering while it holds the task's ordering key. message_id
+    identifies the broker message, so redelivered copies of a message that
+    already claimed the task are dropped (see app.workers.attempts).
+    """
+    if attempts.is_duplicate(message_id):
+        logger.info(f"Dropping redelivered message {message_id} for task {task_uuid}")
+        return False
+    
+    # Get task info and prepare for delivery
+    claim_started = time.monotonic()
+    try:
+        if envelope is not None:
+            delivery_info = _prepare_from_envelope(db, task_uuid, envelope)
+        else:
+            delivery_info = _prepare_webhook_delivery(db, task_uuid, ordered)
+    except PoolTimeoutError:
+        concurrency.record_samples([], saturated=True)
+        raise
+    claim_seconds = time.monotonic() - claim_started
+    if not delivery_info:
+        return False
+    attempts.record_claim(message_id, delivery_info['attempt_id'])
+    _record_queue_wait([delivery_info])
+    
+    # Deliver the webhook outside any transaction, keeping the lease alive
+    with leases.keeper().hold([task_uuid]):
+        delivery_result = deliver_webhook(
+            target_url=delivery_info['target_url'],
+            payload=delivery_info['payload'],
+            attempt_id=delivery_info['attempt_id']
+        )
+    concurrency.record_samples([_concurrency_sample(delivery_result, claim_seconds)])
+    
+    # Handle the result
+    return _process_delivery_result(db, task_uuid, delivery_info, delivery_result)
+
+
+@celery_app.task(base=WebhookTask, bind=True)
+def process_webhook_batch(self, task_ids: List[str]):
+    """
+    Process a micro-batch of webhook delivery tasks (see app.workers.batching)
+
+    The whole batch is claimed in one query and delivered concurrently. The
+    message is acknowledged once for the whole batch; items that cannot be
+    processed are requeued individually.
+    """
+    logger.info(f"Processing webhook batch of {len(task_ids)} tasks")
+    db = self.db
+
+    message_id = self.request.id
+    if attempts.is_duplicate(message_id):
+        logger.info(f"Dropping redelivered batch message {message_id}")
+        return 0
+
+    claim_started = time.monotonic()
+    try:
+        claimed = _claim_batch(db, [uuid.UUID(task_id) for task_id in task_ids])
+    except SQLAlchemyError as e:
+        concurrency.record_samples([], saturated=isinstance(e, PoolTimeoutError))
+        logger.exception("Database error while claiming webhook batch, requeueing items individually")
+        if db.is_active:
+            db.rollback()
+        queue.get_backend().enqueue_many(task_ids)
+        return 0
+
+    claim_seconds = time.monotonic() - claim_started
+
+    if not claimed:
+        return 0
+    attempts.record_claim(message_id, "batch")
+    _record_queue_wait(claimed)
+
+    # Deliver outside any transaction, bounded by the batch concurrency
+    pool_size = max(1, min(settings.WEBHOOK_BATCH_CONCURRENCY, len(claimed)))
+    with leases.keeper().hold([info['task_id'] for info in claimed]):
+        with ThreadPoolExecutor(max_workers=pool_size) as pool:
+            results = list(pool.map(
+                lambda info: deliver_webhook(
+                    target_url=info['target_url'], payload=info['payload'], attempt_id=info['attempt_id']
+                ),
+                claimed
+            ))
+    concurrency.record_samples(_concurrency_sample(result, claim_seconds) for result in results)
+
+    processed = 0
+    for delivery_info, delivery_result in zip(claimed, results):
+        task_uuid = delivery_info['task_id']
+        try:
+            _process_delivery_result(db, task_uuid, delivery_info, delivery_result)
+            processed += 1
+        except Exception:
+            logger.exception(f"Error recording batch result for task {task_uuid}, requeueing")
+            if db.is_active:
+                db.rollback()
+            _requeue_task(db, task_uuid, lanes.route(delivery_info['lane'], delivery_info['subscription_id']))
+
+    return processed
+
+
+def _claim_batch(db: Session, task_uuids: List[uuid.UUID]) -> List[dict]:
+    """Claim every claimable task of a batch with a single UPDATE ... RETURNING"""
+    now = datetime.utcnow()
+    with db.begin():
+        claim = (
+            update(DeliveryTask)
+            .where(
+                DeliveryTask.id.in_(task_uuids),
+                _claimable(now),
+                DeliveryTask.ordering_key.is_(None),
+                DeliveryTask.subscription_id == Subscription.id,
+                Subscription.deleted_at.is_(None)
+            )
+            .values(
+                status=TaskStatus.IN_PROGRESS,
+                attempt_count=DeliveryTask.attempt_count + 1,
+                attempt_id=func.gen_random_uuid(),
+                lease_expires_at=leases.lease_deadline(now),
+                updated_at=now
+            )
+            .returning(
+                DeliveryTask.id,
+                DeliveryTask.attempt_id,
+                DeliveryTask.subscription_id,
+                DeliveryTask.attempt_count,
+                DeliveryTask.max_retries,
+                DeliveryTask.payload,
+                DeliveryTask.event_type,
+                _due_at(),
+                Subscription.target_url,
+                Subscription.retry_policy,
+                Subscription.priority_lane
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = db.execute(claim).all()
+
+    if len(rows) < len(task_uuids):
+        logger.info(f"Skipped {len(task_uuids) - len(rows)} batch tasks that were missing, already claimed, "
+                    f"expired, ordered or of a deleted subscription")
+        unclaimed = list(set(task_uuids) - {row.id for row in rows})
+        expiry.expire_tasks(db, unclaimed)
+        _kick_ordered(db, unclaimed)
+
+    return [
+        {
+            'task_id': row.id,
+            'attempt_id': row.attempt_id,
+            'target_url': row.target_url,
+            'payload': row.payload,
+            'subscription_id': row.subscription_id,
+            'attempt_count': row.attempt_count,
+            'max_retries': row.max_retries,
+            'retry_policy': row.retry_policy,
+            'lane': lanes.lane_for(row.event_type, row.priority_lane),
+            'due_at': row.due_at
+        }
+        for row in rows
+    ]
+
+
+def _kick_ordered(db: Session, task_uuids) -> None:
+    """Hand ordered tasks that came in through a batch over to their ordering keys"""
+    rows = db.query(
+        DeliveryTask.ordering_key, DeliveryTask.event_type, Subscription.priority_lane
+    ).join(Subscription, Subscription.id == DeliveryTask.subscription_id).filter(
+        DeliveryTask.id.in_(list(task_uuids)),
+        DeliveryTask.ordering_key.isnot(None),
+        DeliveryTask.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS])
+    ).distinct(DeliveryTask.ordering_key).all()
+    db.commit()
+    for row in rows:
+        ordering.kick(row.ordering_key, lanes.lane_for(row.event_type, row.priority_lane))
+
+
+def _requeue_task(db: Session, task_uuid: uuid.UUID, lane: Optional[str] = None) -> None:
+    """Return a claimed task to PENDING and queue it on its own"""
+    try:
+        crud_delivery.update_task_status(db, task_id=task_uuid, status=TaskStatus.PENDING)
+        queue.get_backend().enqueue(str(task_uuid), lane=lane)
+    except Exception:
+        logger.exception(f"Failed to requeue task {task_uuid}")
+
+
+def _prepare_webhook_delivery(db: Session, task_uuid: uuid.UUID, ordered: bool = False) -> dict:
     """Prepare a webhook for delivery - separated for better transaction management"""
     try:
         # Start a transaction
@@ -116,13 +347,35 @@ def _prepare_webhook_delivery(db: Session, task_uuid: uuid.UUID) -> dict:
                 logger.info(f"Task already completed: {task_uuid}")
                 return None
                 
-            if task.status == TaskStatus.FAILED:
-                logger.info(f"Task already failed: {task_uuid}")
+            if task.status in (TaskStatus.FAILED, TaskStatus.EXPIRED):
+                logger.info(f"Task already {task.status.value.lower()}: {task_uuid}")
                 return None
-                
-            # Additional check: if task is already in progress, don't process it again
-            if task.status == TaskStatus.IN_PROGRESS and task.attempt_count > 0:
-                logger.info(f"Task is already being processed: {task_uuid}")
+            
+            # If another worker holds a live lease, don't process it again. An
+            # expired lease means that worker died, so the task can be reclaimed
+            now = datetime.utcnow()
+            if (task.status == TaskStatus.IN_PROGRESS and task.lease_expires_at is not None
+                    and task.lease_expires_at > now):
+                logger.info(f"Task is leased by another worker until {task.lease_expires_at}: {task_uuid}")
+                return None
+            
+            # Past its TTL - drop it without an outbound call
+            if task.expires_at is not None and task.expires_at <= now:
+                task.status = TaskStatus.EXPIRED
+                task.next_attempt_at = None
+                task.lease_expires_at = None
+                db.add(task)
+                expiry.record_expired([task.subscription_id])
+                logger.info(f"Task {task_uuid} expired at {task.expires_at}, dropping it")
+                return None
+            
+            # Ordered tasks are only delivered by the holder of their ordering
+            # key - any other message for them just kicks the key
+            if task.ordering_key is not None and not ordered:
+                priority_lane = db.query(Subscription.priority_lane).filter(
+                    Subscription.id == task.subscription_id
+                ).scalar()
+                ordering.kick(task.ordering_key, lanes.lane_for(task.event_type, priority_lane))
                 return None
             
             # Fetch the subscription to get the target URL
@@ -133,16 +386,38 @@ def _prepare_webhook_delivery(db: Session, task_uuid: uuid.UUID) -> dict:
             if not subscription:
                 logger.error(f"Subscription not found for task: {task_uuid}")
                 return None
+            
+            # A deleted subscription's tasks are dropped; the purge removes the rest
+            if subscription.deleted_at is not None:
+                logger.info(f"Subscription of task {task_uuid} was deleted, dropping it")
+                db.delete(task)
+                return None
+            
+            # Batching subscriptions get this task in their next coalesced batch
+            if subscription.batch_delivery and task.ordering_key is None:
+                coalescing.kick(
+                    subscription.id, subscription.batch_delivery,
+                    lanes.lane_for(task.event_type, subscription.priority_lane)
+                )
+                return None
                 
-            # Update task status to in_progress
+            # Update task status to in_progress and take the lease
             task.status = TaskStatus.IN_PROGRESS
             task.attempt_count += 1
+            task.attempt_id = uuid.uuid4()
+            task.lease_expires_at = leases.lease_deadline(now)
             db.add(task)
             
             return {
+                'attempt_id': task.attempt_id,
                 'target_url': subscription.target_url,
                 'payload': task.payload,
-                'task': task
+                'subscription_id': task.subscription_id,
+                'attempt_count': task.attempt_count,
+                'max_retries': task.max_retries,
+                'retry_policy': subscription.retry_policy,
+                'lane': lanes.lane_for(task.event_type, subscription.priority_lane),
+                'due_at': task.next_attempt_at or task.created_at
             }
             
     except Exception as e:
@@ -150,73 +425,174 @@ def _prepare_webhook_delivery(db: Session, task_uuid: uuid.UUID) -> dict:
         raise
 
 
+def _prepare_from_envelope(db: Session, task_uuid: uuid.UUID, envelope: dict) -> dict:
+    """
+    Prepare a webhook for delivery using the envelope embedded by ingest.
+
+    The task is claimed with a single UPDATE ... RETURNING joined to the
+    subscription, so the payload is never read back from the database while
+    the subscription's version stamp still matches the one in the envelope.
+    """
+    message = messages.unpack_delivery_envelope(envelope)
+    if message is None:
+        logger.info(f"Unrecognised envelope for task {task_uuid}, reading from database")
+        return _prepare_webhook_delivery(db, task_uuid)
+
+    try:
+        now = datetime.utcnow()
+        with db.begin():
+            claim = (
+                update(DeliveryTask)
+                .where(
+                    DeliveryTask.id == task_uuid,
+                    _claimable(now),
+                    DeliveryTask.subscription_id == Subscription.id,
+                    Subscription.deleted_at.is_(None)
+                )
+                .values(
+                    status=TaskStatus.IN_PROGRESS,
+                    attempt_count=DeliveryTask.attempt_count + 1,
+                    attempt_id=uuid.uuid4(),
+                    lease_expires_at=leases.lease_deadline(now),
+                    updated_at=now
+                )
+                .returning(
+                    DeliveryTask.attempt_id,
+                    DeliveryTask.subscription_id,
+                    DeliveryTask.attempt_count,
+                    DeliveryTask.max_retries,
+                    DeliveryTask.event_type,
+                    _due_at(),
+                    Subscription.updated_at,
+                    Subscription.retry_policy,
+                    Subscription.priority_lane
+                )
+                .execution_options(synchronize_session=False)
+            )
+            claimed = db.execute(claim).first()
+
+            if not claimed:
+                # Drop it right away if it is only unclaimable because it's past its TTL
+                if not expiry.expire_in_transaction(db, [task_uuid], now):
+                    logger.info(f"Task {task_uuid} is missing, finished, leased by another worker "
+                                f"or of a deleted subscription")
+                return None
+
+            delivery_info = {
+                'attempt_id': claimed.attempt_id,
+                'subscription_id': claimed.subscription_id,
+                'attempt_count': claimed.attempt_count,
+                'max_retries': claimed.max_retries,
+                'retry_policy': claimed.retry_policy,
+                'lane': lanes.lane_for(claimed.event_type, claimed.priority_lane),
+                'due_at': claimed.due_at
+            }
+
+            if messages.subscription_version_stamp(claimed.updated_at) == message['stamp']:
+                delivery_info['target_url'] = message['target_url']
+                delivery_info['payload'] = message['payload']
+                return delivery_info
+
+            # Subscription changed since ingest - the snapshot can't be trusted
+            logger.info(f"Envelope for task {task_uuid} is stale, reading from database")
+            row = db.query(DeliveryTask.payload, Subscription.target_url).join(
+                Subscription, Subscription.id == DeliveryTask.subscription_id
+            ).filter(DeliveryTask.id == task_uuid).one()
+
+            delivery_info['target_url'] = row.target_url
+            delivery_info['payload'] = row.payload
+            return delivery_info
+
+    except Exception as e:
+        logger.exception(f"Error preparing webhook delivery from envelope: {task_uuid}")
+        raise
+
+
 def _process_delivery_result(db: Session, task_uuid: uuid.UUID, delivery_info: dict, delivery_result: dict) -> bool:
     """Process the result of a webhook delivery"""
     try:
-        # Get a reference to the task (no transaction yet)
-        task = delivery_info['task']
+        attempt_count = delivery_info['attempt_count']
+        retry_budget.record_attempt()
         
-        # Create delivery log entry - This has its own transaction inside the function
-        log = crud_delivery.create_delivery_log(
-            db,
-            task_id=task_uuid,
-            subscription_id=task.subscription_id,
-            target_url=delivery_info['target_url'],
-            attempt_number=task.attempt_count,
-            status=delivery_result['status'],
-            status_code=delivery_result.get('status_code'),
-            error_details=delivery_result.get('error_details')
-        )
+        # Create delivery log entry - This has its own transaction inside the function.
+        # Failures are always logged; successes per LOG_SUCCESS_POLICY
+        if crud_delivery.should_log(task_uuid, delivery_result['status']):
+            crud_delivery.create_delivery_log(
+                db,
+                task_id=task_uuid,
+                subscription_id=delivery_info['subscription_id'],
+                target_url=delivery_info['target_url'],
+                attempt_number=attempt_count,
+                status=delivery_result['status'],
+                status_code=delivery_result.get('status_code'),
+                error_details=delivery_result.get('error_details')
+            )
+        counters.record(delivery_info['subscription_id'], attempts=1)
         
-        # Now use the crud utility to update task status
+        # Now use the crud utility to update task status, fenced on our attempt
+        attempt_id = delivery_info.get('attempt_id')
         if delivery_result['status'] == LogStatus.SUCCESS:
             # Use the dedicated function to update task status
-            crud_delivery.update_task_status(
+            if not crud_delivery.update_task_status(
                 db, 
                 task_id=task_uuid,
                 status=TaskStatus.COMPLETED,
-                next_attempt_at=None
-            )
+                next_attempt_at=None,
+                attempt_id=attempt_id
+            ):
+                return _fenced(task_uuid, attempt_id)
+            counters.record(delivery_info['subscription_id'], succeeded=1)
             logger.info(f"Task {task_uuid} marked as COMPLETED after successful delivery")
             return True
             
         elif delivery_result['status'] == LogStatus.FAILED_ATTEMPT:
-            if task.attempt_count < task.max_retries:
-                next_attempt = calculate_next_attempt_time(task.attempt_count)
+            if attempt_count < delivery_info['max_retries']:
+                next_attempt = calculate_next_attempt_time(
+                    attempt_count, delivery_info.get('retry_policy')
+                )
                 if next_attempt:
                     # Update to pending with next attempt time
-                    crud_delivery.update_task_status(
+                    if not crud_delivery.update_task_status(
                         db,
                         task_id=task_uuid,
                         status=TaskStatus.PENDING,
-                        next_attempt_at=next_attempt
-                    )
+                        next_attempt_at=next_attempt,
+                        attempt_id=attempt_id
+                    ):
+                        return _fenced(task_uuid, attempt_id)
                     
-                    # Schedule next attempt
-                    process_webhook_delivery.apply_async(
-                        args=[str(task_uuid)],
-                        countdown=(next_attempt - datetime.utcnow()).total_seconds()
+                    # Schedule next attempt on the configured queue backend
+                    queue.get_backend().schedule(
+                        str(task_uuid),
+                        countdown=(next_attempt - datetime.utcnow()).total_seconds(),
+                        lane=lanes.route(delivery_info.get('lane'), delivery_info.get('subscription_id'))
                     )
                     return True
             
             # If we get here, we've exceeded max retries
-            crud_delivery.update_task_status(
+            if not crud_delivery.update_task_status(
                 db,
                 task_id=task_uuid,
                 status=TaskStatus.FAILED,
-                next_attempt_at=None
-            )
+                next_attempt_at=None,
+                attempt_id=attempt_id
+            ):
+                return _fenced(task_uuid, attempt_id)
+            counters.record(delivery_info['subscription_id'], failed=1)
             logger.info(f"Task {task_uuid} marked as FAILED after maximum retries")
             return False
             
         else:  # LogStatus.FAILURE
             # Mark as permanently failed
-            crud_delivery.update_task_status(
+            if not crud_delivery.update_task_status(
                 db,
                 task_id=task_uuid,
                 status=TaskStatus.FAILED,
-                next_attempt_at=None
-            )
+                next_attempt_at=None,
+                attempt_id=attempt_id
+            ):
+                return _fenced(task_uuid, attempt_id)
+            counters.record(delivery_info['subscription_id'], failed=1)
             logger.info(f"Task {task_uuid} marked as FAILED due to permanent failure")
             return False
             
@@ -227,12 +603,51 @@ def _process_delivery_result(db: Session, task_uuid: uuid.UUID, delivery_info: d
         raise
 
 
-def deliver_webhook(target_url: str, payload: dict) -> dict:
-    """Deliver a webhook payload to the target URL"""
+def _fenced(task_uuid: uuid.UUID, attempt_id) -> bool:
+    """Log a result dropped because a newer attempt took over the task"""
+    logger.warning(f"Attempt {attempt_id} of task {task_uuid} was superseded, not recording its result")
+    return False
+
+
+_shared_client: Optional[httpx.Client] = None
+_shared_client_lock = threading.Lock()
+
+
+def _http_client():
+    """Client for one delivery
+    
+    With sharded routing a worker only talks to its own slice of targets, so
+    it keeps one process-wide client whose keep-alive pool stays warm for
+    them; otherwise every delivery gets a fresh client.
+    """
+    global _shared_client
+    if not settings.SHARDED_ROUTING_ENABLED:
+        return httpx.Client(timeout=10.0)
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = httpx.Client(timeout=10.0)
+    return nullcontext(_shared_client)
+
+
+def deliver_webhook(target_url: str, payload: Union[dict, bytes], attempt_id: Optional[uuid.UUID] = None) -> dict:
+    """Deliver a webhook payload to the target URL
+    
+    The payload is either the stored JSON document or, for envelope deliveries,
+    the raw request body as received by ingest (sent through unchanged). The
+    attempt ID, if given, is sent so receivers can spot repeated attempts.
+    """
+    headers = {attempts.ATTEMPT_HEADER: str(attempt_id)} if attempt_id else {}
+    started = time.monotonic()
     try:
         # Set timeout as per SRS (5-10 seconds)
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(target_url, json=payload)
+        with _http_client() as client:
+            if isinstance(payload, (bytes, bytearray)):
+                response = client.post(
+                    target_url, content=payload, headers={"Content-Type": "application/json", **headers}
+                )
+            else:
+                response = client.post(target_url, json=payload, headers=headers)
             
             # Return success response
             return {
@@ -240,7 +655,8 @@ def deliver_webhook(target_url: str, payload: dict) -> dict:
                 "status_code": response.status_code,
                 "status": LogStatus.SUCCESS if 200 <= response.status_code < 300 else LogStatus.FAILED_ATTEMPT,
                 "error": f"HTTP {response.status_code}" if response.status_code >= 400 else None,
-                "error_details": None if 200 <= response.status_code < 300 else f"HTTP {response.status_code}"
+                "error_details": None if 200 <= response.status_code < 300 else f"HTTP {response.status_code}",
+                "elapsed": time.monotonic() - started
             }
             
     except Exception as e:
@@ -250,5 +666,7 @@ def deliver_webhook(target_url: str, payload: dict) -> dict:
             "status_code": None,
             "status": LogStatus.FAILED_ATTEMPT,
             "error": f"Unexpected error: {str(e)}",
-            "error_details": str(e)
+            "error_details": str(e),
+            "elapsed": time.monotonic() - started,
+            "timed_out": isinstance(e, httpx.TimeoutException)
         }
\ No newline at end of file
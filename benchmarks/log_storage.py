@@ -0,0 +1,191 @@
+"""
+Delivery log storage: full rows vs compact rows and the success policies.
+
+Loads sample success and failure rows into scratch tables shaped like
+delivery_logs before compaction (target_url on every row, integer columns,
+enum status) and after it (no target_url, smallint columns, error_details
+cut to LOG_COMPACT_ERROR_DETAILS_MAX_CHARS), with the real table's indexes.
+The measured bytes per row, heap plus indexes, are then projected to a
+number of attempts for each LOG_SUCCESS_POLICY:
+
+    python -m benchmarks.log_storage --rows 1000000 --attempts 100000000
+
+Pass --rows 100000000 to measure at full scale instead of projecting.
+Projections leave out delivery_counters, which holds one row per
+subscription and hour whatever the volume. The scratch tables are dropped
+afterwards unless --keep is given.
+"""
+import argparse
+import io
+import random
+import time
+import uuid
+
+from app.core.config import settings
+from app.db.base import engine
+from app.db.ids import uuid7
+
+_CREATE_SQL = {
+    "full": """
+        DROP TABLE IF EXISTS {table};
+        DO $$ BEGIN
+            CREATE TYPE bench_log_status AS ENUM ('SUCCESS', 'FAILED_ATTEMPT', 'FAILURE');
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$;
+        CREATE TABLE {table} (
+            id uuid NOT NULL,
+            delivery_task_id uuid NOT NULL,
+            subscription_id uuid NOT NULL,
+            target_url varchar NOT NULL,
+            attempt_number integer NOT NULL,
+            status bench_log_status NOT NULL,
+            status_code integer,
+            error_details text,
+            created_at timestamp NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        );
+    """,
+    "compact": """
+        DROP TABLE IF EXISTS {table};
+        CREATE TABLE {table} (
+            id uuid NOT NULL,
+            delivery_task_id uuid NOT NULL,
+            subscription_id uuid NOT NULL,
+            target_url varchar,
+            attempt_number smallint NOT NULL,
+            status smallint NOT NULL,
+            status_code smallint,
+            error_details text,
+            created_at timestamp NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        );
+    """,
+}
+
+# Secondary indexes of delivery_logs, in place before loading so inserts pay for them
+_INDEX_SQL = """
+    CREATE INDEX ON {table} (delivery_task_id);
+    CREATE INDEX ON {table} (status);
+    CREATE INDEX ON {table} (created_at);
+    CREATE INDEX ON {table} (subscription_id, created_at);
+"""
+
+_SIZE_SQL = "SELECT pg_total_relation_size('{table}')"
+
+STATUS = {
+    "full": {"SUCCESS": "SUCCESS", "FAILED_ATTEMPT": "FAILED_ATTEMPT"},
+    "compact": {"SUCCESS": "1", "FAILED_ATTEMPT": "2"},
+}
+
+SUBSCRIPTIONS = [uuid.uuid4() for _ in range(1000)]
+
+
+def _error_details(length: int) -> str:
+    # Receiver bodies vary, so compression can't hide the difference
+    return "HTTP 503: " + "".join(random.choices("abcdefghijklmnopqrstuvwxyz ", k=length))
+
+
+def _batch(layout: str, kind: str, size: int, error_length: int) -> io.StringIO:
+    buffer = io.StringIO()
+    for i in range(size):
+        subscription_id = SUBSCRIPTIONS[i % len(SUBSCRIPTIONS)]
+        target_url = r"\N" if layout == "compact" else f"https://hooks.example.com/webhooks/{subscription_id}"
+        if kind == "SUCCESS":
+            status_code, error = "200", r"\N"
+        else:
+            status_code, error = "503", _error_details(error_length)
+            if layout == "compact":
+                error = error[:settings.LOG_COMPACT_ERROR_DETAILS_MAX_CHARS]
+        buffer.write(
+            f"{uuid7()}\t{uuid.uuid4()}\t{subscription_id}\t{target_url}\t{i % 5 + 1}\t"
+            f"{STATUS[layout][kind]}\t{status_code}\t{error}\n"
+        )
+    buffer.seek(0)
+    return buffer
+
+
+def measure(layout: str, kind: str, rows: int, batch_size: int, error_length: int) -> float:
+    """Load rows of one kind into a scratch table; returns bytes per row, heap plus indexes"""
+    table = f"bench_logs_{layout}_{kind.lower()}"
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(_CREATE_SQL[layout].format(table=table))
+        cursor.execute(_INDEX_SQL.format(table=table))
+        connection.commit()
+
+        inserted = 0
+        start = time.perf_counter()
+        while inserted < rows:
+            size = min(batch_size, rows - inserted)
+            cursor.copy_expert(
+                f"COPY {table} (id, delivery_task_id, subscription_id, target_url, attempt_number, "
+                f"status, status_code, error_details) FROM STDIN",
+                _batch(layout, kind, size, error_length)
+            )
+            connection.commit()
+            inserted += size
+        elapsed = time.perf_counter() - start
+
+        cursor.execute(_SIZE_SQL.format(table=table))
+        total_bytes = cursor.fetchone()[0]
+        print(
+            f"{table:<30} {inserted:>11} rows  {inserted / elapsed:>9.0f} rows/s  "
+            f"{total_bytes / 2**20:>9.1f} MiB  {total_bytes / inserted:>6.1f} bytes/row"
+        )
+        return total_bytes / inserted
+    finally:
+        connection.close()
+
+
+def _drop(tables) -> None:
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("; ".join(f"DROP TABLE IF EXISTS {table}" for table in tables))
+        cursor.execute("DROP TYPE IF EXISTS bench_log_status")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Sample rows per layout and kind")
+    parser.add_argument("--attempts", type=int, default=100_000_000, help="Attempts to project to")
+    parser.add_argument("--success-ratio", type=float, default=0.95)
+    parser.add_argument("--sample-rate", type=float, default=settings.LOG_SUCCESS_SAMPLE_RATE)
+    parser.add_argument("--error-length", type=int, default=1000, help="Characters of error_details per failure")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch tables for inspection")
+    args = parser.parse_args()
+
+    per_row = {}
+    for layout in ("full", "compact"):
+        for kind in ("SUCCESS", "FAILED_ATTEMPT"):
+            per_row[layout, kind] = measure(layout, kind, args.rows, args.batch_size, args.error_length)
+
+    successes = args.attempts * args.success_ratio
+    failures = args.attempts - successes
+    scenarios = [
+        ("full, log all", "full", successes),
+        ("compact, log all", "compact", successes),
+        (f"compact, sample {args.sample_rate:g}", "compact", successes * args.sample_rate),
+        ("compact, aggregate", "compact", 0),
+    ]
+    baseline = None
+    print(f"\nProjected to {args.attempts} attempts, {args.success_ratio:.0%} successes:")
+    for name, layout, logged_successes in scenarios:
+        size = logged_successes * per_row[layout, "SUCCESS"] + failures * per_row[layout, "FAILED_ATTEMPT"]
+        baseline = baseline or size
+        print(
+            f"{name:<24} {logged_successes + failures:>13.0f} rows  "
+            f"{size / 2**30:>9.1f} GiB  {size / baseline:>6.1%} of full"
+        )
+
+    if not args.keep:
+        _drop(f"bench_logs_{layout}_{kind.lower()}" for layout, kind in per_row)
+
+
+if __name__ == "__main__":
+    main()
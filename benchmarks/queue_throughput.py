@@ -0,0 +1,97 @@
+"""
+Broker throughput comparison: Celery/kombu messages vs Redis Streams entries.
+
+Publishes and then drains N delivery messages through both transports against
+the configured Redis, without touching the database or the network, so the
+numbers isolate queueing overhead per webhook:
+
+    python -m benchmarks.queue_throughput --messages 50000
+
+The Celery side sends real process_webhook_delivery messages (including the
+kombu envelope and the configured serializer) to a scratch queue and drains
+them with a plain kombu consumer; the Streams side uses the same XADD and
+XREADGROUP/XACK calls as RedisStreamsQueueBackend and StreamsConsumer.
+"""
+import argparse
+import time
+import uuid
+
+from app.core.config import settings
+from app.services.cache import redis_client
+from app.workers.celery_app import celery_app
+from app.workers.queue import RedisStreamsQueueBackend
+
+BENCH_QUEUE = "bench-webhooks"
+BENCH_STREAM = "bench:webhooks:deliveries"
+BENCH_GROUP = "bench-workers"
+
+
+def _report(label: str, count: int, elapsed: float) -> None:
+    print(f"{label:<28} {count:>8} msgs  {elapsed:8.2f}s  {count / elapsed:>10.0f} msg/s")
+
+
+def bench_celery(task_ids, batch_size):
+    with celery_app.connection_for_write() as conn:
+        with celery_app.producer_or_acquire() as producer:
+            start = time.perf_counter()
+            for task_id in task_ids:
+                celery_app.send_task(
+                    "app.workers.tasks.process_webhook_delivery",
+                    args=[task_id, None], queue=BENCH_QUEUE, producer=producer
+                )
+            _report("celery publish", len(task_ids), time.perf_counter() - start)
+
+        queue = conn.SimpleQueue(BENCH_QUEUE)
+        start = time.perf_counter()
+        drained = 0
+        while drained < len(task_ids):
+            message = queue.get(block=True, timeout=5)
+            message.ack()
+            drained += 1
+        _report("celery consume+ack", drained, time.perf_counter() - start)
+        queue.close()
+
+
+def bench_streams(task_ids, batch_size):
+    settings.STREAMS_DELIVERY_KEY = BENCH_STREAM
+    backend = RedisStreamsQueueBackend(redis_client)
+    redis_client.delete(BENCH_STREAM)
+    redis_client.xgroup_create(BENCH_STREAM, BENCH_GROUP, id="0", mkstream=True)
+
+    start = time.perf_counter()
+    for i in range(0, len(task_ids), batch_size):
+        backend.enqueue_many(task_ids[i:i + batch_size])
+    _report("streams publish (pipelined)", len(task_ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    drained = 0
+    while drained < len(task_ids):
+        response = redis_client.xreadgroup(
+            BENCH_GROUP, "bench", {BENCH_STREAM: ">"}, count=batch_size, block=1000
+        )
+        if not response:
+            break
+        entry_ids = [entry_id for entry_id, _ in response[0][1]]
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.xack(BENCH_STREAM, BENCH_GROUP, *entry_ids)
+        pipe.xdel(BENCH_STREAM, *entry_ids)
+        pipe.execute()
+        drained += len(entry_ids)
+    _report("streams consume+ack", drained, time.perf_counter() - start)
+
+    redis_client.delete(BENCH_STREAM)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=settings.STREAMS_READ_COUNT)
+    args = parser.parse_args()
+
+    task_ids = [str(uuid.uuid4()) for _ in range(args.messages)]
+    bench_celery(task_ids, args.batch_size)
+    bench_streams(task_ids, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
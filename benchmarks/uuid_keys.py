@@ -0,0 +1,108 @@
+"""
+Primary key comparison: random UUIDv4 vs time-ordered UUIDv7 (app.db.ids).
+
+Inserts N rows shaped like delivery_logs into two scratch tables, one keyed
+by each UUID version, and reports insert throughput - overall and for the
+last tenth, where random keys hurt most - plus the final size of each
+table's primary key index and how many of its pages were read from disk:
+
+    python -m benchmarks.uuid_keys --rows 10000000
+
+Rows are loaded with COPY in batches, one transaction each, so the numbers
+isolate index maintenance from per-statement overhead. The scratch tables
+are dropped afterwards unless --keep is given.
+"""
+import argparse
+import io
+import time
+import uuid
+
+from app.db.base import engine
+from app.db.ids import uuid7
+
+TABLES = {"bench_keys_v4": uuid.uuid4, "bench_keys_v7": uuid7}
+
+_CREATE_SQL = """
+    DROP TABLE IF EXISTS {table};
+    CREATE TABLE {table} (
+        id uuid PRIMARY KEY,
+        delivery_task_id uuid NOT NULL,
+        attempt_number integer NOT NULL,
+        status_code integer,
+        created_at timestamp NOT NULL DEFAULT now()
+    );
+"""
+
+_STATS_SQL = """
+    SELECT pg_relation_size('{table}_pkey'), pg_relation_size('{table}'),
+           COALESCE(idx_blks_read, 0), COALESCE(idx_blks_hit, 0)
+    FROM pg_statio_user_tables WHERE relname = '{table}'
+"""
+
+
+def _batch(generate, size: int) -> io.StringIO:
+    task_id = uuid.uuid4()
+    buffer = io.StringIO()
+    for i in range(size):
+        buffer.write(f"{generate()}\t{task_id}\t{i % 5 + 1}\t200\n")
+    buffer.seek(0)
+    return buffer
+
+
+def bench(table: str, generate, rows: int, batch_size: int) -> None:
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(_CREATE_SQL.format(table=table))
+        connection.commit()
+
+        tail_start = rows - rows // 10
+        inserted = 0
+        tail_elapsed = 0.0
+        start = time.perf_counter()
+        while inserted < rows:
+            size = min(batch_size, rows - inserted)
+            buffer = _batch(generate, size)
+            batch_start = time.perf_counter()
+            cursor.copy_expert(
+                f"COPY {table} (id, delivery_task_id, attempt_number, status_code) FROM STDIN", buffer
+            )
+            connection.commit()
+            if inserted >= tail_start:
+                tail_elapsed += time.perf_counter() - batch_start
+            inserted += size
+        elapsed = time.perf_counter() - start
+
+        cursor.execute(_STATS_SQL.format(table=table))
+        index_bytes, table_bytes, blocks_read, blocks_hit = cursor.fetchone()
+        print(
+            f"{table:<14} {inserted:>10} rows  {inserted / elapsed:>9.0f} rows/s  "
+            f"last 10%: {(rows - tail_start) / tail_elapsed if tail_elapsed else 0:>9.0f} rows/s  "
+            f"pkey {index_bytes / 2**20:>8.1f} MiB  table {table_bytes / 2**20:>8.1f} MiB  "
+            f"index blocks read/hit {blocks_read}/{blocks_hit}"
+        )
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch tables for inspection")
+    args = parser.parse_args()
+
+    for table, generate in TABLES.items():
+        bench(table, generate, args.rows, args.batch_size)
+
+    if not args.keep:
+        connection = engine.raw_connection()
+        try:
+            connection.cursor().execute("; ".join(f"DROP TABLE IF EXISTS {table}" for table in TABLES))
+            connection.commit()
+        finally:
+            connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import logging
+import signal
+import threading
+
+from app.workers.scheduler import run_mover
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+
+# This script serves as an entry point for the delay queue mover, which queues
+# retries and scheduled deliveries once they are due. Start it with: python delay_mover.py
+if __name__ == "__main__":
+    stop_event = threading.Event()
+
+    # Finish the current pass and exit cleanly on SIGTERM/SIGINT
+    signal.signal(signal.SIGTERM, lambda *args: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *args: stop_event.set())
+
+    run_mover(stop_event)
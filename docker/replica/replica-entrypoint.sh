@@ -0,0 +1,17 @@
+#!/bin/bash
+# Streaming replica of the db service for docker-compose.replica.yml: cloned
+# with pg_basebackup on first start, then kept in hot standby
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    echo "Cloning the primary..."
+    until PGPASSWORD="$POSTGRES_PASSWORD" pg_basebackup -h db -U "$POSTGRES_USER" -D "$PGDATA" -R -X stream -P; do
+        echo "Primary not ready, retrying..."
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+    chown -R postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+fi
+
+exec gosu postgres postgres -c hot_standby=on
@@ -0,0 +1,22 @@
+import logging
+import signal
+import threading
+
+from app.workers.fair_dispatcher import run_dispatcher
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+
+# This script serves as an entry point for the fair dispatcher, which moves
+# deliveries from the per-subscription sub-queues to the workers. Start it with: python fair_dispatcher.py
+if __name__ == "__main__":
+    stop_event = threading.Event()
+
+    # Finish the current pass and exit cleanly on SIGTERM/SIGINT
+    signal.signal(signal.SIGTERM, lambda *args: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *args: stop_event.set())
+
+    run_dispatcher(stop_event)
@@ -0,0 +1,22 @@
+import logging
+import signal
+import threading
+
+from app.workers.outbox import run_relay
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+
+# This script serves as an entry point for the transactional outbox relay,
+# used when WEBHOOK_OUTBOX_ENABLED=true. Start it with: python outbox_relay.py
+if __name__ == "__main__":
+    stop_event = threading.Event()
+
+    # Finish the current batch and exit cleanly on SIGTERM/SIGINT
+    signal.signal(signal.SIGTERM, lambda *args: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *args: stop_event.set())
+
+    run_relay(stop_event)
@@ -0,0 +1,22 @@
+import logging
+import signal
+import threading
+
+from app.workers.streams import StreamsConsumer
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+
+# This script serves as an entry point for the Redis Streams delivery worker,
+# used when DELIVERY_QUEUE_BACKEND=streams. Start it with: python stream_worker.py
+if __name__ == "__main__":
+    stop_event = threading.Event()
+
+    # Finish the current batch and exit cleanly on SIGTERM/SIGINT
+    signal.signal(signal.SIGTERM, lambda *args: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *args: stop_event.set())
+
+    StreamsConsumer().run(stop_event)
@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.api import pagination
+from app.api.main import app
+from app.core.config import settings
+
+
+client = TestClient(app)
+
+
+def test_cursor_round_trips_row_key():
+    """Test that a cursor decodes back to the key of the row it was made from."""
+    created_at, id = datetime(2025, 10, 19, 12, 30, 1, 123456), uuid.uuid4()
+    cursor = pagination.encode_cursor(created_at, id)
+
+    assert "=" not in cursor
+    assert pagination.decode_cursor(cursor) == (created_at, id)
+
+
+def test_next_cursor_only_when_a_row_is_left_over():
+    """Test that the next cursor points at the page's last row and is absent on the last page."""
+    rows = [SimpleNamespace(created_at=datetime(2025, 10, 19, 12, i), id=uuid.uuid4()) for i in range(3)]
+
+    assert pagination.next_cursor(rows, 3) is None
+    assert pagination.decode_cursor(pagination.next_cursor(rows, 2)) == (rows[1].created_at, rows[1].id)
+
+
+def test_invalid_cursor_is_rejected():
+    """Test that malformed cursors are a client error rather than a server error."""
+    with pytest.raises(HTTPException) as error:
+        pagination.decode_cursor("not-a-cursor")
+    assert error.value.status_code == 400
+
+    response = client.get(f"{settings.API_V1_STR}/deliveries/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
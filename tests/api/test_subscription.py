@@ -108,4 +108,22 @@ def test_delete_subscription():
     response = client.get(
         f"{settings.API_V1_STR}/subscriptions/{subscription_id}"
     )
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_subscription_stats_accepts_offset_times():
+    """Test that stats ranges with a UTC offset are converted to naive UTC"""
+    response = client.post(
+        f"{settings.API_V1_STR}/subscriptions/",
+        json={"target_url": "https://webhook.site/stats-test"},
+    )
+    assert response.status_code == 200
+    subscription_id = response.json()["id"]
+    
+    response = client.get(
+        f"{settings.API_V1_STR}/subscriptions/{subscription_id}/stats",
+        params={"start": "2025-10-01T14:30:00+02:00", "end": "2025-10-01T18:00:00+02:00"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["start"] == "2025-10-01T12:00:00"
+    assert data["end"] == "2025-10-01T16:00:00"
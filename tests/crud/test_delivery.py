@@ -1,9 +1,11 @@
 import pytest
 from datetime import datetime, timedelta
 import uuid
+from unittest.mock import MagicMock, patch
 
-from app.db.models.delivery_log import DeliveryLog, DeliveryStatus as LogStatus
+from app.db.models.delivery_log import DeliveryLog, DeliveryStatus as LogStatus, StatusCode, STATUS_CODES
 from app.crud.crud_delivery import cleanup_old_logs
+from app.crud import crud_delivery
 from app.core.config import settings
 
 
@@ -74,4 +76,97 @@ def test_cleanup_old_logs(db):
     # Verify all remaining logs are recent
     retention_cutoff = datetime.utcnow() - timedelta(hours=settings.LOG_RETENTION_HOURS)
     for log in remaining_logs:
-        assert log.created_at > retention_cutoff
\ No newline at end of file
+        assert log.created_at > retention_cutoff
+
+
+def test_status_stored_as_smallint_code():
+    """Test that statuses round-trip through their stored codes."""
+    column_type = StatusCode()
+    for status, code in STATUS_CODES.items():
+        assert column_type.process_bind_param(status, None) == code
+        assert column_type.process_bind_param(status.value, None) == code
+        assert column_type.process_result_value(code, None) is status
+    assert len(set(STATUS_CODES.values())) == len(LogStatus)
+
+
+def test_failures_are_always_logged():
+    """Test that every success policy still logs every failure."""
+    for policy in ("all", "sample", "aggregate"):
+        with patch.object(settings, "LOG_SUCCESS_POLICY", policy):
+            assert crud_delivery.should_log(uuid.uuid4(), LogStatus.FAILED_ATTEMPT)
+            assert crud_delivery.should_log(uuid.uuid4(), LogStatus.FAILURE)
+
+
+def test_success_policies():
+    """Test that successes are logged, sampled by task ID, or left to the counters."""
+    task_ids = [uuid.uuid4() for _ in range(10000)]
+
+    with patch.object(settings, "LOG_SUCCESS_POLICY", "all"):
+        assert all(crud_delivery.should_log(task_id, LogStatus.SUCCESS) for task_id in task_ids)
+
+    with patch.object(settings, "LOG_SUCCESS_POLICY", "sample"), \
+         patch.object(settings, "LOG_SUCCESS_SAMPLE_RATE", 0.1):
+        sampled = [task_id for task_id in task_ids if crud_delivery.should_log(task_id, LogStatus.SUCCESS)]
+        assert 800 < len(sampled) < 1200
+        # The same task always gets the same answer
+        assert all(crud_delivery.should_log(task_id, LogStatus.SUCCESS) for task_id in sampled)
+
+    with patch.object(settings, "LOG_SUCCESS_POLICY", "aggregate"):
+        assert not any(crud_delivery.should_log(task_id, LogStatus.SUCCESS) for task_id in task_ids)
+
+
+def test_compact_mode_drops_target_url_and_truncates_errors():
+    """Test that compact log rows leave out the target URL and cut long error details."""
+    db = MagicMock()
+
+    with patch.object(settings, "LOG_COMPACT_MODE", True), \
+         patch.object(settings, "LOG_COMPACT_ERROR_DETAILS_MAX_CHARS", 16):
+        log = crud_delivery.create_delivery_log(
+            db, task_id=uuid.uuid4(), subscription_id=uuid.uuid4(), target_url="https://example.com/hook",
+            attempt_number=1, status=LogStatus.FAILED_ATTEMPT, status_code=503,
+            error_details="HTTP 503: " + "x" * 1000
+        )
+
+    assert log.target_url is None
+    assert log.error_details == "HTTP 503: xxxxxx"
+    db.add.assert_called_once_with(log)
+
+
+def test_fenced_status_update_is_a_single_conditional_update():
+    """Test that the attempt fence and the status write are one UPDATE ... RETURNING."""
+    from sqlalchemy.dialects import postgresql
+    from app.db.models.delivery_task import DeliveryStatus as TaskStatus
+
+    db = MagicMock()
+    db.scalars.return_value.first.return_value = None
+    assert crud_delivery.update_task_status(
+        db, task_id=uuid.uuid4(), status=TaskStatus.COMPLETED, attempt_id=uuid.uuid4()
+    ) is None
+
+    sql = str(db.scalars.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE delivery_tasks SET")
+    assert "delivery_tasks.attempt_id = " in sql and "delivery_tasks.status = " in sql
+    assert "lease_expires_at=" in sql and "RETURNING" in sql
+    db.query.assert_not_called()
+
+
+def test_ordered_task_takes_its_sequence_from_its_ordering_key():
+    """Test that an ordered task's sequence comes from an upsert on its key's row, not the subscription's."""
+    from sqlalchemy.dialects import postgresql
+    from app.api.schemas.delivery import DeliveryTaskCreate
+
+    db = MagicMock()
+    db.execute.return_value.scalar_one.return_value = 7
+    subscription_id = uuid.uuid4()
+    task = crud_delivery.create_delivery_task(db, obj_in=DeliveryTaskCreate(
+        subscription_id=subscription_id, payload={}, event_type="order.created",
+        ordering_key=f"{subscription_id}:customer-1",
+    ))
+
+    assert task.sequence == 7
+    statement = db.execute.call_args[0][0]
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO ordering_sequences")
+    assert "ON CONFLICT (ordering_key) DO UPDATE SET last_sequence = (ordering_sequences.last_sequence + " in sql
+    assert statement.compile().params["ordering_key"] == f"{subscription_id}:customer-1"
+    assert "subscriptions" not in sql
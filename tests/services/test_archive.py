@@ -0,0 +1,68 @@
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from app.core.config import settings
+from app.db.models.delivery_log import STATUS_CODES, DeliveryStatus
+from app.services import archive
+
+HOUR = datetime(2025, 10, 1, 12)
+
+
+def _log(subscription_id, minute, status="SUCCESS", status_code=200):
+    return (uuid.uuid4(), uuid.uuid4(), subscription_id, "https://example.com/hook", 1,
+            STATUS_CODES[DeliveryStatus(status)], status_code, None, HOUR + timedelta(minutes=minute))
+
+
+def test_archive_writes_one_indexed_file_per_subscription(tmp_path):
+    """Test that an hour's logs are split by subscription and indexed with their ranges."""
+    first, second = sorted([uuid.uuid4(), uuid.uuid4()], key=str)
+    db = MagicMock()
+    db.execute.return_value = iter([
+        _log(first, 5), _log(first, 50, "FAILED_ATTEMPT", 503), _log(second, 10),
+    ])
+
+    with patch.object(settings, "LOG_ARCHIVE_DIR", str(tmp_path)):
+        assert archive.archive_window(db, HOUR, HOUR + timedelta(hours=1)) == 3
+
+        entries = list(archive._index_entries())
+        assert [(e["subscription_id"], e["rows"]) for e in entries] == [(str(first), 2), (str(second), 1)]
+        assert entries[0]["min_status_code"] == 200 and entries[0]["max_status_code"] == 503
+        assert (tmp_path / entries[0]["file"]).exists()
+
+
+def test_query_only_scans_files_that_can_match(tmp_path):
+    """Test that the index prunes files by subscription and time range before reading them."""
+    first, second = sorted([uuid.uuid4(), uuid.uuid4()], key=str)
+    db = MagicMock()
+    db.execute.return_value = iter([_log(first, 5), _log(first, 50), _log(second, 10)])
+
+    with patch.object(settings, "LOG_ARCHIVE_DIR", str(tmp_path)):
+        archive.archive_window(db, HOUR, HOUR + timedelta(hours=1))
+
+        result = archive.query(subscription_id=str(first), start=HOUR + timedelta(minutes=30))
+        assert result["files_indexed"] == 2
+        assert result["files_scanned"] == 1
+        assert [log["created_at"] for log in result["logs"]] == [(HOUR + timedelta(minutes=50)).isoformat()]
+
+        assert archive.query(end=HOUR)["files_scanned"] == 0
+        assert archive.query(status_code=404)["files_scanned"] == 0
+
+
+def test_search_endpoint_takes_times_with_an_offset(tmp_path):
+    """Test that the search endpoint converts offset times to the archive's naive UTC."""
+    from fastapi.testclient import TestClient
+    from app.api.main import app
+
+    subscription_id = uuid.uuid4()
+    db = MagicMock()
+    db.execute.return_value = iter([_log(subscription_id, 5), _log(subscription_id, 50)])
+
+    with patch.object(settings, "LOG_ARCHIVE_DIR", str(tmp_path)):
+        archive.archive_window(db, HOUR, HOUR + timedelta(hours=1))
+
+        response = TestClient(app).get(
+            f"{settings.API_V1_STR}/archive/logs", params={"start": "2025-10-01T14:30:00+02:00"}
+        )
+        assert response.status_code == 200
+        assert [log["created_at"] for log in response.json()["logs"]] == [(HOUR + timedelta(minutes=50)).isoformat()]
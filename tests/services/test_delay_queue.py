@@ -0,0 +1,59 @@
+import uuid
+import fakeredis
+
+from app.core.config import settings
+from app.services import delay_queue
+
+
+def test_tasks_are_spread_across_shards():
+    """Test that shard selection is stable and uses every shard."""
+    task_ids = [str(uuid.uuid4()) for _ in range(500)]
+
+    shards = {delay_queue.shard_for(task_id) for task_id in task_ids}
+    assert shards == set(range(settings.DELAY_QUEUE_SHARDS))
+    assert delay_queue.shard_for(task_ids[0]) == delay_queue.shard_for(task_ids[0])
+
+
+def test_schedule_stores_one_member_per_task():
+    """Test that scheduling stores (due_time, task_id) in the task's shard."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    task_id = str(uuid.uuid4())
+
+    delay_queue.schedule(task_id, 1234.5, client=client)
+    delay_queue.schedule_many([str(uuid.uuid4()), str(uuid.uuid4())], 99.0, client=client)
+
+    key = delay_queue.shard_key(delay_queue.shard_for(task_id))
+    assert client.zscore(key, task_id) == 1234.5
+    assert delay_queue.size(client=client) == 3
+
+
+def test_pop_due_moves_due_entries_to_processing():
+    """Test that only due entries are popped, and they stay in processing until acked."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    due, later = str(uuid.uuid4()), str(uuid.uuid4())
+    delay_queue.schedule(due, 100.0, client=client)
+    delay_queue.schedule(later, 200.0, client=client)
+
+    assert delay_queue.pop_due(now=150.0, client=client) == [due]
+    assert delay_queue.pop_due(now=150.0, client=client) == []
+    assert delay_queue.size(client=client) == 1
+
+    processing = delay_queue.processing_key(delay_queue.shard_for(due))
+    assert client.zrange(processing, 0, -1) == [due]
+
+    delay_queue.ack([due], client=client)
+    assert client.zcard(processing) == 0
+
+
+def test_recover_requeues_entries_never_acked():
+    """Test that entries a crashed mover popped become due again after the timeout."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    task_id = str(uuid.uuid4())
+    delay_queue.schedule(task_id, 100.0, client=client)
+
+    assert delay_queue.pop_due(now=150.0, client=client) == [task_id]
+    # Still within the timeout - the mover may be busy queueing it
+    assert delay_queue.recover(timeout=60, client=client) == 0
+
+    assert delay_queue.recover(timeout=-1, client=client) == 1
+    assert delay_queue.pop_due(client=client) == [task_id]
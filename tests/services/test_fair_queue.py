@@ -0,0 +1,40 @@
+import fakeredis
+
+from app.services import fair_queue
+
+
+def test_dispatch_is_weighted_round_robin():
+    """Test that a noisy subscription can't starve a quiet one."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    fair_queue.push("noisy", [f"n{i}" for i in range(1000)], weight=1, client=client)
+    fair_queue.push("quiet", ["q0", "q1"], weight=1, client=client)
+    fair_queue.push("heavy", [f"h{i}" for i in range(1000)], weight=2, client=client)
+
+    served = {sub: items for sub, items, _ in fair_queue.dispatch(3, limit=100, client=client)}
+
+    assert served["quiet"] == ["q0", "q1"]
+    assert len(served["heavy"]) == 2 * len(served["noisy"])
+    assert served["noisy"][0] == "n0"
+
+
+def test_emptied_sub_queue_leaves_the_ring():
+    """Test that drained subscriptions stop being visited."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    fair_queue.push("sub", ["t1"], client=client)
+    assert fair_queue.active_count(client=client) == 1
+
+    assert fair_queue.dispatch(5, limit=10, client=client) == [("sub", ["t1"], 1.0)]
+    assert fair_queue.active_count(client=client) == 0
+    assert fair_queue.backlog("sub", client=client) == 0
+
+
+def test_limited_visit_banks_at_most_one_share():
+    """Test that a deficit left by a visit cut short by the limit doesn't grow without bound."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    fair_queue.push("sub", [f"t{i}" for i in range(1000)], weight=1, client=client)
+
+    for _ in range(20):
+        fair_queue.dispatch(1, limit=1, client=client)
+
+    deficit = float(client.hget(fair_queue._key("deficits"), "sub"))
+    assert deficit <= fair_queue.settings.FAIR_QUANTUM
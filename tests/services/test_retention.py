@@ -0,0 +1,44 @@
+import fakeredis
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.core.config import settings
+from app.services import retention
+
+
+def _chunk(start, count):
+    base = datetime(2025, 1, 1)
+    return [SimpleNamespace(key_time=base + timedelta(seconds=start + i), id=f"id-{start + i:04d}")
+            for i in range(count)]
+
+
+def test_policy_cutoff_uses_its_own_setting():
+    """Test that each policy's cutoff comes from its retention setting."""
+    now = datetime(2025, 1, 10)
+
+    assert retention.LOGS.cutoff(now) == now - timedelta(hours=settings.LOG_RETENTION_HOURS)
+    assert retention.FAILED_TASKS.cutoff(now) == now - timedelta(days=settings.FAILED_TASK_RETENTION_DAYS)
+    assert "'COMPLETED'" in retention.COMPLETED_TASKS.where
+
+
+def test_run_stops_at_time_budget_and_resumes_from_checkpoint():
+    """Test that an interrupted run checkpoints its position and the next run resumes there."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    db = MagicMock()
+    db.execute.return_value.all.side_effect = [_chunk(0, 2), _chunk(2, 1)]
+
+    with patch.object(retention, "redis_client", client), \
+            patch.object(settings, "RETENTION_CHUNK_SIZE", 2):
+        first = retention.run_policy(db, retention.FAILED_TASKS, max_seconds=0, sleep=lambda _: None)
+        assert first["deleted"] == 2 and not first["complete"]
+        assert retention.load_checkpoint(retention.FAILED_TASKS)[1] == "id-0001"
+
+        second = retention.run_policy(db, retention.FAILED_TASKS, max_seconds=0, sleep=lambda _: None)
+        params = db.execute.call_args_list[-1].args[1]
+        assert params["after_id"] == "id-0001"
+        assert second["deleted"] == 1 and second["complete"]
+
+        # A finished run starts over and reports its throughput
+        assert retention.load_checkpoint(retention.FAILED_TASKS) is None
+        assert retention.last_reports()["failed_tasks"]["deleted"] == 1
@@ -0,0 +1,101 @@
+import time
+import fakeredis
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services import retry_policy, retry_budget
+
+
+def test_default_policy_starts_at_first_delay():
+    """Test that the first retry uses the first configured delay (with jitter)."""
+    delays = settings.WEBHOOK_RETRY_DELAYS
+    ratio = settings.RETRY_JITTER_RATIO
+
+    first = retry_policy.retry_delay(None, 1)
+    assert delays[0] * (1 - ratio) <= first <= delays[0] * (1 + ratio)
+    assert retry_policy.retry_delay(None, len(delays) + 1) is None
+
+
+def test_custom_policy_runs_out_of_delays():
+    """Test that custom policies stop retrying after their last delay."""
+    policy = {"strategy": retry_policy.CUSTOM, "delays": [5, 50], "max_retries": 3}
+
+    assert retry_policy.retry_delay(policy, 2) is not None
+    assert retry_policy.retry_delay(policy, 3) is None
+    assert retry_policy.max_retries_for(policy) == 3
+    assert retry_policy.max_retries_for(None) == settings.WEBHOOK_MAX_RETRIES
+
+
+def test_capped_and_decorrelated_never_exceed_max_delay():
+    """Test that bounded strategies respect max_delay for late attempts."""
+    for strategy in (retry_policy.CAPPED, retry_policy.DECORRELATED_JITTER):
+        policy = {"strategy": strategy, "base_delay": 10, "max_delay": 120}
+        for attempt in range(1, 20):
+            assert 0 <= retry_policy.retry_delay(policy, attempt) <= 120
+
+
+def test_retry_budget_defers_retries_over_budget():
+    """Test that retries beyond the budget are deferred rather than dropped."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+
+    with patch.object(retry_budget, "redis_client", client), \
+         patch.object(settings, "RETRY_BUDGET_MIN_RETRIES", 2), \
+         patch.object(settings, "RETRY_BUDGET_RATIO", 0.0):
+        admitted = [retry_budget.admit_retry(0) for _ in range(3)]
+
+    assert admitted[:2] == [0, 0]
+    assert admitted[2] >= settings.RETRY_BUDGET_DEFER_SECONDS
+
+
+def _window_start() -> float:
+    """Start of the current budget window, so frozen times stay within their window"""
+    window = settings.RETRY_BUDGET_WINDOW_SECONDS
+    return time.time() // window * window
+
+
+def test_retry_budget_compares_retries_with_attempts_of_their_window():
+    """Test that a retry's budget comes from the attempts of the window it will run in."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    now = _window_start()
+    window = settings.RETRY_BUDGET_WINDOW_SECONDS
+
+    with patch.object(retry_budget, "redis_client", client), \
+         patch.object(settings, "RETRY_BUDGET_MIN_RETRIES", 0), \
+         patch.object(settings, "RETRY_BUDGET_RATIO", 0.5), \
+         patch.object(retry_budget, "time") as mock_time:
+        # 4 attempts in the current window, 10 in the next one
+        for moment, attempts in ((now, 4), (now + window, 10)):
+            mock_time.time.return_value = moment
+            for _ in range(attempts):
+                retry_budget.record_attempt()
+
+        mock_time.time.return_value = now
+        # The next window allows 5 retries from its own attempts
+        next_window = [retry_budget.admit_retry(window) for _ in range(6)]
+        # A window that hasn't started yet borrows the current window's 4 attempts
+        later = [retry_budget.admit_retry(window * 100) for _ in range(3)]
+
+    assert next_window[:5] == [window] * 5
+    assert next_window[5] > window
+    assert later[:2] == [window * 100] * 2
+    assert later[2] > window * 100
+
+
+def test_retry_budget_charges_deferred_retries_to_their_new_window():
+    """Test that a deferred retry is counted in the window it was moved to, not the planned one."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    now = _window_start()
+
+    with patch.object(retry_budget, "redis_client", client), \
+         patch.object(settings, "RETRY_BUDGET_MIN_RETRIES", 1), \
+         patch.object(settings, "RETRY_BUDGET_RATIO", 0.0), \
+         patch.object(retry_budget, "time") as mock_time:
+        mock_time.time.return_value = now
+        assert retry_budget.admit_retry(0) == 0
+        deferred = retry_budget.admit_retry(0)
+
+    planned_key = retry_budget.RETRY_BUDGET_KEY.format(retry_budget._window(now), "retries")
+    deferred_key = retry_budget.RETRY_BUDGET_KEY.format(retry_budget._window(now + deferred), "retries")
+    assert deferred_key != planned_key
+    assert client.get(planned_key) == "1"
+    assert client.get(deferred_key) == "1"
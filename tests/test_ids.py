@@ -0,0 +1,23 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app.db.ids import uuid7, uuid7_time
+
+
+def test_uuid7_sets_version_and_variant():
+    """Test that generated ids are valid RFC 9562 version 7 UUIDs."""
+    value = uuid7()
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert len({uuid7() for _ in range(1000)}) == 1000
+
+
+def test_uuid7_sorts_by_creation_time():
+    """Test that ids from later milliseconds sort after earlier ones and carry their time."""
+    first = uuid7()
+    time.sleep(0.002)
+    second = uuid7()
+
+    assert first < second
+    assert abs(uuid7_time(second) - datetime.utcnow()) < timedelta(seconds=5)
@@ -0,0 +1,55 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.db import partitions
+
+
+def _db(rows):
+    db = MagicMock()
+    db.execute.return_value = [SimpleNamespace(**row) for row in rows]
+    return db
+
+
+def test_list_partitions_parses_bounds():
+    """Test that partition bounds are parsed, including the legacy MINVALUE partition."""
+    db = _db([
+        {"name": "delivery_logs_p2025102100", "estimated_rows": 10,
+         "bound": "FOR VALUES FROM ('2025-10-21 00:00:00') TO ('2025-10-22 00:00:00')"},
+        {"name": "delivery_logs_legacy", "estimated_rows": 500,
+         "bound": "FOR VALUES FROM (MINVALUE) TO ('2025-10-21 00:00:00')"},
+    ])
+
+    result = partitions.list_partitions(db)
+    assert [p.name for p in result] == ["delivery_logs_legacy", "delivery_logs_p2025102100"]
+    assert result[0].start is None
+    assert result[0].end == datetime(2025, 10, 21)
+    assert result[1].end == datetime(2025, 10, 22)
+
+
+def test_drop_expired_partitions_only_drops_whole_partitions():
+    """Test that only partitions ending before the cutoff are dropped."""
+    listed = [
+        partitions.Partition("delivery_logs_legacy", None, datetime(2025, 10, 21), 500),
+        partitions.Partition("delivery_logs_p2025102100", datetime(2025, 10, 21), datetime(2025, 10, 22), 10),
+    ]
+    db = MagicMock()
+    with patch.object(partitions, "list_partitions", return_value=listed):
+        dropped, rows = partitions.drop_expired_partitions(db, datetime(2025, 10, 21, 12))
+
+    assert dropped == ["delivery_logs_legacy"]
+    assert rows == 500
+    statements = [str(call.args[0]) for call in db.execute.call_args_list]
+    assert "DROP TABLE IF EXISTS delivery_logs_legacy" in statements
+
+
+def test_ensure_partitions_continues_from_last_bound():
+    """Test that new partitions start where the newest one ends."""
+    listed = [partitions.Partition("delivery_logs_p2025102100", datetime(2025, 10, 21), datetime(2025, 10, 22), 0)]
+    db = MagicMock()
+    with patch.object(partitions, "list_partitions", return_value=listed), \
+         patch.object(partitions.settings, "LOG_PARTITION_INTERVAL_HOURS", 24), \
+         patch.object(partitions.settings, "LOG_PARTITION_PREMAKE_HOURS", 48):
+        created = partitions.ensure_partitions(db, now=datetime(2025, 10, 21, 6))
+
+    assert created == ["delivery_logs_p2025102200", "delivery_logs_p2025102300"]
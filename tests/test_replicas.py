@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.core.config import settings
+from app.db import base
+
+
+def _request(client="10.0.0.1"):
+    return SimpleNamespace(headers={}, client=SimpleNamespace(host=client))
+
+
+def test_pick_replica_skips_lagging_replicas():
+    """Test that replicas behind DB_REPLICA_MAX_LAG_SECONDS are skipped and none means the primary."""
+    replicas = [MagicMock(name="lagging"), MagicMock(name="current")]
+    lags = {0: settings.DB_REPLICA_MAX_LAG_SECONDS + 1, 1: 0.0}
+
+    with patch.object(base, "replica_engines", replicas), \
+            patch.object(base, "replica_lag", side_effect=lambda index: lags[index]):
+        assert {base.pick_replica() for _ in range(4)} == {replicas[1]}
+
+        lags[1] = float("inf")
+        assert base.pick_replica() is None
+
+
+def test_read_session_uses_primary_after_a_write():
+    """Test that a client that just wrote reads from the primary, and others from a replica."""
+    replica = MagicMock(name="replica")
+
+    with patch.object(base, "replica_engines", [replica]), \
+            patch.object(base, "replica_lag", return_value=0.0), \
+            patch.object(base, "wrote_recently", side_effect=lambda client: client == "10.0.0.1"):
+        session = next(base.get_read_db(_request("10.0.0.1")))
+        assert session.bind is base.engine
+
+        session = next(base.get_read_db(_request("10.0.0.2")))
+        assert session.bind is replica
+
+
+def test_replica_lag_treats_a_disconnected_replica_as_unavailable():
+    """Test that a replica whose WAL receiver is not streaming is never picked, however current it looks."""
+    replica = MagicMock(name="disconnected")
+    connection = replica.connect.return_value.__enter__.return_value
+    connection.execute.return_value.scalar.return_value = None
+
+    with patch.object(base, "replica_engines", [replica]), patch.dict(base._replica_lag, clear=True):
+        assert base.replica_lag(0) == float("inf")
+        assert base.pick_replica() is None
+
+        # The query itself must tell a stopped receiver apart from a caught-up one
+        assert "pg_stat_wal_receiver" in str(base.REPLICA_LAG_SQL)
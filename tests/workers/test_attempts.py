@@ -0,0 +1,28 @@
+import uuid
+import fakeredis
+from unittest.mock import patch
+
+from app.workers import attempts
+
+
+def test_redelivered_message_is_duplicate_after_claim():
+    """Test that only messages that already claimed their task are dropped."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+
+    with patch.object(attempts, "redis_client", client):
+        assert attempts.is_duplicate("msg-1") is False
+
+        attempts.record_claim("msg-1", uuid.uuid4())
+        assert attempts.is_duplicate("msg-1") is True
+        assert attempts.is_duplicate("msg-2") is False
+        assert client.ttl(attempts.MESSAGE_KEY.format("msg-1")) > 0
+
+
+def test_messages_without_id_are_never_duplicates():
+    """Test that direct calls without a broker message skip the dedupe check."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+
+    with patch.object(attempts, "redis_client", client):
+        attempts.record_claim(None, uuid.uuid4())
+        assert attempts.is_duplicate(None) is False
+        assert client.dbsize() == 0
@@ -0,0 +1,43 @@
+import time
+
+from app.workers.batching import BatchingPublisher
+
+
+def test_publishes_when_batch_is_full():
+    """Test that a full batch is published immediately."""
+    published = []
+    publisher = BatchingPublisher(published.append, max_size=3, max_delay_ms=10_000)
+
+    for i in range(7):
+        publisher.add(f"task-{i}")
+
+    assert published == [["task-0", "task-1", "task-2"], ["task-3", "task-4", "task-5"]]
+    assert publisher.pending() == 1
+
+
+def test_publishes_after_linger_time():
+    """Test that a partial batch is published once the linger time expires."""
+    published = []
+    publisher = BatchingPublisher(published.append, max_size=100, max_delay_ms=20)
+
+    publisher.add("task-0")
+    publisher.add("task-1")
+
+    deadline = time.time() + 2
+    while not published and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert published == [["task-0", "task-1"]]
+    assert publisher.pending() == 0
+
+
+def test_flush_and_publish_errors():
+    """Test that flush publishes leftovers and publish errors don't propagate."""
+    def failing_publish(batch):
+        raise RuntimeError("broker down")
+
+    publisher = BatchingPublisher(failing_publish, max_size=100, max_delay_ms=10_000)
+    publisher.add("task-0")
+    publisher.flush()
+
+    assert publisher.pending() == 0
@@ -0,0 +1,96 @@
+import json
+import time
+import uuid
+import fakeredis
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+from app.workers import coalescing
+
+
+def _row(payload):
+    return SimpleNamespace(id=uuid.uuid4(), event_type="order.created", payload=payload)
+
+
+def test_encode_batch_formats():
+    """Test JSON array and NDJSON batch bodies."""
+    items = [{"id": "a", "payload": {"n": 1}}, {"id": "b", "payload": {"n": 2}}]
+
+    assert json.loads(coalescing.encode_batch(items, coalescing.JSON_ARRAY)) == items
+
+    lines = coalescing.encode_batch(items, coalescing.NDJSON).decode().splitlines()
+    assert [json.loads(line) for line in lines] == items
+
+
+def test_fit_batch_respects_byte_cap():
+    """Test that the byte cap cuts the batch but never empties it."""
+    rows = [_row({"data": "x" * 500}) for _ in range(10)]
+
+    assert coalescing.fit_batch(rows, 10 * 1024 * 1024) == 10
+    assert 1 < coalescing.fit_batch(rows, 2048) < 10
+    assert coalescing.fit_batch(rows, 10) == 1
+
+
+def test_batch_config_defaults():
+    """Test that missing fields fall back to defaults and an empty config is off."""
+    config = coalescing.batch_config({"format": "ndjson"})
+    assert config["max_size"] == coalescing.DEFAULT_MAX_SIZE
+    assert config["linger_ms"] == coalescing.DEFAULT_LINGER_MS
+    assert config["format"] == coalescing.NDJSON
+    assert coalescing.batch_config(None) is None
+
+
+def test_kick_once_per_linger_window():
+    """Test that only the first kick in a linger window is queued."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    backend = MagicMock()
+    subscription_id = uuid.uuid4()
+
+    with patch.object(coalescing, "redis_client", client), \
+         patch("app.workers.queue.get_backend", return_value=backend):
+        assert coalescing.kick(subscription_id, {"linger_ms": 500}) is True
+        assert coalescing.kick(subscription_id, {"linger_ms": 500}) is False
+        assert coalescing.kick(subscription_id, {"linger_ms": 500}, immediate=True) is True
+
+    assert backend.enqueue_coalesced.call_count == 2
+    assert backend.enqueue_coalesced.call_args_list[0].kwargs["countdown"] == 0.5
+
+
+def test_streams_kick_waits_in_delay_queue_until_linger_passes():
+    """Test that with the Streams backend a lingering kick is sent by the mover, not right away."""
+    from app.services import delay_queue
+    from app.workers import scheduler
+    from app.workers.queue import RedisStreamsQueueBackend
+
+    client = fakeredis.FakeRedis(decode_responses=True)
+    backend = RedisStreamsQueueBackend(client)
+    subscription_id = uuid.uuid4()
+
+    with patch.object(coalescing, "redis_client", client), \
+         patch.object(delay_queue, "redis_client", client), \
+         patch("app.workers.queue.get_backend", return_value=backend):
+        assert coalescing.kick(subscription_id, {"linger_ms": 500}) is True
+        assert coalescing.kick(subscription_id, {"linger_ms": 500}) is False
+        assert client.xlen(backend.stream_key) == 0
+
+        assert scheduler.move_due_deliveries(now=time.time() + 1) == 1
+
+    entries = client.xrange(backend.stream_key)
+    assert [fields for _, fields in entries] == [{"c": str(subscription_id)}]
+    assert delay_queue.size(client=client) == 0
+
+
+def test_sweep_kicks_batching_subscriptions_with_due_tasks():
+    """Test that the sweep kicks every batching subscription it finds."""
+    rows = [
+        SimpleNamespace(id=uuid.uuid4(), batch_delivery={"linger_ms": 500}, priority_lane="high"),
+        SimpleNamespace(id=uuid.uuid4(), batch_delivery={}, priority_lane=None),
+    ]
+    db = MagicMock()
+    db.execute.return_value.all.return_value = rows
+
+    with patch.object(coalescing.kick_due_batches, "_db", db, create=True), \
+         patch.object(coalescing, "kick", return_value=True) as mock_kick:
+        assert coalescing.kick_due_batches() == 1
+
+    mock_kick.assert_called_once_with(rows[0].id, rows[0].batch_delivery, "high")
@@ -0,0 +1,41 @@
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.workers import concurrency
+
+
+def _healthy(count=100):
+    return {"count": count, "latency_ms": count * 100, "db_wait_ms": count * 5}
+
+
+def test_limit_grows_additively_while_healthy():
+    """Test that healthy intervals raise the limit by one step up to the maximum."""
+    controller = concurrency.AIMDController(2, 4)
+    assert controller.update(_healthy()) == 3
+    assert controller.update(_healthy()) == 4
+    assert controller.update(_healthy()) == 4
+
+
+def test_limit_holds_without_enough_samples_or_on_slow_receivers():
+    """Test that a quiet interval or high latency neither grows nor cuts the limit."""
+    controller = concurrency.AIMDController(2, 32, initial=8)
+    assert controller.update({}) == 8
+    slow = _healthy()
+    slow["latency_ms"] = 100 * (settings.ADAPTIVE_CONCURRENCY_LATENCY_TARGET_MS + 1)
+    assert controller.update(slow) == 8
+
+
+def test_limit_backs_off_multiplicatively():
+    """Test that timeouts, slow claims and pool timeouts cut the limit down to the minimum."""
+    controller = concurrency.AIMDController(2, 32, initial=16)
+    with patch.object(settings, "ADAPTIVE_CONCURRENCY_DECREASE_FACTOR", 0.5):
+        timeouts = _healthy()
+        timeouts["timeouts"] = 50
+        assert controller.update(timeouts) == 8
+
+        slow_db = _healthy()
+        slow_db["db_wait_ms"] = 100 * (settings.ADAPTIVE_CONCURRENCY_DB_WAIT_TARGET_MS + 1)
+        assert controller.update(slow_db) == 4
+
+        assert controller.update({"saturated": 1}) == 2
+        assert controller.update({"saturated": 1}) == 2
@@ -0,0 +1,114 @@
+import uuid
+import fakeredis
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from app.workers import counters
+
+
+def test_record_and_aggregate():
+    """Test that increments are summed per subscription and hour bucket."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    first, second = uuid.uuid4(), uuid.uuid4()
+
+    with patch.object(counters, "redis_client", client):
+        counters.record(first, attempts=1)
+        counters.record(first, attempts=1, succeeded=1)
+        counters.record(second, attempts=1, failed=1)
+        pipe = client.pipeline(transaction=False)
+        counters.add(pipe, first, "expired", 3, datetime(2025, 10, 19, 8, 59))
+        pipe.execute()
+
+        rows = counters.aggregate(client.hgetall(counters.PENDING_KEY))
+
+    bucket = counters.bucket_of(datetime.utcnow())
+    assert rows[(str(first), bucket)] == {"attempts": 2, "succeeded": 1, "failed": 0, "expired": 0}
+    assert rows[(str(second), bucket)] == {"attempts": 1, "succeeded": 0, "failed": 1, "expired": 0}
+    assert rows[(str(first), datetime(2025, 10, 19, 8))]["expired"] == 3
+
+
+def test_flush_upserts_and_clears_pending():
+    """Test that a flush writes one row per subscription-hour and starts a fresh hash."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    subscription_id = uuid.uuid4()
+    db = MagicMock()
+
+    with patch.object(counters, "redis_client", client):
+        counters.record(subscription_id, attempts=2, succeeded=1)
+        assert counters.flush(db) == 1
+        params = db.execute.call_args[0][1]
+        assert params["subscription_ids"] == [str(subscription_id)]
+        assert params["attempts"] == [2] and params["succeeded"] == [1]
+        db.commit.assert_called_once()
+        assert not client.exists(counters.PENDING_KEY, counters.FLUSHING_KEY)
+
+        # Nothing new since - nothing to write
+        db.reset_mock()
+        assert counters.flush(db) == 0
+        db.execute.assert_not_called()
+
+
+def test_failed_flush_is_retried():
+    """Test that counts survive a failed upsert and are written by the next flush."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    subscription_id = uuid.uuid4()
+    db = MagicMock()
+    db.execute.side_effect = [RuntimeError("database unavailable"), None, MagicMock(rowcount=1), None]
+
+    with patch.object(counters, "redis_client", client):
+        counters.record(subscription_id, attempts=1)
+        try:
+            counters.flush(db)
+        except RuntimeError:
+            pass
+        assert client.exists(counters.FLUSHING_KEY)
+
+        # Counted meanwhile; waits for the following flush
+        counters.record(subscription_id, attempts=5)
+        assert counters.flush(db) == 1
+        assert db.execute.call_args[0][1]["attempts"] == [1]
+        assert client.hgetall(counters.PENDING_KEY)
+
+
+def test_applied_flush_is_not_added_twice():
+    """Test that a hash surviving its committed flush is dropped, not added again."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    subscription_id = uuid.uuid4()
+    db = MagicMock()
+
+    with patch.object(counters, "redis_client", client):
+        counters.record(subscription_id, attempts=3)
+        with patch.object(client, "delete", side_effect=[RuntimeError("connection lost"), 1]):
+            try:
+                counters.flush(db)
+            except RuntimeError:
+                pass
+        assert client.exists(counters.FLUSHING_KEY)
+        flush_id = client.hget(counters.FLUSHING_KEY, counters.FLUSH_ID_FIELD)
+        client.delete(counters.FLUSH_LOCK_KEY)
+
+        # The retry carries the same flush ID, which the database already holds
+        db.reset_mock()
+        db.execute.side_effect = [None, MagicMock(rowcount=0)]
+        assert counters.flush(db) == 0
+        assert db.execute.call_count == 2
+        assert db.execute.call_args[0][1]["flush_id"] == flush_id
+        db.commit.assert_called_once()
+        assert not client.exists(counters.FLUSHING_KEY)
+
+
+def test_flush_leaves_a_lock_taken_over_by_another_worker():
+    """Test that a flush outliving its lock does not release the next holder's."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    db = MagicMock()
+
+    def take_over(*args, **kwargs):
+        client.set(counters.FLUSH_LOCK_KEY, "other-worker")
+        return MagicMock(rowcount=1)
+
+    db.execute.side_effect = take_over
+    with patch.object(counters, "redis_client", client):
+        counters.record(uuid.uuid4(), attempts=1)
+        assert counters.flush(db) == 1
+
+    assert client.get(counters.FLUSH_LOCK_KEY) == "other-worker"
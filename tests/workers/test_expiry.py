@@ -0,0 +1,40 @@
+import uuid
+import fakeredis
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+from sqlalchemy.dialects import postgresql
+
+from app.workers import expiry
+
+
+def test_expires_at_for():
+    """Test that the TTL counts from the given start and is optional."""
+    start = datetime(2025, 5, 4, 12, 0, 0)
+    assert expiry.expires_at_for(90, start) == start + timedelta(seconds=90)
+    assert expiry.expires_at_for(None, start) is None
+
+
+def test_expired_counters():
+    """Test per-subscription and total expired counters."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    noisy, quiet = uuid.uuid4(), uuid.uuid4()
+
+    with patch.object(expiry, "redis_client", client):
+        expiry.record_expired([noisy, noisy, quiet])
+        expiry.record_expired([noisy])
+
+        assert expiry.expired_count(str(noisy)) == 3
+        assert expiry.expired_count(str(quiet)) == 1
+        assert expiry.expired_count() == 4
+
+
+def test_expiry_spares_tasks_with_a_live_lease():
+    """Test that only pending tasks and in-progress tasks with a lapsed lease are expired."""
+    db = MagicMock()
+    db.execute.return_value.all.return_value = []
+    expiry.expire_in_transaction(db, [uuid.uuid4()], datetime(2025, 5, 4, 12, 0, 0))
+
+    statement = db.execute.call_args[0][0]
+    where = str(statement.whereclause.compile(dialect=postgresql.dialect()))
+    assert "delivery_tasks.lease_expires_at IS NULL OR delivery_tasks.lease_expires_at <=" in where
+    assert "delivery_tasks.status = %(status_1)s OR delivery_tasks.status = %(status_2)s AND" in where
@@ -0,0 +1,27 @@
+import fakeredis
+from unittest.mock import MagicMock, patch
+
+from app.core.config import settings
+from app.services import fair_queue
+from app.workers import fair_dispatcher, lanes
+
+
+def test_dispatch_once_honours_weights_with_default_settings():
+    """Test that a subscription of weight 2 gets twice the deliveries of one of weight 1."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    backend = MagicMock()
+    backend.depth.return_value = 0
+
+    with patch.object(fair_queue, "redis_client", client), \
+         patch.object(fair_dispatcher.queue, "get_backend", return_value=backend):
+        fair_queue.push("light", [lanes.tag(f"l{i}", None) for i in range(5000)], weight=1)
+        fair_queue.push("heavy", [lanes.tag(f"h{i}", None) for i in range(5000)], weight=2)
+
+        dispatched = fair_dispatcher.dispatch_once()
+
+    task_ids = [task_id for call in backend.enqueue_many.call_args_list for task_id in call[0][0]]
+    light = sum(task_id.startswith("l") for task_id in task_ids)
+    heavy = sum(task_id.startswith("h") for task_id in task_ids)
+    # The room is filled exactly; the last visit may cut a share short
+    assert dispatched == len(task_ids) == settings.FAIR_DISPATCH_TARGET_DEPTH
+    assert abs(heavy - 2 * light) <= 2 * settings.FAIR_QUANTUM
@@ -0,0 +1,19 @@
+from app.db.models.delivery_task import DeliveryTask
+from app.db.models.delivery_task_history import DeliveryTaskHistory
+from app.workers import history
+
+
+def test_history_mirrors_every_task_column():
+    """Test that every delivery_tasks column has a home in delivery_task_history."""
+    task_columns = {column.name for column in DeliveryTask.__table__.columns}
+    history_columns = {column.name for column in DeliveryTaskHistory.__table__.columns}
+    assert task_columns <= history_columns
+    assert history_columns - task_columns == {"moved_at"}
+
+
+def test_move_statement_copies_columns_by_name():
+    """Test that the move names every column instead of relying on column order."""
+    sql = str(history.MOVE_BATCH_SQL)
+    for column in DeliveryTask.__table__.columns:
+        assert column.name in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
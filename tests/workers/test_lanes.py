@@ -0,0 +1,42 @@
+import fakeredis
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.workers import lanes
+
+
+def test_lane_routing():
+    """Test that subscription lanes win over event-type patterns."""
+    assert lanes.lane_for("payment.succeeded") == "high"
+    assert lanes.lane_for("analytics.pageview") == "low"
+    assert lanes.lane_for("order.created") == lanes.DEFAULT_LANE
+    assert lanes.lane_for(None) == lanes.DEFAULT_LANE
+    assert lanes.lane_for("analytics.pageview", subscription_lane="high") == "high"
+
+
+def test_worker_queues_steal_from_lower_lanes_only():
+    """Test that a lane's workers consume their own lane, then lower ones."""
+    assert lanes.queue_for(lanes.DEFAULT_LANE) == "webhooks"
+    assert lanes.worker_queues("high") == ["webhooks.high", "webhooks", "webhooks.low"]
+    assert lanes.worker_queues("low") == ["webhooks.low"]
+
+
+def test_tagging_round_trip():
+    """Test that lanes survive storage in Redis-held queues."""
+    members = [lanes.tag("t1", "high"), lanes.tag("t2", None), lanes.tag("t3", "high")]
+    assert members[1] == "t2"
+    assert lanes.group_by_lane(members) == {"high": ["t1", "t3"], lanes.DEFAULT_LANE: ["t2"]}
+
+
+def test_latency_stats():
+    """Test per-lane queue wait histograms."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    with patch.object(lanes, "redis_client", client):
+        lanes.record_latencies([("high", 0.03)] * 99 + [("high", 2.0)])
+        stats = lanes.latency_stats(minutes=1)
+
+    assert stats["high"]["count"] == 100
+    assert stats["high"]["p50_ms"] == 50.0
+    assert stats["high"]["p99_ms"] == 50.0
+    assert stats["low"]["count"] == 0
+    assert set(stats) == set(settings.PRIORITY_LANES)
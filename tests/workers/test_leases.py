@@ -0,0 +1,29 @@
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.workers import leases
+from app.workers.leases import LeaseKeeper, lease_deadline
+from app.core.config import settings
+
+
+def test_lease_deadline():
+    """Test that leases run for WEBHOOK_LEASE_SECONDS from the claim."""
+    now = datetime(2025, 5, 4, 12, 0, 0)
+    assert lease_deadline(now) == now + timedelta(seconds=settings.WEBHOOK_LEASE_SECONDS)
+
+
+def test_keeper_only_extends_expiring_leases():
+    """Test that the keeper extends held leases close to expiry, and nothing after release."""
+    keeper = LeaseKeeper(interval=3600)
+    task_id = uuid.uuid4()
+
+    with patch.object(leases, "get_db_context") as mock_db_context, \
+            patch.object(keeper, "_ensure_thread"):
+        with keeper.hold([task_id]):
+            keeper._held[task_id] = 0  # Pretend the lease is about to expire
+            assert keeper.extend_expiring() == 1
+            assert mock_db_context.called
+
+        # Released tasks are no longer extended
+        assert keeper.extend_expiring() == 0
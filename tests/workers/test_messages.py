@@ -0,0 +1,56 @@
+import uuid
+from types import SimpleNamespace
+from datetime import datetime
+
+from app.workers.messages import (
+    ENVELOPE_FORMAT,
+    build_delivery_envelope,
+    unpack_delivery_envelope,
+    subscription_version_stamp,
+)
+
+
+def _subscription(updated_at=datetime(2025, 5, 4, 12, 0, 0, 123456)):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        target_url="https://webhook.site/envelope",
+        updated_at=updated_at,
+    )
+
+
+def test_version_stamp_changes_with_updated_at():
+    """Test that any change to updated_at produces a different stamp."""
+    first = subscription_version_stamp(datetime(2025, 5, 4, 12, 0, 0, 1))
+    second = subscription_version_stamp(datetime(2025, 5, 4, 12, 0, 0, 2))
+
+    assert first != second
+    assert subscription_version_stamp(None) is None
+
+
+def test_envelope_round_trip():
+    """Test that an envelope built at ingest unpacks to the same snapshot."""
+    subscription = _subscription()
+    body = b'{"event": "test"}'
+
+    envelope = build_delivery_envelope(subscription, body)
+    assert envelope["f"] == ENVELOPE_FORMAT
+
+    message = unpack_delivery_envelope(envelope)
+    assert message["target_url"] == subscription.target_url
+    assert message["payload"] == body
+    assert message["stamp"] == subscription_version_stamp(subscription.updated_at)
+
+
+def test_envelope_without_stamp_is_not_built():
+    """Test that subscriptions without updated_at fall back to the database."""
+    assert build_delivery_envelope(_subscription(updated_at=None), b"{}") is None
+
+
+def test_unknown_envelope_format_is_rejected():
+    """Test that envelopes from other formats are ignored by the worker."""
+    envelope = build_delivery_envelope(_subscription(), b"{}")
+    envelope["f"] = ENVELOPE_FORMAT + 1
+
+    assert unpack_delivery_envelope(envelope) is None
+    assert unpack_delivery_envelope(None) is None
+    assert unpack_delivery_envelope({"f": ENVELOPE_FORMAT}) is None
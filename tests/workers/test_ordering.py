@@ -0,0 +1,62 @@
+import uuid
+import fakeredis
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+from app.workers import ordering
+from app.db.models.delivery_task import DeliveryStatus as TaskStatus
+
+
+def test_ordering_key_lease_is_exclusive():
+    """Test that only one worker at a time holds an ordering key."""
+    client = fakeredis.FakeRedis()
+    token = ordering.acquire_lease("sub-1", client=client)
+
+    assert token is not None
+    assert ordering.acquire_lease("sub-1", client=client) is None
+    assert ordering.acquire_lease("sub-2", client=client) is not None
+
+    ordering.release_lease("sub-1", "someone-else", client=client)
+    assert ordering.acquire_lease("sub-1", client=client) is None
+
+    ordering.release_lease("sub-1", token, client=client)
+    assert ordering.acquire_lease("sub-1", client=client) is not None
+
+
+def test_head_waiting_for_retry_blocks_its_key():
+    """Test that a head scheduled for a later retry is neither delivered nor re-kicked."""
+    head = SimpleNamespace(
+        id=uuid.uuid4(), status=TaskStatus.PENDING, event_type=None,
+        next_attempt_at=datetime.utcnow() + timedelta(minutes=5), lease_expires_at=None, priority_lane=None
+    )
+
+    with patch.object(ordering, "acquire_lease", return_value="token"), \
+            patch.object(ordering, "release_lease") as mock_release, \
+            patch.object(ordering, "find_head", return_value=head), \
+            patch.object(ordering, "kick") as mock_kick, \
+            patch("app.workers.tasks.execute_delivery") as mock_execute:
+        assert ordering.run_ordered_key(MagicMock(), "sub-1") is False
+
+    mock_execute.assert_not_called()
+    mock_kick.assert_not_called()
+    mock_release.assert_called_once_with("sub-1", "token")
+
+
+def test_due_head_is_delivered_and_next_head_kicked():
+    """Test that the key's due head is delivered and the following one is kicked in its subscription's lane."""
+    head = SimpleNamespace(
+        id=uuid.uuid4(), status=TaskStatus.PENDING, event_type=None,
+        next_attempt_at=None, lease_expires_at=None, priority_lane="high"
+    )
+
+    with patch.object(ordering, "acquire_lease", return_value="token"), \
+            patch.object(ordering, "release_lease"), \
+            patch.object(ordering, "find_head", return_value=head), \
+            patch.object(ordering, "kick") as mock_kick, \
+            patch("app.workers.tasks.execute_delivery") as mock_execute:
+        assert ordering.run_ordered_key(MagicMock(), "sub-1") is True
+
+    mock_execute.assert_called_once()
+    assert mock_execute.call_args.kwargs["ordered"] is True
+    mock_kick.assert_called_once_with("sub-1", "high")
@@ -0,0 +1,80 @@
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+from app.core.config import settings
+from app.workers import outbox
+
+
+def _row(next_attempt_at=None, subscription_id=None, dispatch_weight=1):
+    return SimpleNamespace(
+        id=uuid.uuid4(), delivery_task_id=uuid.uuid4(), subscription_id=subscription_id or uuid.uuid4(),
+        next_attempt_at=next_attempt_at, event_type=None, priority_lane=None, dispatch_weight=dispatch_weight
+    )
+
+
+def _db(rows):
+    db = MagicMock()
+    db.begin.return_value.__exit__.return_value = False  # Let errors out of the transaction
+    claim = db.query.return_value.join.return_value.join.return_value.order_by.return_value
+    claim.limit.return_value.with_for_update.return_value.all.return_value = rows
+    return db
+
+
+def _deleted(db) -> bool:
+    return db.query.return_value.filter.return_value.delete.called
+
+
+def test_scheduled_rows_go_to_the_delay_queue():
+    """Test that rows due later are scheduled and only due rows are queued right away."""
+    later, due = _row(datetime.utcnow() + timedelta(minutes=10)), _row()
+    db = _db([later, due])
+    backend = MagicMock()
+
+    with patch.object(outbox.queue, "get_backend", return_value=backend), \
+         patch.object(settings, "FAIR_DISPATCH_ENABLED", False), \
+         patch.object(settings, "WEBHOOK_BATCH_PUBLISH_ENABLED", False):
+        assert outbox.relay_outbox_batch(db) == 2
+
+    task_id = backend.schedule.call_args[0][0]
+    assert task_id == str(later.delivery_task_id)
+    assert 590 < backend.schedule.call_args.kwargs["countdown"] <= 600
+    backend.enqueue_many.assert_called_once_with([str(due.delivery_task_id)], lane="default")
+    assert _deleted(db)
+
+
+def test_fair_dispatch_routes_rows_through_the_fair_queue():
+    """Test that with fair dispatch rows are pushed per subscription with its weight."""
+    subscription_id = uuid.uuid4()
+    rows = [_row(subscription_id=subscription_id, dispatch_weight=3) for _ in range(2)]
+    db = _db(rows)
+    backend = MagicMock()
+
+    with patch.object(outbox.queue, "get_backend", return_value=backend), \
+         patch.object(outbox.fair_queue, "push") as mock_push, \
+         patch.object(settings, "FAIR_DISPATCH_ENABLED", True):
+        assert outbox.relay_outbox_batch(db) == 2
+
+    mock_push.assert_called_once_with(
+        str(subscription_id), [str(row.delivery_task_id) for row in rows], weight=3
+    )
+    backend.enqueue_many.assert_not_called()
+    backend.enqueue_batch.assert_not_called()
+    assert _deleted(db)
+
+
+def test_rows_are_kept_when_publishing_fails():
+    """Test that a publish error leaves the outbox rows for the next pass."""
+    db = _db([_row(), _row()])
+    backend = MagicMock()
+    backend.enqueue_many.side_effect = ConnectionError("broker down")
+
+    with patch.object(outbox.queue, "get_backend", return_value=backend), \
+         patch.object(settings, "FAIR_DISPATCH_ENABLED", False), \
+         patch.object(settings, "WEBHOOK_BATCH_PUBLISH_ENABLED", False):
+        with pytest.raises(ConnectionError):
+            outbox.relay_outbox_batch(db)
+
+    assert not _deleted(db)
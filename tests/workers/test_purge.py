@@ -0,0 +1,88 @@
+import fakeredis
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.core.config import settings
+from app.workers import purge
+
+
+def _db(rowcounts):
+    db = MagicMock()
+    db.execute.side_effect = [SimpleNamespace(rowcount=count) for count in rowcounts]
+    return db
+
+
+def test_purge_deletes_in_chunks_then_the_subscription():
+    """Test that every dependent table is drained chunk by chunk before the subscription row goes."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    subscription_id = uuid.uuid4()
+    # Two full chunks of tasks, one partial; nothing in history; one partial chunk of logs and of ordering keys
+    db = _db([2, 2, 1, 0, 1, 1, 1])
+
+    with patch.object(purge, "redis_client", client), \
+            patch.object(settings, "RETENTION_CHUNK_SIZE", 2), \
+            patch.object(purge.retention, "wait_for_replicas"):
+        progress = purge.run_purge(db, subscription_id, sleep=lambda _: None)
+
+    assert progress["state"] == "done"
+    assert progress["deleted"] == {
+        "delivery_tasks": 5, "delivery_task_history": 0, "delivery_logs": 1, "ordering_sequences": 1
+    }
+    assert "ordering_key IN (SELECT ordering_key" in str(db.execute.call_args_list[-2].args[0])
+    assert "DELETE FROM subscriptions" in str(db.execute.call_args_list[-1].args[0])
+    with patch.object(purge, "redis_client", client):
+        assert purge.get_progress(subscription_id)["state"] == "done"
+
+
+def test_purge_stops_at_time_budget_and_keeps_progress():
+    """Test that a purge out of time keeps the subscription and its progress for the next run."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    subscription_id = uuid.uuid4()
+    db = _db([2])
+
+    with patch.object(purge, "redis_client", client), \
+            patch.object(settings, "RETENTION_CHUNK_SIZE", 2):
+        progress = purge.run_purge(db, subscription_id, max_seconds=0, sleep=lambda _: None)
+        assert progress["state"] == "purging"
+        assert db.execute.call_count == 1
+
+        db = _db([1, 0, 0, 0, 1])
+        progress = purge.run_purge(db, subscription_id, sleep=lambda _: None)
+
+    assert progress["state"] == "done"
+    assert progress["deleted"]["delivery_tasks"] == 3
+
+
+def test_purge_skips_a_subscription_another_run_holds():
+    """Test that a second run leaves a subscription alone while the first holds its lock."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    subscription_id = uuid.uuid4()
+    db = _db([])
+
+    with patch.object(purge, "redis_client", client):
+        client.set(purge.PURGE_LOCK_KEY.format(subscription_id), "other-run")
+        assert purge.run_purge(db, subscription_id, sleep=lambda _: None) is None
+        db.execute.assert_not_called()
+
+        # A finished run releases its own lock only
+        client.delete(purge.PURGE_LOCK_KEY.format(subscription_id))
+        assert purge.run_purge(_db([0, 0, 0, 0, 1]), subscription_id, sleep=lambda _: None)["state"] == "done"
+        assert not client.exists(purge.PURGE_LOCK_KEY.format(subscription_id))
+
+
+def test_sweep_stops_at_its_time_budget():
+    """Test that the sweep hands each purge what is left of its budget and stops when it runs out."""
+    subscription_ids = [uuid.uuid4() for _ in range(3)]
+    db = MagicMock()
+    db.execute.return_value = [SimpleNamespace(id=subscription_id) for subscription_id in subscription_ids]
+    clock = iter([0.0, 0.0, 50.0, 100.0])
+
+    with patch.object(purge.purge_deleted_subscriptions, "_db", db, create=True), \
+            patch.object(settings, "SUBSCRIPTION_PURGE_SWEEP_MAX_SECONDS", 100), \
+            patch.object(settings, "RETENTION_MAX_RUN_SECONDS", 300), \
+            patch.object(purge.time, "monotonic", side_effect=lambda: next(clock)), \
+            patch.object(purge, "run_purge") as mock_run:
+        assert purge.purge_deleted_subscriptions() == 2
+
+    assert [call.kwargs["max_seconds"] for call in mock_run.call_args_list] == [100.0, 50.0]
@@ -0,0 +1,52 @@
+import fakeredis
+import pytest
+from unittest.mock import patch
+
+from app.workers import queue
+from app.workers.queue import RedisStreamsQueueBackend, CeleryQueueBackend
+
+
+@pytest.fixture
+def streams_backend():
+    return RedisStreamsQueueBackend(fakeredis.FakeRedis(decode_responses=True))
+
+
+def test_streams_enqueue_many(streams_backend):
+    """Test that each task ID becomes one stream entry."""
+    streams_backend.enqueue("task-1")
+    streams_backend.enqueue_many(["task-2", "task-3"])
+
+    entries = streams_backend.client.xrange(streams_backend.stream_key)
+    assert [fields["t"] for _, fields in entries] == ["task-1", "task-2", "task-3"]
+
+
+def test_schedule_uses_delay_queue(streams_backend):
+    """Test that delayed deliveries go to the delay queue, not the stream."""
+    with patch("app.services.delay_queue.schedule") as mock_schedule:
+        streams_backend.schedule("later-task", countdown=3600)
+
+    task_id, due = mock_schedule.call_args[0]
+    assert task_id == "later-task"
+    assert streams_backend.client.xlen(streams_backend.stream_key) == 0
+
+
+def test_get_backend_from_settings(monkeypatch):
+    """Test backend selection and rejection of unknown backends."""
+    monkeypatch.setattr(queue, "_backend", None)
+    monkeypatch.setattr(queue.settings, "DELIVERY_QUEUE_BACKEND", "celery")
+    assert isinstance(queue.get_backend(), CeleryQueueBackend)
+
+    monkeypatch.setattr(queue, "_backend", None)
+    monkeypatch.setattr(queue.settings, "DELIVERY_QUEUE_BACKEND", "carrier-pigeon")
+    with pytest.raises(ValueError):
+        queue.get_backend()
+
+
+def test_backend_must_implement_every_enqueue():
+    """Test that a backend missing an enqueue method fails at construction, not at first use."""
+    class PartialBackend(queue.QueueBackend):
+        def enqueue(self, task_id, envelope=None, lane=None):
+            pass
+
+    with pytest.raises(TypeError, match="enqueue_coalesced"):
+        PartialBackend()
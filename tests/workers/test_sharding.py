@@ -0,0 +1,46 @@
+import uuid
+
+from app.workers import sharding
+
+
+def test_shard_for_is_stable_and_in_range():
+    """Test that a subscription always maps to the same shard."""
+    subscription_id = uuid.uuid4()
+    shard = sharding.shard_for(subscription_id, shard_count=64)
+    assert 0 <= shard < 64
+    assert sharding.shard_for(str(subscription_id), shard_count=64) == shard
+
+
+def test_growing_shard_count_moves_few_subscriptions():
+    """Test that going from 64 to 80 shards only moves subscriptions to the new shards."""
+    subscription_ids = [uuid.uuid4() for _ in range(2000)]
+    moved = 0
+    for subscription_id in subscription_ids:
+        before = sharding.shard_for(subscription_id, shard_count=64)
+        after = sharding.shard_for(subscription_id, shard_count=80)
+        if before != after:
+            assert after >= 64
+            moved += 1
+    # About 1 - 64/80 = 20% are expected to move
+    assert moved < len(subscription_ids) * 0.3
+
+
+def test_every_shard_has_distinct_owners():
+    """Test that each shard gets the configured number of different workers."""
+    workers = ["w1", "w2", "w3", "w4"]
+    for shard in range(32):
+        owners = sharding.owners(shard, workers, replicas=2)
+        assert len(set(owners)) == 2
+
+
+def test_adding_a_worker_only_moves_its_shards():
+    """Test that rebalancing is bounded to the shards the new worker wins."""
+    workers = ["w1", "w2", "w3", "w4"]
+    before = {shard: sharding.owners(shard, workers, replicas=1)[0] for shard in range(256)}
+    after = {shard: sharding.owners(shard, workers + ["w5"], replicas=1)[0] for shard in range(256)}
+
+    moved = [shard for shard in before if before[shard] != after[shard]]
+    assert all(after[shard] == "w5" for shard in moved)
+    assert len(moved) < 256 * 0.35
+
+    assert sharding.shards_for_worker("w5", workers + ["w5"], replicas=1, shard_count=256) == sorted(moved)
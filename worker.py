@@ -1,6 +1,10 @@
 import os
+import socket
+import argparse
 import logging
+from app.core.config import settings
 from app.workers.celery_app import celery_app
+from app.workers import lanes, sharding, concurrency as adaptive
 
 # Configure logging
 logging.basicConfig(
@@ -10,14 +14,60 @@ logging.basicConfig(
 
 # This script serves as an entry point for the celery worker
 # It can be used to start a worker with: python worker.py
+#
+# With --lane the worker gets the lane's reserved capacity
+# (PRIORITY_LANE_CONCURRENCY) and consumes that lane first, then every lower
+# lane when it is idle, e.g. python worker.py --lane high
+#
+# With sharded routing, --shard-worker binds the worker to the default-lane
+# shards SHARD_WORKERS assigns to that name (see app.workers.sharding), plus
+# the unsharded default queue, e.g. python worker.py --shard-worker w1
+#
+# With ADAPTIVE_CONCURRENCY_ENABLED the fixed concurrency is replaced by an
+# AIMD-controlled pool between ADAPTIVE_CONCURRENCY_MIN and _MAX processes
+# (see app.workers.concurrency)
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start a webhook delivery worker")
+    parser.add_argument("--lane", choices=settings.PRIORITY_LANES, help="Priority lane to reserve this worker for")
+    parser.add_argument("--shard-worker", choices=settings.SHARD_WORKERS or None, help="Shard worker name to bind this worker to")
+    args = parser.parse_args()
+
+    if args.lane and args.shard_worker:
+        parser.error("--lane and --shard-worker are mutually exclusive")
+
+    if args.shard_worker:
+        queues = lanes.shard_queues(sharding.shards_for_worker(args.shard_worker)) + [lanes.DEFAULT_QUEUE]
+        concurrency = settings.PRIORITY_LANE_CONCURRENCY.get(lanes.DEFAULT_LANE, 4)
+        hostname = f"{args.shard_worker}@%h"
+    elif args.lane:
+        queues = lanes.worker_queues(args.lane)
+        concurrency = settings.PRIORITY_LANE_CONCURRENCY.get(args.lane, 4)
+        hostname = f"{args.lane}@%h"
+    else:
+        # Listen to every lane, highest first, every shard, plus maintenance
+        queues = lanes.worker_queues(settings.PRIORITY_LANES[0]) + ["maintenance"]
+        if settings.SHARDED_ROUTING_ENABLED:
+            queues += lanes.shard_queues()
+        concurrency = 4
+        hostname = "worker@%h"
+
+    if settings.ADAPTIVE_CONCURRENCY_ENABLED:
+        # Pool processes report their samples to this node's controller
+        os.environ[adaptive.NODE_ENV] = hostname.replace("%h", socket.gethostname())
+        celery_app.conf.worker_autoscaler = "app.workers.concurrency:AIMDAutoscaler"
+        pool_option = f'--autoscale={settings.ADAPTIVE_CONCURRENCY_MAX},{settings.ADAPTIVE_CONCURRENCY_MIN}'
+    else:
+        pool_option = f'--concurrency={concurrency}'
+
     # Start the worker
     celery_app.worker_main(
         argv=[
             'worker',
             '--loglevel=info',
-            '--concurrency=4',
+            pool_option,
+            '-n',
+            hostname,
             '-Q',
-            'webhooks,maintenance',  # Listen to both queues
+            ','.join(queues),
         ]
-    )
\ No newline at end of file
+    )